@@ -0,0 +1,129 @@
+"""
+Micro-benchmark of the vLLM /metrics page parsing done by EngineStatsScraper.
+
+Compares EngineStats.from_vllm_scrape against the full prometheus_client text
+parser it replaced.
+
+Args:
+    --url: Scrape a live vLLM engine (e.g. http://localhost:8000) and benchmark on its page
+    --scrape-file: Benchmark on a saved /metrics page (e.g. `curl <engine>/metrics > page.txt`)
+    --num-models: Number of models in the generated page when no page is provided
+    --iterations: Number of parsing iterations per implementation
+"""
+
+import argparse
+import random
+import time
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+from vllm_router.stats.engine_stats import EngineStats
+
+# Bucket boundaries used by vLLM for its latency and token-count histograms
+LATENCY_BUCKETS = [
+    0.001, 0.005, 0.01, 0.02, 0.04, 0.06, 0.08, 0.1, 0.25, 0.5, 0.75,
+    1.0, 2.5, 5.0, 7.5, 10.0, 20.0, 40.0, 80.0, 160.0, 640.0, 2560.0,
+]  # fmt: skip
+TOKEN_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+HISTOGRAMS = {
+    "vllm:time_to_first_token_seconds": LATENCY_BUCKETS,
+    "vllm:time_per_output_token_seconds": LATENCY_BUCKETS,
+    "vllm:e2e_request_latency_seconds": LATENCY_BUCKETS,
+    "vllm:request_queue_time_seconds": LATENCY_BUCKETS,
+    "vllm:request_inference_time_seconds": LATENCY_BUCKETS,
+    "vllm:request_prefill_time_seconds": LATENCY_BUCKETS,
+    "vllm:request_decode_time_seconds": LATENCY_BUCKETS,
+    "vllm:request_prompt_tokens": TOKEN_BUCKETS,
+    "vllm:request_generation_tokens": TOKEN_BUCKETS,
+    "vllm:iteration_tokens_total": TOKEN_BUCKETS,
+    "vllm:request_max_num_generation_tokens": TOKEN_BUCKETS,
+    "vllm:request_params_n": TOKEN_BUCKETS,
+    "vllm:request_params_max_tokens": TOKEN_BUCKETS,
+}
+
+SCALARS = {
+    "vllm:num_requests_running": ("gauge", 3),
+    "vllm:num_requests_waiting": ("gauge", 7),
+    "vllm:gpu_cache_usage_perc": ("gauge", 0.42),
+    "vllm:gpu_prefix_cache_queries": ("counter", 1000),
+    "vllm:gpu_prefix_cache_hits": ("counter", 250),
+    "vllm:num_preemptions": ("counter", 0),
+    "vllm:prompt_tokens": ("counter", 123456),
+    "vllm:generation_tokens": ("counter", 654321),
+}
+
+
+def generate_vllm_scrape(num_models: int) -> str:
+    """Generate a page with the same metric families and layout as vLLM."""
+    lines = []
+    models = [f"model-{i}" for i in range(num_models)]
+    for family, buckets in HISTOGRAMS.items():
+        lines.append(f"# HELP {family} Histogram.")
+        lines.append(f"# TYPE {family} histogram")
+        for model in models:
+            labels = f'engine="0",model_name="{model}"'
+            count = 0
+            for bucket in [*map(float, buckets), "+Inf"]:
+                count += random.randint(0, 100)
+                lines.append(
+                    f'{family}_bucket{{engine="0",le="{bucket}",model_name="{model}"}} {float(count)}'
+                )
+            lines.append(f"{family}_count{{{labels}}} {float(count)}")
+            lines.append(f"{family}_sum{{{labels}}} {random.random() * 1000}")
+    for family, (metric_type, value) in SCALARS.items():
+        lines.append(f"# HELP {family} Scalar.")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for model in models:
+            labels = f'engine="0",model_name="{model}"'
+            if metric_type == "counter":
+                lines.append(f"{family}_total{{{labels}}} {float(value)}")
+                lines.append(f"{family}_created{{{labels}}} {time.time()}")
+            else:
+                lines.append(f"{family}{{{labels}}} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def prometheus_client_parse(vllm_scrape: str) -> None:
+    for family in text_string_to_metric_families(vllm_scrape):
+        for _ in family.samples:
+            pass
+
+
+def bench(fn, vllm_scrape: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(vllm_scrape)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", type=str, default=None)
+    parser.add_argument("--scrape-file", type=str, default=None)
+    parser.add_argument("--num-models", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.url:
+        vllm_scrape = requests.get(args.url + "/metrics", timeout=10).text
+    elif args.scrape_file:
+        with open(args.scrape_file) as f:
+            vllm_scrape = f.read()
+    else:
+        vllm_scrape = generate_vllm_scrape(args.num_models)
+
+    print(
+        f"Page size: {len(vllm_scrape)} bytes, {vllm_scrape.count(chr(10))} lines, "
+        f"models: {sorted(EngineStats.from_vllm_scrape_per_model(vllm_scrape))}"
+    )
+    baseline = bench(prometheus_client_parse, vllm_scrape, args.iterations)
+    targeted = bench(EngineStats.from_vllm_scrape, vllm_scrape, args.iterations)
+    print(f"prometheus_client parser: {baseline * 1e6:10.1f} us/page")
+    print(f"from_vllm_scrape:         {targeted * 1e6:10.1f} us/page")
+    print(f"speedup:                  {baseline / targeted:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Stand-in engine sidecar that pushes engine stats to the router over one
+streaming connection. Requires the router to run with --engine-stats-push.
+
+Args:
+    --router-url: URL of the router, e.g. http://localhost:8001
+    --engine-url: URL of the engine as known by the router's service discovery
+    --scrape-url: Where to read the engine's /metrics page (defaults to --engine-url)
+    --fake: Publish random load instead of scraping the engine
+    --interval: Seconds between two reports
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+
+from vllm_router.stats.engine_stats import EngineStats
+
+
+async def collect_stats(
+    session: aiohttp.ClientSession, scrape_url: str, fake: bool
+) -> EngineStats:
+    if fake:
+        return EngineStats(
+            num_running_requests=random.randint(0, 32),
+            num_queuing_requests=random.randint(0, 16),
+            gpu_cache_usage_perc=random.random(),
+        )
+    async with session.get(scrape_url + "/metrics") as response:
+        response.raise_for_status()
+        return EngineStats.from_vllm_scrape(await response.text())
+
+
+async def generate_reports(args, session: aiohttp.ClientSession):
+    scrape_url = args.scrape_url or args.engine_url
+    while True:
+        start = time.time()
+        stats = await collect_stats(session, scrape_url, args.fake)
+        report = {"url": args.engine_url, **stats.__dict__}
+        print(f"Pushing {report}")
+        yield (json.dumps(report) + "\n").encode()
+        await asyncio.sleep(max(0.0, args.interval - (time.time() - start)))
+
+
+async def main(args):
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.post(
+                    args.router_url + "/engine_stats",
+                    data=generate_reports(args, session),
+                    timeout=aiohttp.ClientTimeout(total=None),
+                ) as response:
+                    print(f"Router closed the stream: {await response.text()}")
+            except aiohttp.ClientError as e:
+                print(f"Lost connection to the router: {e}, reconnecting")
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--router-url", type=str, required=True)
+    parser.add_argument("--engine-url", type=str, required=True)
+    parser.add_argument("--scrape-url", type=str, default=None)
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--interval", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the PII check of a growing chat conversation.
+
+Compares the previous check, one regex pass per PII type over the JSON of the
+whole request, against check_pii, which scans the user content in one pass
+and, in a session, only the messages added since the previous request. Also
+reports the time of one RegexAnalyzer pass over the user content of the whole
+conversation, e.g. for its first request to a router.
+
+Args:
+    --turns: Number of turns of the conversation
+    --tokens: Approximate number of tokens of the conversation at its last turn
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from types import SimpleNamespace
+
+from vllm_router.experimental.pii import PIIConfig, check_pii
+from vllm_router.experimental.pii.analyzers.regex import RegexAnalyzer
+
+WORDS = ["the", "router", "sends", "each", "request", "to", "an", "engine,", "(see"]
+# Words per line of a message, and lines with a number
+LINE_WORDS = 15
+NUMBER_EVERY = 50
+
+
+def make_conversation(turns: int, tokens: int):
+    rng = random.Random(0)
+    words_per_message = max(1, tokens // (2 * turns))
+    messages = []
+    for i in range(turns):
+        for role in ("user", "assistant"):
+            lines = [
+                " ".join(rng.choice(WORDS) for _ in range(LINE_WORDS))
+                + (f" step {j}" if j % NUMBER_EVERY == 0 else "")
+                for j in range(max(1, words_per_message // LINE_WORDS))
+            ]
+            messages.append({"role": role, "content": "\n".join(lines)})
+    return messages
+
+
+async def previous_check(analyzer, body):
+    # Per-type passes over json.dumps of the whole body
+    text = json.dumps(body)
+    for pattern in analyzer.patterns.values():
+        for _ in pattern.finditer(text):
+            pass
+
+
+async def scan_once(analyzer, messages):
+    # One analysis of the whole conversation, without the session state
+    text = "\n\n".join(m["content"] for m in messages if m["role"] != "assistant")
+    start = time.perf_counter()
+    await analyzer.analyze(text)
+    return time.perf_counter() - start
+
+
+async def bench(args):
+    analyzer = RegexAnalyzer()
+    await analyzer.initialize()
+    config = PIIConfig(session_key="x-user-id")
+    messages = make_conversation(args.turns, args.tokens)
+
+    def request(body):
+        async def get_json():
+            return body
+
+        return SimpleNamespace(
+            json=get_json,
+            headers={"x-user-id": "bench"},
+            url=SimpleNamespace(path="/v1/chat/completions"),
+            state=SimpleNamespace(
+                router_stage_labels={"model": "", "routing_logic": ""}
+            ),
+        )
+
+    for name, check in (
+        ("per-type json.dumps", lambda body: previous_check(analyzer, body)),
+        ("check_pii", lambda body: check_pii(request(body), analyzer, config)),
+    ):
+        latencies = []
+        for turn in range(1, args.turns + 1):
+            body = {"model": "llama3", "messages": messages[: 2 * turn - 1]}
+            start = time.perf_counter()
+            await check(body)
+            latencies.append(time.perf_counter() - start)
+        print(
+            f"{name + ':':22} last turn {latencies[-1] * 1e3:8.3f} ms, "
+            f"mean {sum(latencies) / len(latencies) * 1e3:8.3f} ms"
+        )
+    duration = await scan_once(analyzer, messages)
+    print(f"{'full scan:':22} last turn {duration * 1e3:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=100000)
+    args = parser.parse_args()
+    logging.disable(logging.DEBUG)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Concurrency benchmark of the semantic cache lookups done by the router.
+
+Runs concurrent chat requests that each look up the semantic cache and then
+stream a response, like the router does on a cache miss, and compares the
+blocking SemanticCache.search against the batched, off-loop search_async.
+Reports the request throughput and the longest event loop stall, which delays
+every in-flight stream.
+
+With --url, sends the concurrent requests to a running router started with
+--feature-gates=SemanticCache=true instead, and reports its throughput.
+
+Args:
+    --url: Benchmark a running router (e.g. http://localhost:8001)
+    --model: Model name of the requests
+    --embedding-model: Sentence transformer model of the in-process cache
+    --num-requests: Number of requests
+    --concurrency: Number of concurrent requests
+    --stream-chunks: Number of chunks streamed by each simulated response
+    --cached-entries: Number of entries stored in the cache before the benchmark
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+
+import aiohttp
+
+from vllm_router.experimental.semantic_cache import SemanticCache
+
+# Interval of the simulated response chunks, about one decoded token
+CHUNK_INTERVAL = 0.01
+
+
+def make_messages(i: int):
+    return [{"role": "user", "content": f"Question {i} {uuid.uuid4()}: {'why ' * 20}"}]
+
+
+async def run_concurrently(request_fn, num_requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(i):
+        async with semaphore:
+            await request_fn(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(i) for i in range(num_requests)))
+    return time.perf_counter() - start
+
+
+async def bench_in_process(cache: SemanticCache, args, use_async: bool):
+    max_stall = 0.0
+    running = True
+
+    async def watch_loop():
+        nonlocal max_stall
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_stall = max(max_stall, time.perf_counter() - start - 0.001)
+
+    async def request(i):
+        messages = make_messages(i)
+        if use_async:
+            await cache.search_async(messages, args.model)
+        else:
+            cache.search(messages, args.model)
+        for _ in range(args.stream_chunks):
+            await asyncio.sleep(CHUNK_INTERVAL)
+
+    watcher = asyncio.create_task(watch_loop())
+    elapsed = await run_concurrently(request, args.num_requests, args.concurrency)
+    running = False
+    await watcher
+    return args.num_requests / elapsed, max_stall
+
+
+async def bench_router(args) -> float:
+    async with aiohttp.ClientSession() as session:
+
+        async def request(i):
+            body = {"model": args.model, "messages": make_messages(i), "stream": True}
+            async with session.post(
+                args.url + "/v1/chat/completions", json=body
+            ) as response:
+                async for _ in response.content.iter_any():
+                    pass
+
+        elapsed = await run_concurrently(request, args.num_requests, args.concurrency)
+    return args.num_requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", type=str, default=None)
+    parser.add_argument("--model", type=str, default="fake_model_name")
+    parser.add_argument("--embedding-model", type=str, default="all-MiniLM-L6-v2")
+    parser.add_argument("--num-requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--cached-entries", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.url:
+        throughput = asyncio.run(bench_router(args))
+        print(f"router: {throughput:10.1f} requests/s")
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = SemanticCache(args.embedding_model, cache_dir=cache_dir)
+        for i in range(args.cached_entries):
+            cache.db.store(
+                embedding=cache.get_embedding(make_messages(i)),
+                request_messages=[],
+                response_messages=[],
+                model=args.model,
+                usage={},
+            )
+        # Unbatched, the lookups block the event loop one after the other
+        for name, use_async in (("search", False), ("search_async", True)):
+            throughput, max_stall = asyncio.run(
+                bench_in_process(cache, args, use_async)
+            )
+            print(
+                f"{name + ':':14} {throughput:10.1f} requests/s, "
+                f"longest event loop stall: {max_stall * 1e3:8.1f} ms"
+            )
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+from aiohttp import web
+from starlette.requests import ClientDisconnect
+
+from vllm_router import aiohttp_client
+from vllm_router.services.request_service import request as request_module
+from vllm_router.stats.request_stats import RequestStatsMonitor
+
+URL = "http://engine"
+
+
+@pytest.fixture
+def monitor():
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+    yield RequestStatsMonitor(60)
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+
+
+def test_aborted_requests_in_request_stats(monitor) -> None:
+    monitor.on_new_request(URL, "request-1", 1.0)
+    monitor.on_new_request(URL, "request-2", 1.0)
+    monitor.on_request_response(URL, "request-2", 2.0)
+    monitor.on_request_aborted(URL, "request-1", 3.0, client_disconnected=True)
+    monitor.on_request_aborted(URL, "request-2", 3.0)
+
+    stats = monitor.get_request_stats(4.0)[URL]
+    assert stats.aborted_requests == 1
+    assert stats.in_prefill_requests == 0
+    assert stats.in_decoding_requests == 0
+    assert not monitor.request_start_time
+
+
+def test_request_completed_without_response_token(monitor) -> None:
+    monitor.on_new_request(URL, "request-1", 1.0)
+    monitor.on_request_complete(URL, "request-1", 2.0)
+
+    stats = monitor.get_request_stats(3.0)[URL]
+    assert stats.in_prefill_requests == 0
+    assert stats.finished_requests == 1
+    assert not monitor.request_start_time
+
+
+async def _process_request(monitor, handler, disconnect_after):
+    """
+    Proxy a request to an engine served with handler, for a client that
+    disconnects after disconnect_after seconds.
+
+    Returns:
+        The chunks received before the disconnection, or the exception raised
+    """
+    app = web.Application()
+    app.router.add_post("/v1/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    backend_url = f"http://127.0.0.1:{port}"
+
+    start_time = asyncio.get_running_loop().time()
+
+    async def is_disconnected():
+        return asyncio.get_running_loop().time() - start_time > disconnect_after
+
+    session = aiohttp.ClientSession()
+    request = MagicMock()
+    request.method = "POST"
+    request.headers = {}
+    request.state = SimpleNamespace()
+    request.is_disconnected = is_disconnected
+    request.app.state = SimpleNamespace(
+        aiohttp_client_wrapper=lambda: session,
+        request_stats_monitor=monitor,
+        engine_stats_scraper=MagicMock(),
+        semantic_cache_available=False,
+        callbacks=None,
+    )
+    chunks = []
+    try:
+        generator = request_module.process_request(
+            request,
+            json.dumps({"stream": True}).encode(),
+            backend_url,
+            "request-1",
+            "/v1/completions",
+            None,
+        )
+        async for chunk in generator:
+            chunks.append(chunk)
+    except ClientDisconnect as e:
+        return e
+    finally:
+        await session.close()
+        await runner.cleanup()
+    return chunks
+
+
+def test_disconnect_before_response_aborts_request(
+    monitor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(request_module, "DISCONNECT_CHECK_INTERVAL", 0.01)
+
+    async def handler(request):
+        # E.g. a long non-streaming request
+        await asyncio.sleep(0.5)
+        return web.json_response({})
+
+    result = asyncio.run(_process_request(monitor, handler, disconnect_after=0.05))
+    assert isinstance(result, ClientDisconnect)
+    stats = next(iter(monitor.get_request_stats(0).values()))
+    assert stats.aborted_requests == 1
+    assert stats.in_prefill_requests == 0
+
+
+def test_disconnect_while_streaming_aborts_request(
+    monitor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(request_module, "DISCONNECT_CHECK_INTERVAL", 0.01)
+    engine_aborted = []
+
+    async def handler(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        try:
+            for _ in range(1000):
+                await response.write(b"data: {}\n\n")
+                await asyncio.sleep(0.01)
+        except (ConnectionResetError, asyncio.CancelledError):
+            engine_aborted.append(True)
+            raise
+        return response
+
+    chunks = asyncio.run(_process_request(monitor, handler, disconnect_after=0.1))
+    # The headers and some chunks, but not the whole response
+    assert 1 < len(chunks) < 100
+    assert engine_aborted
+    stats = next(iter(monitor.get_request_stats(0).values()))
+    assert stats.aborted_requests == 1
+    assert stats.in_prefill_requests == 0
+    assert stats.in_decoding_requests == 0
+    assert stats.finished_requests == 0
+
+
+def test_engine_read_timeout_fails_the_request(
+    monitor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(aiohttp_client, "_backend_timeout", None)
+    aiohttp_client.set_backend_timeout(connect_timeout=1.0, read_timeout=0.05)
+
+    async def handler(request):
+        # An engine that stops answering in the middle of a response
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"data: {}\n\n")
+        await asyncio.sleep(1)
+        return response
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_process_request(monitor, handler, disconnect_after=10))
+    stats = next(iter(monitor.get_request_stats(0).values()))
+    assert stats.consecutive_errors == 1
+    assert stats.error_rate == 1.0
@@ -0,0 +1,440 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
+import pytest
+from aiohttp import web
+from prometheus_client import REGISTRY
+
+from vllm_router.aiohttp_client import KEEPALIVE_TIMEOUT, EndpointSessionPool
+from vllm_router.routers.routing_logic import (
+    DisaggregatedPrefillRouter,
+    estimate_prompt_tokens,
+)
+from vllm_router.services.request_service import request as request_module
+from vllm_router.stats.engine_stats import EngineStats
+from vllm_router.utils import SingletonABCMeta
+
+
+@pytest.fixture
+def router():
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+    yield DisaggregatedPrefillRouter(["prefill"], ["decode"])
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+
+
+def _endpoint(url, model_label):
+    return SimpleNamespace(url=url, model_label=model_label)
+
+
+ENDPOINTS = [
+    _endpoint("http://p1", "prefill"),
+    _endpoint("http://p2", "prefill"),
+    _endpoint("http://d1", "decode"),
+    _endpoint("http://d2", "decode"),
+]
+
+
+def _route_prefill(router, endpoints, num_tokens, request_json=None):
+    return asyncio.run(
+        router.route_prefill(endpoints, {}, request_json or {}, num_tokens)
+    )
+
+
+def test_prefill_goes_to_fewest_pending_tokens(router) -> None:
+    first = _route_prefill(router, ENDPOINTS, 1000)
+    second = _route_prefill(router, ENDPOINTS, 10)
+    assert {first, second} == {"http://p1", "http://p2"}
+    # The short prefill finished, its prefiller has the fewest pending tokens
+    router.on_prefill_finished(second, 10)
+    assert _route_prefill(router, ENDPOINTS, 10) == second
+
+    router.on_prefill_finished(first, 1000)
+    router.on_prefill_finished(second, 10)
+    assert not router.pending_prefill_tokens
+
+
+def test_prefix_aware_prefill() -> None:
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+    router = DisaggregatedPrefillRouter(
+        ["prefill"], ["decode"], prefix_aware_prefill=True
+    )
+    system_prompt = "You are a helpful assistant. " * 40
+    request_json = {"messages": [{"content": system_prompt + "Hi"}]}
+    num_tokens = estimate_prompt_tokens(request_json)
+    first = _route_prefill(router, ENDPOINTS, num_tokens, request_json)
+    router.on_prefill_finished(first, num_tokens)
+
+    # Same system prompt, other question: same prefiller, even with a few
+    # pending prefill tokens
+    router.pending_prefill_tokens[first] = 50
+    request_json = {"messages": [{"content": system_prompt + "Hello"}]}
+    assert _route_prefill(router, ENDPOINTS, num_tokens, request_json) == first
+
+    # Too many pending prefill tokens to wait for the reused ones
+    router.pending_prefill_tokens[first] = 10000
+    assert _route_prefill(router, ENDPOINTS, num_tokens, request_json) != first
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+
+
+def test_decode_goes_to_most_free_kv_cache(router) -> None:
+    engine_stats = {
+        "http://d1": EngineStats(gpu_cache_usage_perc=0.9),
+        "http://d2": EngineStats(gpu_cache_usage_perc=0.3, num_running_requests=8),
+    }
+    assert router.route_decode(ENDPOINTS, engine_stats) == "http://d2"
+
+    # Close KV cache usages, the least loaded decoder is picked
+    engine_stats["http://d1"] = EngineStats(gpu_cache_usage_perc=0.32)
+    assert router.route_decode(ENDPOINTS, engine_stats) == "http://d1"
+
+
+def test_pools_follow_discovered_endpoints(router) -> None:
+    assert router.route_decode(ENDPOINTS[:2], {}) is None
+    assert _route_prefill(router, ENDPOINTS[2:], 10) is None
+    assert _route_prefill(router, ENDPOINTS[1:], 10) == "http://p2"
+
+
+def test_estimate_prompt_tokens() -> None:
+    assert estimate_prompt_tokens({"prompt": "a" * 400}) == 100
+    assert estimate_prompt_tokens({"prompt": [1, 2, 3]}) == 3
+    assert estimate_prompt_tokens({"messages": [{"content": "a" * 40}]}) == 10
+    assert estimate_prompt_tokens({"messages": []}) == 1
+
+
+def test_endpoint_session_pool() -> None:
+    async def run():
+        pool = EndpointSessionPool()
+        session = pool.get("http://p1")
+        assert pool.get("http://p1") is session
+        pool.get("http://p2")
+
+        await pool.sync(["http://p2"])
+        assert list(pool.sessions) == ["http://p2"]
+        assert session.closed
+
+        # The session of a removed engine is closed after its last request
+        async with pool.use("http://p2") as session:
+            await pool.sync(["http://p3"])
+            assert not session.closed
+            # Discovered again, then removed again
+            await pool.sync(["http://p2"])
+            await pool.sync([])
+            assert not session.closed
+        assert session.closed
+        assert not pool.sessions
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_endpoint_session_pool_tracks_idle_connections(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = 100.0
+    monkeypatch.setattr("vllm_router.aiohttp_client.time.monotonic", lambda: now)
+
+    async def run():
+        nonlocal now
+        pool = EndpointSessionPool()
+        assert not pool.has_idle_connection("http://d1")
+        async with pool.use("http://d1"):
+            pass
+        assert pool.has_idle_connection("http://d1")
+        async with pool.use("http://d1"):
+            # The request reuses the idle connection
+            assert not pool.has_idle_connection("http://d1")
+            with pytest.raises(aiohttp.ClientError):
+                async with pool.use("http://d1"):
+                    raise aiohttp.ClientConnectionError()
+        # The failed request closed its connection, the other one is idle
+        assert pool.has_idle_connection("http://d1")
+        now += KEEPALIVE_TIMEOUT
+        assert not pool.has_idle_connection("http://d1")
+        await pool.close()
+
+    asyncio.run(run())
+
+
+async def _start_engine(app: web.Application) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _route_pd_request(
+    monkeypatch,
+    router,
+    request_json,
+    prefill,
+    decode,
+    health=None,
+    is_disconnected=None,
+    num_requests=1,
+):
+    """
+    Route a disaggregated prefill request to a prefill and a decode engine
+    served with the given handlers, num_requests times in a row.
+
+    Returns:
+        The response, its body (None if the stream broke) and the decoder URL
+    """
+    prefill_app = web.Application()
+    prefill_app.router.add_post("/v1/completions", prefill)
+    decode_app = web.Application()
+    decode_app.router.add_post("/v1/completions", decode)
+    if health is not None:
+        decode_app.router.add_get("/health", health)
+    prefill_runner, prefill_url = await _start_engine(prefill_app)
+    decode_runner, decode_url = await _start_engine(decode_app)
+    endpoints = [
+        SimpleNamespace(url=url, model_label=label, model_names=["model"], sleep=False)
+        for url, label in ((prefill_url, "prefill"), (decode_url, "decode"))
+    ]
+    monkeypatch.setattr(
+        request_module,
+        "get_service_discovery",
+        lambda: SimpleNamespace(get_endpoint_info=lambda: endpoints),
+    )
+    monkeypatch.setattr(request_module, "DISCONNECT_CHECK_INTERVAL", 0.01)
+    request = MagicMock()
+    request.headers = {}
+    request.is_disconnected = is_disconnected or AsyncMock(return_value=False)
+    request.app.state = SimpleNamespace(
+        router=router,
+        endpoint_session_pool=EndpointSessionPool(),
+        engine_stats_scraper=MagicMock(get_engine_stats=dict),
+    )
+    try:
+        for _ in range(num_requests):
+            request.json = AsyncMock(return_value=dict(request_json))
+            response = await request_module.route_disaggregated_prefill_request(
+                request, "/v1/completions", None
+            )
+            body = None
+            if hasattr(response, "body_iterator"):
+                body = b"".join([chunk async for chunk in response.body_iterator])
+    finally:
+        await request.app.state.endpoint_session_pool.close()
+        await prefill_runner.cleanup()
+        await decode_runner.cleanup()
+    return response, body, decode_url
+
+
+@pytest.fixture
+def pd_router():
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+    yield DisaggregatedPrefillRouter(["prefill"], ["decode"])
+    SingletonABCMeta._instances.pop(DisaggregatedPrefillRouter, None)
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_pipelined_handoff(pd_router, monkeypatch: pytest.MonkeyPatch) -> None:
+    pd_router.pipelined_handoff = True
+    events = []
+
+    async def prefill(request):
+        events.append("prefill")
+        # The decoder is connected to while the prefill runs
+        await asyncio.sleep(0.1)
+        return web.json_response({"kv_transfer_params": {"block_ids": [1]}})
+
+    async def health(request):
+        events.append("health")
+        return web.Response()
+
+    async def decode(request):
+        events.append(("decode", await request.json()))
+        return web.Response(body=b"decoded")
+
+    _response, body, decode_url = asyncio.run(
+        _route_pd_request(
+            monkeypatch,
+            pd_router,
+            {"model": "model", "prompt": "hi", "max_tokens": 5},
+            prefill,
+            decode,
+            health=health,
+        )
+    )
+    assert body == b"decoded"
+    assert events[:2] in (["prefill", "health"], ["health", "prefill"])
+    assert events[2][1]["max_tokens"] == 5
+    assert events[2][1]["kv_transfer_params"] == {"block_ids": [1]}
+    handoffs = REGISTRY.get_sample_value(
+        "vllm:pd_handoff_latency_seconds_count", {"server": decode_url}
+    )
+    assert handoffs == 1
+
+
+def test_pipelined_handoff_reuses_decode_connections(
+    pd_router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pd_router.pipelined_handoff = True
+    health_checks = []
+
+    async def prefill(request):
+        await asyncio.sleep(0.05)
+        return web.json_response({})
+
+    async def health(request):
+        health_checks.append(request)
+        return web.Response()
+
+    async def decode(request):
+        return web.Response(body=b"decoded")
+
+    _response, body, _decode_url = asyncio.run(
+        _route_pd_request(
+            monkeypatch,
+            pd_router,
+            {"model": "model", "prompt": "hi", "max_tokens": 5},
+            prefill,
+            decode,
+            health=health,
+            num_requests=3,
+        )
+    )
+    assert body == b"decoded"
+    # Only the first request had to open a connection to the decoder
+    assert len(health_checks) == 1
+
+
+def test_decoder_error_is_an_sse_event(
+    pd_router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def prefill(request):
+        return web.json_response({})
+
+    async def decode(request):
+        return web.Response(status=503, reason="Overloaded")
+
+    response, body, _ = asyncio.run(
+        _route_pd_request(
+            monkeypatch,
+            pd_router,
+            {"model": "model", "prompt": "hi", "stream": True},
+            prefill,
+            decode,
+        )
+    )
+    assert response.media_type == "text/event-stream"
+    event, done = body.decode().split("\n\n")[:2]
+    assert event.startswith("data: ")
+    error = json.loads(event[len("data: ") :])["error"]
+    assert error["code"] == 503
+    assert error["type"] == "decoder_error"
+    assert done == "data: [DONE]"
+
+
+def test_decoder_error_status_is_returned(
+    pd_router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def prefill(request):
+        return web.json_response({})
+
+    async def decode(request):
+        return web.Response(status=503, reason="Overloaded")
+
+    response, _, _ = asyncio.run(
+        _route_pd_request(
+            monkeypatch,
+            pd_router,
+            {"model": "model", "prompt": "hi"},
+            prefill,
+            decode,
+        )
+    )
+    assert response.status_code == 503
+    error = json.loads(response.body)["error"]
+    assert error["code"] == 503
+    assert error["type"] == "decoder_error"
+
+
+def test_disconnect_during_prefill_cancels_it(
+    pd_router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    decoded = []
+
+    async def prefill(request):
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    async def decode(request):
+        decoded.append(True)
+        return web.Response(body=b"decoded")
+
+    abandoned = _sample("vllm:pd_abandoned_requests_total", {"leg": "prefill"})
+    wasted = _sample("vllm:pd_wasted_tokens_total", {"leg": "prefill"})
+    response, _, _ = asyncio.run(
+        asyncio.wait_for(
+            _route_pd_request(
+                monkeypatch,
+                pd_router,
+                {"model": "model", "prompt": "hi"},
+                prefill,
+                decode,
+                is_disconnected=AsyncMock(side_effect=[False, True]),
+            ),
+            timeout=5,
+        )
+    )
+    assert response.status_code == 499
+    assert not decoded
+    assert not pd_router.pending_prefill_tokens
+    assert (
+        _sample("vllm:pd_abandoned_requests_total", {"leg": "prefill"}) == abandoned + 1
+    )
+    assert _sample("vllm:pd_wasted_tokens_total", {"leg": "prefill"}) > wasted
+
+
+def test_disconnect_during_decode_cancels_it(
+    pd_router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    connected = asyncio.Event()
+    decode_cancelled = []
+
+    async def prefill(request):
+        return web.json_response({})
+
+    async def decode(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        try:
+            for _ in range(1000):
+                await response.write(b"data: {}\n\n")
+                await asyncio.sleep(0.01)
+        except (ConnectionResetError, asyncio.CancelledError):
+            decode_cancelled.append(True)
+            raise
+        return response
+
+    async def is_disconnected():
+        # Disconnects a few decoded tokens into the stream
+        await asyncio.sleep(0.05)
+        return connected.is_set() or connected.set()
+
+    wasted = _sample("vllm:pd_wasted_tokens_total", {"leg": "decode"})
+    asyncio.run(
+        asyncio.wait_for(
+            _route_pd_request(
+                monkeypatch,
+                pd_router,
+                {"model": "model", "prompt": "hi", "stream": True},
+                prefill,
+                decode,
+                is_disconnected=is_disconnected,
+            ),
+            timeout=5,
+        )
+    )
+    assert decode_cancelled
+    assert _sample("vllm:pd_wasted_tokens_total", {"leg": "decode"}) > wasted
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+from vllm_router.routers.metrics_router import (
+    MAX_ENGINE_STATS_REPORT_SIZE,
+    push_engine_stats,
+)
+from vllm_router.stats.engine_stats import (
+    EngineStats,
+    EngineStatsScraper,
+    parse_vllm_scrape,
+)
+from vllm_router.utils import SingletonMeta
+
+SINGLE_MODEL_SCRAPE = """# HELP vllm:num_requests_running Number of requests in model execution batches.
+# TYPE vllm:num_requests_running gauge
+vllm:num_requests_running{engine="0",model_name="llama3"} 3.0
+# HELP vllm:num_requests_waiting Number of requests waiting to be processed.
+# TYPE vllm:num_requests_waiting gauge
+vllm:num_requests_waiting{engine="0",model_name="llama3"} 7.0
+# HELP vllm:gpu_cache_usage_perc GPU KV-cache usage. 1 means 100 percent usage.
+# TYPE vllm:gpu_cache_usage_perc gauge
+vllm:gpu_cache_usage_perc{engine="0",model_name="llama3"} 0.42
+# HELP vllm:gpu_prefix_cache_queries Number of GPU prefix cache queries.
+# TYPE vllm:gpu_prefix_cache_queries counter
+vllm:gpu_prefix_cache_queries_total{engine="0",model_name="llama3"} 1000.0
+vllm:gpu_prefix_cache_queries_created{engine="0",model_name="llama3"} 1.7e+09
+# HELP vllm:gpu_prefix_cache_hits Number of GPU prefix cache hits.
+# TYPE vllm:gpu_prefix_cache_hits counter
+vllm:gpu_prefix_cache_hits_total{engine="0",model_name="llama3"} 250.0
+# HELP vllm:time_to_first_token_seconds Histogram of time to first token in seconds.
+# TYPE vllm:time_to_first_token_seconds histogram
+vllm:time_to_first_token_seconds_bucket{engine="0",le="0.001",model_name="llama3"} 0.0
+vllm:time_to_first_token_seconds_bucket{engine="0",le="+Inf",model_name="llama3"} 5.0
+vllm:time_to_first_token_seconds_count{engine="0",model_name="llama3"} 5.0
+vllm:time_to_first_token_seconds_sum{engine="0",model_name="llama3"} 1.25
+"""
+
+
+def _reference_stats(vllm_scrape: str) -> EngineStats:
+    # The original implementation, based on prometheus_client's parser
+    fields = {
+        "vllm:num_requests_running": "num_running_requests",
+        "vllm:num_requests_waiting": "num_queuing_requests",
+        "vllm:gpu_prefix_cache_hit_rate": "gpu_prefix_cache_hit_rate",
+        "vllm:gpu_prefix_cache_hits_total": "gpu_prefix_cache_hits_total",
+        "vllm:gpu_prefix_cache_queries_total": "gpu_prefix_cache_queries_total",
+        "vllm:gpu_cache_usage_perc": "gpu_cache_usage_perc",
+    }
+    values = {}
+    for family in text_string_to_metric_families(vllm_scrape):
+        for sample in family.samples:
+            if sample.name in fields:
+                values[fields[sample.name]] = sample.value
+    return EngineStats(**values)
+
+
+def test_from_vllm_scrape_matches_prometheus_client_parser() -> None:
+    assert EngineStats.from_vllm_scrape(SINGLE_MODEL_SCRAPE) == _reference_stats(
+        SINGLE_MODEL_SCRAPE
+    )
+
+
+def test_from_vllm_scrape_when_metric_is_on_first_line_parses_it() -> None:
+    stats = EngineStats.from_vllm_scrape("vllm:num_requests_waiting 4\n")
+    assert stats.num_queuing_requests == 4
+
+
+@pytest.mark.parametrize(
+    "line",
+    (
+        "vllm:num_requests_running_other 5.0",
+        'vllm:num_requests_running_other{model_name="llama3"} 5.0',
+        "# vllm:num_requests_running 5.0",
+        "vllm:num_requests_running",
+        "vllm:num_requests_running{broken 5.0",
+    ),
+)
+def test_parse_vllm_scrape_ignores_unrelated_or_malformed_lines(line: str) -> None:
+    assert parse_vllm_scrape(f"{line}\n") == {}
+
+
+def test_parse_vllm_scrape_ignores_timestamps() -> None:
+    assert parse_vllm_scrape("vllm:num_requests_running 2 1700000000000") == {
+        "": [("vllm:num_requests_running", 2.0)]
+    }
+
+
+def test_parse_vllm_scrape_only_reads_the_model_name_label() -> None:
+    scrape = (
+        'vllm:num_requests_running{xmodel_name="other",model_name="llama3"} 2\n'
+        'vllm:num_requests_waiting{xmodel_name="other"} 1\n'
+    )
+    assert parse_vllm_scrape(scrape) == {
+        "llama3": [("vllm:num_requests_running", 2.0)],
+        "": [("vllm:num_requests_waiting", 1.0)],
+    }
+
+
+def test_from_vllm_scrape_keeps_the_worst_ratios_of_the_models() -> None:
+    scrape = (
+        'vllm:gpu_prefix_cache_hit_rate{model_name="llama3"} 0.8\n'
+        'vllm:gpu_prefix_cache_hit_rate{model_name="mistral"} 0.3\n'
+        'vllm:gpu_cache_usage_perc{model_name="llama3"} 0.2\n'
+        'vllm:gpu_cache_usage_perc{model_name="mistral"} 0.7\n'
+    )
+
+    stats = EngineStats.from_vllm_scrape(scrape)
+
+    assert stats.gpu_prefix_cache_hit_rate == 0.3
+    assert stats.gpu_cache_usage_perc == 0.7
+
+
+def test_from_vllm_scrape_with_multiple_models_aggregates_them() -> None:
+    scrape = SINGLE_MODEL_SCRAPE + SINGLE_MODEL_SCRAPE.replace(
+        "llama3", "mistral"
+    ).replace("0.42", "0.9")
+
+    stats = EngineStats.from_vllm_scrape(scrape)
+
+    assert stats.num_running_requests == 6
+    assert stats.num_queuing_requests == 14
+    assert stats.gpu_prefix_cache_hits_total == 500
+    assert stats.gpu_prefix_cache_queries_total == 2000
+    assert stats.gpu_cache_usage_perc == 0.9
+
+
+def test_from_vllm_scrape_per_model_splits_by_model_name() -> None:
+    scrape = SINGLE_MODEL_SCRAPE + SINGLE_MODEL_SCRAPE.replace(
+        "llama3", "mistral"
+    ).replace("0.42", "0.9")
+
+    stats = EngineStats.from_vllm_scrape_per_model(scrape)
+
+    assert set(stats) == {"llama3", "mistral"}
+    assert stats["llama3"] == _reference_stats(SINGLE_MODEL_SCRAPE)
+    assert stats["mistral"].gpu_cache_usage_perc == 0.9
+    assert stats["mistral"].num_queuing_requests == 7
+
+
+@pytest.fixture
+def engine_stats_scraper(monkeypatch: pytest.MonkeyPatch):
+    def _create(push_ttl):
+        SingletonMeta._instances.pop(EngineStatsScraper, None)
+        monkeypatch.setattr(EngineStatsScraper, "_scrape_worker", lambda self: None)
+        return EngineStatsScraper(30, push_ttl)
+
+    yield _create
+    SingletonMeta._instances.pop(EngineStatsScraper, None)
+
+
+def test_from_dict_when_value_is_not_a_number_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        EngineStats.from_dict({"num_queuing_requests": "3"})
+
+
+def test_get_engine_stats_prefers_fresh_pushed_stats(engine_stats_scraper) -> None:
+    scraper = engine_stats_scraper(push_ttl=2.0)
+    scraper.engine_stats["http://engine1"] = EngineStats(num_queuing_requests=10)
+    scraper.engine_stats["http://engine2"] = EngineStats(num_queuing_requests=20)
+
+    scraper.on_engine_stats_pushed(
+        "http://engine1", EngineStats(num_queuing_requests=1), time.time()
+    )
+    scraper.on_engine_stats_pushed(
+        "http://engine2", EngineStats(num_queuing_requests=2), time.time() - 5
+    )
+
+    stats = scraper.get_engine_stats()
+    assert stats["http://engine1"].num_queuing_requests == 1
+    assert stats["http://engine2"].num_queuing_requests == 20
+
+
+def test_scrape_metrics_skips_engines_with_fresh_pushed_stats(
+    engine_stats_scraper, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    scraper = engine_stats_scraper(push_ttl=2.0)
+    discovery = MagicMock()
+    discovery.get_endpoint_info.return_value = [
+        MagicMock(url="http://engine1"),
+        MagicMock(url="http://engine2"),
+    ]
+    monkeypatch.setattr(
+        "vllm_router.stats.engine_stats.get_service_discovery", lambda: discovery
+    )
+    scraped_urls = []
+
+    def _scrape_one_endpoint(url):
+        scraped_urls.append(url)
+        return EngineStats(num_queuing_requests=5)
+
+    monkeypatch.setattr(scraper, "_scrape_one_endpoint", _scrape_one_endpoint)
+    scraper.on_engine_stats_pushed(
+        "http://engine1", EngineStats(num_queuing_requests=1), time.time()
+    )
+
+    scraper._scrape_metrics()
+
+    assert scraped_urls == ["http://engine2"]
+    assert scraper.get_engine_stats()["http://engine1"].num_queuing_requests == 1
+
+
+def test_on_engine_stats_pushed_when_push_disabled_raises_value_error(
+    engine_stats_scraper,
+) -> None:
+    scraper = engine_stats_scraper(push_ttl=None)
+    with pytest.raises(ValueError):
+        scraper.on_engine_stats_pushed("http://engine1", EngineStats(), time.time())
+
+
+def test_get_engine_stats_counts_requests_dispatched_since_the_scrape(
+    engine_stats_scraper,
+) -> None:
+    scraper = engine_stats_scraper(push_ttl=None)
+    scraper.engine_stats["http://engine1"] = EngineStats(
+        num_running_requests=2, num_queuing_requests=1
+    )
+
+    scraper.on_request_dispatched("http://engine1")
+    scraper.on_request_dispatched("http://engine1")
+    scraper.on_request_dispatched("http://engine1")
+    scraper.on_request_finished("http://engine1")
+
+    stats = scraper.get_engine_stats()["http://engine1"]
+    assert stats.router_inflight_delta == 2
+    assert stats.effective_load == 5
+
+
+def test_scrape_metrics_reconciles_dispatched_requests(
+    engine_stats_scraper, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    scraper = engine_stats_scraper(push_ttl=None)
+    discovery = MagicMock()
+    discovery.get_endpoint_info.return_value = [MagicMock(url="http://engine1")]
+    monkeypatch.setattr(
+        "vllm_router.stats.engine_stats.get_service_discovery", lambda: discovery
+    )
+    monkeypatch.setattr(
+        scraper,
+        "_scrape_one_endpoint",
+        lambda url: EngineStats(num_running_requests=2),
+    )
+    scraper.on_request_dispatched("http://engine1")
+    scraper.on_request_dispatched("http://engine1")
+
+    scraper._scrape_metrics()
+    assert scraper.get_engine_stats()["http://engine1"].effective_load == 2
+
+    # Finishing a request the scrape already saw lowers the load
+    scraper.on_request_finished("http://engine1")
+    assert scraper.get_engine_stats()["http://engine1"].effective_load == 1
+
+
+def test_effective_load_is_never_negative() -> None:
+    assert (
+        EngineStats(num_running_requests=1, router_inflight_delta=-3).effective_load
+        == 0
+    )
+
+
+def test_from_dict_ignores_router_side_fields() -> None:
+    stats = EngineStats.from_dict(
+        {"num_queuing_requests": 3, "router_inflight_delta": 5}
+    )
+    assert stats == EngineStats(num_queuing_requests=3)
+
+
+def test_pushed_stats_follow_the_discovered_engines(
+    engine_stats_scraper, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    scraper = engine_stats_scraper(push_ttl=2.0)
+    endpoints = [MagicMock(url="http://engine1")]
+    service_discovery = MagicMock()
+    service_discovery.get_endpoint_info.side_effect = lambda: list(endpoints)
+    monkeypatch.setattr(
+        "vllm_router.routers.metrics_router.get_service_discovery",
+        lambda: service_discovery,
+    )
+
+    def make_request(*chunks):
+        async def stream():
+            for chunk in chunks:
+                # An engine discovered while the stream is open
+                if b"engine2" in chunk:
+                    endpoints.append(MagicMock(url="http://engine2"))
+                yield chunk
+
+        return MagicMock(stream=stream)
+
+    response = asyncio.run(
+        push_engine_stats(
+            make_request(
+                b'{"url": "http://engine1", "num_queuing_requests": 1}\n',
+                b'{"url": "http://engine2", "num_queuing_requests": 2}\n',
+            )
+        )
+    )
+    assert json.loads(response.body) == {"accepted": 2}
+    assert scraper.get_engine_stats()["http://engine2"].num_queuing_requests == 2
+
+    # A report that never ends closes the stream
+    response = asyncio.run(
+        push_engine_stats(
+            make_request(b'{"url": "', b"x" * MAX_ENGINE_STATS_REPORT_SIZE)
+        )
+    )
+    assert response.status_code == 413
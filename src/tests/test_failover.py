@@ -0,0 +1,201 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from vllm_router.routers.routing_logic import RoundRobinRouter
+from vllm_router.services.request_service import request as request_module
+from vllm_router.services.request_service.failover import RequestFailover
+from vllm_router.stats.request_stats import RequestStatsMonitor
+from vllm_router.utils import SingletonMeta
+
+
+@pytest.fixture
+def failover():
+    SingletonMeta._instances.pop(RequestFailover, None)
+    yield RequestFailover(max_attempts=2, cooldown=10.0)
+    SingletonMeta._instances.pop(RequestFailover, None)
+
+
+def _endpoints(*urls):
+    return [
+        SimpleNamespace(url=url, model_names=["model"], sleep=False, Id=url)
+        for url in urls
+    ]
+
+
+def test_failed_engine_is_excluded_for_cooldown(
+    failover, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = 100.0
+    monkeypatch.setattr(
+        "vllm_router.services.request_service.failover.time.monotonic", lambda: now
+    )
+    endpoints = _endpoints("http://a", "http://b")
+    failover.on_engine_failure("http://a")
+    assert failover.filter_endpoints(endpoints) == endpoints[1:]
+
+    now = 111.0
+    assert failover.filter_endpoints(endpoints) == endpoints
+    assert not failover.excluded_until
+
+
+def test_all_engines_excluded_keeps_all(failover) -> None:
+    endpoints = _endpoints("http://a", "http://b")
+    failover.on_engine_failure("http://a")
+    failover.on_engine_failure("http://b")
+    assert failover.filter_endpoints(endpoints) == endpoints
+
+
+def _mock_request(router):
+    request = MagicMock()
+    request.body = AsyncMock(return_value=json.dumps({"model": "model"}).encode())
+    request.headers = {}
+    request.query_params = {}
+    request.state = SimpleNamespace()
+    request.app.state = SimpleNamespace(
+        router=router,
+        callbacks=None,
+        engine_stats_scraper=MagicMock(get_engine_stats=dict),
+        request_stats_monitor=MagicMock(get_request_stats=lambda now: {}),
+    )
+    return request
+
+
+def _fake_process_request(responses, sent):
+    async def process_request(
+        request, body, backend_url, request_id, endpoint, background_tasks
+    ):
+        sent.append(backend_url)
+        response = responses[backend_url]
+        if isinstance(response, Exception):
+            raise response
+        yield {}, response
+        yield backend_url.encode()
+
+    return process_request
+
+
+@pytest.mark.parametrize(
+    "failure", [503, aiohttp.ClientConnectionError("connection refused")]
+)
+def test_request_fails_over_to_another_engine(
+    failover, failure, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sent = []
+    monkeypatch.setattr(
+        request_module,
+        "process_request",
+        _fake_process_request({"http://a": failure, "http://b": 200}, sent),
+    )
+    service_discovery = MagicMock()
+    service_discovery.get_endpoint_info.return_value = _endpoints(
+        "http://a", "http://b"
+    )
+    monkeypatch.setattr(
+        request_module, "get_service_discovery", lambda: service_discovery
+    )
+    SingletonMeta._instances.pop(RoundRobinRouter, None)
+    request = _mock_request(RoundRobinRouter())
+
+    response = asyncio.run(
+        request_module.route_general_request(request, "/v1/completions", None)
+    )
+
+    assert response.status_code == 200
+    assert sent == ["http://a", "http://b"]
+    assert failover.is_excluded("http://a")
+    SingletonMeta._instances.pop(RoundRobinRouter, None)
+
+
+def test_request_not_retried_beyond_attempt_budget(
+    failover, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sent = []
+    responses = {"http://a": 503, "http://b": 502, "http://c": 503}
+    monkeypatch.setattr(
+        request_module, "process_request", _fake_process_request(responses, sent)
+    )
+    service_discovery = MagicMock()
+    service_discovery.get_endpoint_info.return_value = _endpoints(
+        "http://a", "http://b", "http://c"
+    )
+    monkeypatch.setattr(
+        request_module, "get_service_discovery", lambda: service_discovery
+    )
+    SingletonMeta._instances.pop(RoundRobinRouter, None)
+    request = _mock_request(RoundRobinRouter())
+
+    response = asyncio.run(
+        request_module.route_general_request(request, "/v1/completions", None)
+    )
+
+    # The response of the last attempt is returned
+    assert len(sent) == 2
+    assert response.status_code == responses[sent[-1]]
+    # Also the engine of the last attempt is kept away from the next requests
+    assert all(failover.is_excluded(url) for url in sent)
+    SingletonMeta._instances.pop(RoundRobinRouter, None)
+
+
+def test_retried_error_is_recorded_for_outlier_detection(
+    failover, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+    monitor = RequestStatsMonitor(60)
+    urls = []
+
+    async def handler(request):
+        if str(request.url.origin()) == urls[0]:
+            return web.json_response({}, status=503)
+        return web.json_response({"choices": []})
+
+    async def run():
+        runners = []
+        for _ in range(2):
+            app = web.Application()
+            app.router.add_post("/v1/completions", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            runners.append(runner)
+            urls.append(f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+        # Round robin starts with the first URL, which answers 503
+        urls.sort()
+
+        service_discovery = MagicMock()
+        service_discovery.get_endpoint_info.return_value = _endpoints(*urls)
+        monkeypatch.setattr(
+            request_module, "get_service_discovery", lambda: service_discovery
+        )
+        SingletonMeta._instances.pop(RoundRobinRouter, None)
+        request = _mock_request(RoundRobinRouter())
+        session = aiohttp.ClientSession()
+        request.method = "POST"
+        request.is_disconnected = AsyncMock(return_value=False)
+        request.app.state.aiohttp_client_wrapper = lambda: session
+        request.app.state.request_stats_monitor = monitor
+        request.app.state.semantic_cache_available = False
+        try:
+            response = await request_module.route_general_request(
+                request, "/v1/completions", None
+            )
+            async for _ in response.body_iterator:
+                pass
+        finally:
+            await session.close()
+            for runner in runners:
+                await runner.cleanup()
+        return response
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    # The 503 closed for the failover counts as an error of its engine
+    assert monitor.consecutive_errors == {urls[0]: 1, urls[1]: 0}
+    SingletonMeta._instances.pop(RoundRobinRouter, None)
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
@@ -0,0 +1,219 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from vllm_router.routers.routing_logic import RoundRobinRouter
+from vllm_router.services.request_service import request as request_module
+from vllm_router.services.request_service.hedging import (
+    RequestHedger,
+    get_request_hedger,
+)
+from vllm_router.services.request_service.request import send_hedged_request
+from vllm_router.stats.engine_stats import EngineStats
+from vllm_router.stats.request_stats import RequestStatsMonitor
+from vllm_router.utils import SingletonABCMeta, SingletonMeta
+
+
+@pytest.fixture
+def hedger():
+    SingletonMeta._instances.pop(RequestHedger, None)
+    yield RequestHedger(percentile=90, budget=1.0, min_delay=0.0)
+    SingletonMeta._instances.pop(RequestHedger, None)
+
+
+@pytest.fixture
+def router():
+    SingletonABCMeta._instances.pop(RoundRobinRouter, None)
+    yield RoundRobinRouter()
+    SingletonABCMeta._instances.pop(RoundRobinRouter, None)
+
+
+def _mock_request(router):
+    request = MagicMock()
+    request.app.state.router = router
+    return request
+
+
+def test_get_request_hedger_not_initialized() -> None:
+    SingletonMeta._instances.pop(RequestHedger, None)
+    assert get_request_hedger() is None
+
+
+def test_delay_is_percentile_of_response_times(hedger) -> None:
+    for i in range(hedger.MIN_SAMPLES - 1):
+        hedger.on_response_time("/v1/embeddings", (i + 1) / 100)
+    assert hedger.get_delay("/v1/embeddings") is None
+
+    hedger.on_response_time("/v1/embeddings", 0.2)
+    assert hedger.get_delay("/v1/embeddings") == pytest.approx(0.18)
+    assert hedger.get_delay("/v1/score") is None
+
+
+def test_delay_is_at_least_min_delay(hedger) -> None:
+    hedger.min_delay = 1.0
+    for _ in range(hedger.MIN_SAMPLES):
+        hedger.on_response_time("/v1/embeddings", 0.01)
+    assert hedger.get_delay("/v1/embeddings") == 1.0
+
+
+def test_budget_limits_hedged_requests(hedger) -> None:
+    hedger.budget = 0.25
+    hedged = 0
+    for _ in range(100):
+        hedger.on_eligible_request()
+        hedged += hedger.try_hedge()
+    assert hedged == 25
+
+
+def test_select_hedge_endpoint_skips_primary(hedger, router) -> None:
+    endpoints = [MagicMock(url=url) for url in ("http://a", "http://b", "http://c")]
+    engine_stats = {
+        "http://a": EngineStats(num_running_requests=0),
+        "http://b": EngineStats(num_running_requests=5),
+        "http://c": EngineStats(num_running_requests=2),
+    }
+    assert (
+        hedger.select_hedge_endpoint(endpoints, "http://a", engine_stats, router)
+        == "http://c"
+    )
+    assert hedger.select_hedge_endpoint(endpoints[:1], "http://a", {}, router) is None
+
+
+def _fake_process_request(delays, closed, statuses=None):
+    async def process_request(
+        request, body, backend_url, request_id, endpoint, background_tasks
+    ):
+        try:
+            await asyncio.sleep(delays[backend_url])
+            yield {}, (statuses or {}).get(backend_url, 200)
+            yield backend_url.encode()
+        finally:
+            closed.append(backend_url)
+
+    return process_request
+
+
+def _warm_up(hedger, endpoint, response_time):
+    for _ in range(hedger.MIN_SAMPLES):
+        hedger.on_response_time(endpoint, response_time)
+    hedger.on_eligible_request()
+
+
+def test_hedged_request_uses_first_response(
+    hedger, router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    closed = []
+    monkeypatch.setattr(
+        request_module,
+        "process_request",
+        _fake_process_request({"http://slow": 10, "http://fast": 0}, closed),
+    )
+    _warm_up(hedger, "/v1/embeddings", 0.01)
+    endpoints = [MagicMock(url="http://slow"), MagicMock(url="http://fast")]
+
+    async def run():
+        generator, _headers, status = await send_hedged_request(
+            _mock_request(router),
+            b"{}",
+            "http://slow",
+            endpoints,
+            {},
+            "request-1",
+            "/v1/embeddings",
+            None,
+            hedger,
+        )
+        return [chunk async for chunk in generator], status
+
+    chunks, status = asyncio.run(run())
+    assert status == 200
+    assert chunks == [b"http://fast"]
+    # The slow request was cancelled
+    assert closed == ["http://slow", "http://fast"]
+
+
+def test_request_not_hedged_without_budget(
+    hedger, router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    closed = []
+    monkeypatch.setattr(
+        request_module,
+        "process_request",
+        _fake_process_request({"http://slow": 0.05, "http://fast": 0}, closed),
+    )
+    hedger.budget = 0.01
+    for _ in range(hedger.MIN_SAMPLES):
+        hedger.on_response_time("/v1/embeddings", 0.01)
+    endpoints = [MagicMock(url="http://slow"), MagicMock(url="http://fast")]
+
+    async def run():
+        generator, _, _ = await send_hedged_request(
+            _mock_request(router),
+            b"{}",
+            "http://slow",
+            endpoints,
+            {},
+            "request-1",
+            "/v1/embeddings",
+            None,
+            hedger,
+        )
+        return [chunk async for chunk in generator]
+
+    assert asyncio.run(run()) == [b"http://slow"]
+    assert closed == ["http://slow"]
+
+
+def test_retryable_response_loses_to_the_other_leg(
+    hedger, router, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    closed = []
+    monkeypatch.setattr(
+        request_module,
+        "process_request",
+        _fake_process_request(
+            {"http://slow": 0.05, "http://failing": 0.02},
+            closed,
+            statuses={"http://failing": 503},
+        ),
+    )
+    _warm_up(hedger, "/v1/embeddings", 0.01)
+    endpoints = [MagicMock(url="http://slow"), MagicMock(url="http://failing")]
+
+    async def run():
+        generator, _, status = await send_hedged_request(
+            _mock_request(router),
+            b"{}",
+            "http://slow",
+            endpoints,
+            {},
+            "request-1",
+            "/v1/embeddings",
+            None,
+            hedger,
+        )
+        return [chunk async for chunk in generator], status
+
+    chunks, status = asyncio.run(run())
+    assert status == 200
+    assert chunks == [b"http://slow"]
+    assert closed == ["http://failing", "http://slow"]
+
+
+def test_request_aborted_releases_in_flight_counts() -> None:
+    SingletonMeta._instances.pop(RequestStatsMonitor, None)
+    monitor = RequestStatsMonitor(60)
+    monitor.on_new_request("http://a", "request-1", 1.0)
+    monitor.on_new_request("http://a", "request-2", 1.0)
+    monitor.on_request_response("http://a", "request-2", 1.5)
+
+    monitor.on_request_aborted("http://a", "request-1", 2.0)
+    monitor.on_request_aborted("http://a", "request-2", 2.0)
+    # Unknown requests are ignored
+    monitor.on_request_aborted("http://a", "request-3", 2.0)
+
+    assert monitor.in_prefill_requests["http://a"] == 0
+    assert monitor.in_decoding_requests["http://a"] == 0
+    assert not monitor.request_start_time
+    SingletonMeta._instances.pop(RequestStatsMonitor, None)
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from kubernetes import client
+
+from vllm_router.service_discovery import K8sPodIPServiceDiscovery, ModelInfo
+
+# The fixture disables the watch thread, the tests call it directly
+_watch_engines = K8sPodIPServiceDiscovery._watch_engines
+
+
+def _model_info(model: str):
+    return {
+        model: ModelInfo(
+            id=model,
+            object="model",
+            created=0,
+            owned_by="vllm",
+            root=None,
+            parent=None,
+            is_adapter=False,
+        )
+    }
+
+
+@pytest.fixture
+def discovery(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("vllm_router.service_discovery.config", MagicMock())
+    monkeypatch.setattr("vllm_router.service_discovery.client.CoreV1Api", MagicMock())
+    monkeypatch.setattr("vllm_router.service_discovery.watch.Watch", MagicMock())
+    monkeypatch.setattr(K8sPodIPServiceDiscovery, "_watch_engines", lambda self: None)
+    monkeypatch.setattr(K8sPodIPServiceDiscovery, "PROBE_RETRY_DELAY", 0.01)
+    discovery = K8sPodIPServiceDiscovery(None, "default", 8000, probe_timeout=1.0)
+    yield discovery
+    discovery.close()
+
+
+def _send_event(discovery, pod_name, pod_ip, event="ADDED", ready=True):
+    discovery.probe_loop.call_soon_threadsafe(
+        discovery._on_engine_update, pod_name, pod_ip, event, ready, None, False
+    )
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_hung_pod_does_not_delay_other_pods(discovery) -> None:
+    async def get_model_info(pod_ip):
+        if pod_ip == "10.0.0.1":
+            await asyncio.sleep(60)
+        return _model_info("llama3")
+
+    discovery._get_model_info = get_model_info
+    _send_event(discovery, "hung", "10.0.0.1")
+    _send_event(discovery, "ok", "10.0.0.2")
+
+    _wait_for(lambda: len(discovery.get_endpoint_info()) == 1)
+    endpoint = discovery.get_endpoint_info()[0]
+    assert endpoint.url == "http://10.0.0.2:8000"
+    assert endpoint.model_names == ["llama3"]
+
+
+def test_pod_without_models_is_probed_again(discovery) -> None:
+    probes = []
+
+    async def get_model_info(pod_ip):
+        probes.append(pod_ip)
+        return _model_info("llama3") if len(probes) >= 3 else {}
+
+    discovery._get_model_info = get_model_info
+    _send_event(discovery, "pod", "10.0.0.1")
+
+    _wait_for(lambda: len(discovery.get_endpoint_info()) == 1)
+    assert len(probes) == 3
+    _wait_for(lambda: not discovery.probe_tasks)
+
+
+def test_deleted_pod_cancels_probe_and_removes_engine(discovery) -> None:
+    async def get_model_info(pod_ip):
+        return {}
+
+    discovery._get_model_info = get_model_info
+    _send_event(discovery, "pod", "10.0.0.1")
+    _wait_for(lambda: "pod" in discovery.probe_tasks)
+    _send_event(discovery, "pod", "10.0.0.1", event="DELETED", ready=False)
+    _wait_for(lambda: not discovery.probe_tasks)
+
+    async def get_model_info(pod_ip):
+        return _model_info("llama3")
+
+    discovery._get_model_info = get_model_info
+    _send_event(discovery, "pod", "10.0.0.1")
+    _wait_for(lambda: len(discovery.get_endpoint_info()) == 1)
+    _send_event(discovery, "pod", "10.0.0.1", event="MODIFIED", ready=False)
+    _wait_for(lambda: not discovery.get_endpoint_info())
+
+
+def _pod(name, ip="10.0.0.1", ready=True, labels=None, resource_version="1"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(
+            name=name,
+            labels=labels or {"model": "llama3"},
+            deletion_timestamp=None,
+            resource_version=resource_version,
+        ),
+        status=SimpleNamespace(
+            pod_ip=ip, container_statuses=[SimpleNamespace(ready=ready)]
+        ),
+        spec=SimpleNamespace(containers=[]),
+    )
+
+
+def _pod_list(pods, resource_version):
+    return SimpleNamespace(
+        items=pods, metadata=SimpleNamespace(resource_version=resource_version)
+    )
+
+
+def test_pod_probed_again_only_if_relevant_fields_change(discovery) -> None:
+    dispatched = []
+    discovery._dispatch_pod_update = lambda name, event, state: dispatched.append(
+        (name, event)
+    )
+    discovery._on_pod_event("ADDED", _pod("pod"))
+    # E.g. a status update that changes neither the IP nor the readiness
+    discovery._on_pod_event("MODIFIED", _pod("pod", resource_version="2"))
+    assert dispatched == [("pod", "ADDED")]
+
+    discovery._on_pod_event("MODIFIED", _pod("pod", labels={"sleeping": "true"}))
+    discovery._on_pod_event("MODIFIED", _pod("pod", ready=False))
+    discovery._on_pod_event("DELETED", _pod("pod", ready=False))
+    discovery._on_pod_event("DELETED", _pod("pod", ready=False))
+    assert dispatched == [
+        ("pod", "ADDED"),
+        ("pod", "MODIFIED"),
+        ("pod", "MODIFIED"),
+        ("pod", "DELETED"),
+    ]
+
+
+def test_list_resynchronizes_pod_cache(discovery) -> None:
+    dispatched = []
+    discovery._dispatch_pod_update = lambda name, event, state: dispatched.append(
+        (name, event)
+    )
+    discovery._on_pod_event("ADDED", _pod("kept"))
+    discovery._on_pod_event("ADDED", _pod("gone", ip="10.0.0.2"))
+    dispatched.clear()
+    discovery.k8s_api.list_namespaced_pod.return_value = _pod_list(
+        [_pod("kept"), _pod("new", ip="10.0.0.3")], "42"
+    )
+
+    assert discovery._list_pods() == "42"
+    assert sorted(dispatched) == [("gone", "DELETED"), ("new", "ADDED")]
+
+
+def test_watch_resumes_from_resource_version_and_relists_when_expired(
+    discovery,
+) -> None:
+    discovery._dispatch_pod_update = lambda name, event, state: None
+    discovery.k8s_api.list_namespaced_pod.return_value = _pod_list([], "10")
+    watch_versions = []
+
+    def stream(func, **kwargs):
+        watch_versions.append(kwargs["resource_version"])
+        if len(watch_versions) == 1:
+            # Watch ends after a bookmark
+            discovery.k8s_watcher.resource_version = "15"
+            return iter([{"type": "BOOKMARK", "object": {}}])
+        if len(watch_versions) == 2:
+            raise client.rest.ApiException(status=410)
+        discovery.running = False
+        return iter([])
+
+    discovery.k8s_watcher.stream.side_effect = stream
+    _watch_engines(discovery)
+
+    assert watch_versions == ["10", "15", "10"]
+    assert discovery.k8s_api.list_namespaced_pod.call_count == 2
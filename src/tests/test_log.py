@@ -0,0 +1,73 @@
+import atexit
+import json
+import logging
+import time
+
+import pytest
+
+from vllm_router import log
+
+
+@pytest.fixture
+def access_log_file(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(log, "_access_logger", None)
+    monkeypatch.setattr(log, "_access_log_listener", None)
+    monkeypatch.setattr(log, "_access_log_sample_rate", 1.0)
+    yield tmp_path / "access.log"
+    if log._access_log_listener is not None:
+        log._access_log_listener.stop()
+        atexit.unregister(log._access_log_listener.stop)
+        for handler in log._access_log_listener.handlers:
+            handler.close()
+    access_logger = logging.getLogger("vllm_router.access")
+    for handler in list(access_logger.handlers):
+        access_logger.removeHandler(handler)
+
+
+def _read_records(path, count, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if path.exists():
+            lines = path.read_text().splitlines()
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+        time.sleep(0.01)
+    raise AssertionError(f"Expected {count} access log records in {path}")
+
+
+def test_is_access_log_sampled_when_disabled_returns_false(access_log_file) -> None:
+    assert not log.is_access_log_sampled(500)
+
+
+def test_access_log_writes_one_json_line_per_record(access_log_file) -> None:
+    log.initialize_access_logger(str(access_log_file), sample_rate=1.0)
+
+    assert log.is_access_log_sampled(200)
+    log.log_access({"request_id": "a", "status": 200})
+    log.log_access({"request_id": "b", "status": 200})
+
+    records = _read_records(access_log_file, 2)
+    assert [record["request_id"] for record in records] == ["a", "b"]
+
+
+def test_access_log_sampling_always_keeps_failed_requests(access_log_file) -> None:
+    log.initialize_access_logger(str(access_log_file), sample_rate=0.0)
+
+    assert not log.is_access_log_sampled(200)
+    assert log.is_access_log_sampled(503)
+    assert log.is_access_log_sampled(None)
+
+
+def test_set_log_level_applies_to_later_loggers(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(log, "_log_level", None)
+    monkeypatch.setattr(log, "_loggers", [])
+    before = log.init_logger("test_log.before")
+    log.set_log_level("warning")
+    after = log.init_logger("test_log.after")
+
+    assert before.level == logging.WARNING
+    assert after.level == logging.WARNING
+    for logger in (before, after):
+        logger.handlers.clear()
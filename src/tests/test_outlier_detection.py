@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+
+import pytest
+
+from vllm_router.stats import outlier_detection
+from vllm_router.stats.outlier_detection import OutlierDetector
+from vllm_router.stats.request_stats import RequestStats, RequestStatsMonitor
+from vllm_router.utils import SingletonMeta
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(outlier_detection.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+@pytest.fixture
+def detector(clock):
+    SingletonMeta._instances.pop(OutlierDetector, None)
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+    RequestStatsMonitor(60)
+    yield OutlierDetector(
+        consecutive_errors=5,
+        error_rate=0.5,
+        ttft_factor=3.0,
+        base_ejection_time=30.0,
+        max_ejection_percent=50.0,
+    )
+    SingletonMeta._instances.pop(OutlierDetector, None)
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+
+
+def _stats(ttft=0.1, error_rate=0.0, requests_in_window=20, consecutive_errors=0):
+    return RequestStats(
+        qps=1.0,
+        ttft=ttft,
+        in_prefill_requests=0,
+        in_decoding_requests=0,
+        finished_requests=requests_in_window,
+        uptime=100,
+        avg_decoding_length=1.0,
+        avg_latency=1.0,
+        avg_itl=-1,
+        num_swapped_requests=0,
+        error_rate=error_rate,
+        requests_in_window=requests_in_window,
+        consecutive_errors=consecutive_errors,
+    )
+
+
+def _endpoints(*urls, model="model"):
+    return [SimpleNamespace(url=url, model_names=[model]) for url in urls]
+
+
+def _engines(request_stats):
+    return _endpoints(*request_stats)
+
+
+def test_consecutive_errors_eject_engine(detector) -> None:
+    request_stats = {
+        "http://a": _stats(consecutive_errors=5, requests_in_window=5),
+        "http://b": _stats(),
+    }
+    endpoints = detector.filter_endpoints(
+        _engines(request_stats), _engines(request_stats), request_stats
+    )
+    assert [info.url for info in endpoints] == ["http://b"]
+
+
+def test_error_rate_needs_enough_requests(detector) -> None:
+    request_stats = {
+        "http://a": _stats(error_rate=0.6, requests_in_window=5),
+        "http://b": _stats(),
+    }
+    detector.evaluate(_engines(request_stats), request_stats)
+    assert not detector.ejected
+
+    request_stats["http://a"] = _stats(error_rate=0.6)
+    detector.evaluate(_engines(request_stats), request_stats)
+    assert detector.ejected == {"http://a"}
+
+
+def test_slow_ttft_ejects_engine(detector) -> None:
+    request_stats = {
+        "http://a": _stats(ttft=1.0),
+        "http://b": _stats(ttft=0.1),
+        "http://c": _stats(ttft=0.2),
+        "http://d": _stats(ttft=0.25),
+    }
+    detector.evaluate(_engines(request_stats), request_stats)
+    assert detector.ejected == {"http://a"}
+
+
+def test_max_ejection_percent(detector) -> None:
+    request_stats = {
+        url: _stats(consecutive_errors=10)
+        for url in ("http://a", "http://b", "http://c", "http://d")
+    }
+    detector.evaluate(_engines(request_stats), request_stats)
+    assert len(detector.ejected) == 2
+
+
+def test_engines_are_compared_within_their_models(detector) -> None:
+    request_stats = {
+        "http://a": _stats(ttft=1.0),
+        "http://b": _stats(ttft=0.1),
+        "http://c": _stats(ttft=0.2),
+        "http://big-a": _stats(ttft=1.0, consecutive_errors=10),
+        "http://big-b": _stats(ttft=1.2, consecutive_errors=10),
+        "http://big-c": _stats(ttft=1.1),
+    }
+    engines = _endpoints("http://a", "http://b", "http://c") + _endpoints(
+        "http://big-a", "http://big-b", "http://big-c", model="big"
+    )
+    detector.evaluate(engines, request_stats)
+    # The engines of the larger model are not TTFT outliers of the smaller
+    # one, and at most half of each model's engines are ejected
+    assert detector.ejected == {"http://a", "http://big-a"}
+
+
+def test_ejection_time_backs_off(detector, clock) -> None:
+    failing = {"http://a": _stats(consecutive_errors=5), "http://b": _stats()}
+    detector.evaluate(_engines(failing), failing)
+    assert detector.states["http://a"].ejected_until == clock.now + 30
+
+    clock.now += 30
+    detector.evaluate(_engines(failing), failing)
+    # Returned and ejected again for twice as long
+    assert detector.states["http://a"].ejected_until == clock.now + 60
+
+    clock.now += 60
+    healthy = {"http://a": _stats(), "http://b": _stats()}
+    detector.evaluate(_engines(healthy), healthy)
+    assert not detector.ejected
+
+    # Healthy for longer than the maximum ejection time
+    clock.now += 301
+    detector.evaluate(_engines(failing), failing)
+    assert detector.states["http://a"].ejected_until == clock.now + 30
+
+
+def test_all_candidates_ejected_keeps_all(detector) -> None:
+    request_stats = {
+        "http://a": _stats(consecutive_errors=5),
+        "http://b": _stats(),
+    }
+    endpoints = _endpoints("http://a")
+    assert (
+        detector.filter_endpoints(endpoints, _engines(request_stats), request_stats)
+        == endpoints
+    )
+
+
+def test_request_results_in_request_stats() -> None:
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
+    monitor = RequestStatsMonitor(60)
+    monitor.on_new_request("http://a", "request-1", 1.0)
+    monitor.on_request_result("http://a", 2.0, is_error=False)
+    monitor.on_request_result("http://a", 3.0, is_error=True)
+    monitor.on_request_result("http://a", 4.0, is_error=True)
+
+    stats = monitor.get_request_stats(5.0)["http://a"]
+    assert stats.error_rate == pytest.approx(2 / 3)
+    assert stats.requests_in_window == 3
+    assert stats.consecutive_errors == 2
+
+    monitor.reset_health_stats("http://a")
+    stats = monitor.get_request_stats(5.0)["http://a"]
+    assert stats.error_rate == -1
+    assert stats.consecutive_errors == 0
+    RequestStatsMonitor._instances.pop(RequestStatsMonitor, None)
@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from vllm_router.experimental.pii import PIIConfig, PIIType, check_pii
+from vllm_router.experimental.pii import middleware as pii_middleware
+from vllm_router.experimental.pii.analyzers.base import PIIAnalysisResult
+from vllm_router.experimental.pii.analyzers.regex import RegexAnalyzer
+from vllm_router.experimental.pii.middleware import extract_user_content
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = RegexAnalyzer()
+    asyncio.run(analyzer.initialize())
+    return analyzer
+
+
+@pytest.fixture(autouse=True)
+def clear_sessions():
+    pii_middleware._scanned_messages.clear()
+    yield
+    pii_middleware._scanned_messages.clear()
+
+
+def _request(body, session_id=None):
+    async def get_json():
+        return body
+
+    return SimpleNamespace(
+        json=get_json,
+        headers={"x-user-id": session_id} if session_id else {},
+        url=SimpleNamespace(path="/v1/chat/completions"),
+        state=SimpleNamespace(router_stage_labels={"model": "", "routing_logic": ""}),
+    )
+
+
+def test_all_types_are_found_in_one_pass(analyzer) -> None:
+    text = (
+        "no digits on this line\n"
+        "mail john.doe@example.com, call 555-123-4567\n"
+        "card 4111 1111 1111 1111 from 10.0.0.1, ssn 123-45-6789"
+    )
+    result = asyncio.run(analyzer.analyze(text))
+    assert [(loc.pii_type, loc.value) for loc in result.pii_locations] == [
+        (PIIType.EMAIL, "john.doe@example.com"),
+        (PIIType.PHONE, " 555-123-4567"),
+        (PIIType.CREDIT_CARD, "4111 1111 1111 1111"),
+        (PIIType.IP_ADDRESS, "10.0.0.1"),
+        (PIIType.SSN, "123-45-6789"),
+    ]
+    assert text[result.pii_locations[0].start :].startswith("john.doe")
+
+    result = asyncio.run(analyzer.analyze(text, pii_types={PIIType.SSN}))
+    assert result.detected_types == {PIIType.SSN}
+    result = asyncio.run(analyzer.analyze(text, pii_types={PIIType.NAME}))
+    assert not result.has_pii
+
+
+def test_only_user_content_is_extracted() -> None:
+    body = {
+        "model": "team@example.com/llama3",
+        "max_tokens": 1234567890,
+        "messages": [
+            {"role": "system", "content": "Be brief"},
+            {"role": "assistant", "content": "Call 555-123-4567"},
+            {"role": "user", "content": [{"type": "text", "text": "Hi"}]},
+        ],
+    }
+    assert [text for _, text in extract_user_content(body)] == ["Be brief", "Hi"]
+    assert [text for _, text in extract_user_content({"prompt": ["a", "b"]})] == [
+        "a",
+        "b",
+    ]
+
+
+def test_request_with_pii_is_blocked(analyzer) -> None:
+    body = {"messages": [{"role": "user", "content": "I am john@example.com"}]}
+    response = asyncio.run(check_pii(_request(body), analyzer, PIIConfig()))
+    assert response.status_code == 400
+
+    body = {
+        "model": "team@example.com",
+        "messages": [{"role": "user", "content": "Hi"}],
+    }
+    assert asyncio.run(check_pii(_request(body), analyzer, PIIConfig())) is None
+
+
+def test_session_messages_are_analyzed_once() -> None:
+    analyzer = AsyncMock()
+    analyzer.analyze.return_value = PIIAnalysisResult(
+        has_pii=False, detected_types=set()
+    )
+    config = PIIConfig(session_key="x-user-id", max_sessions=1)
+    messages = [{"role": "user", "content": "first"}]
+
+    asyncio.run(check_pii(_request({"messages": messages}, "a"), analyzer, config))
+    messages += [
+        {"role": "assistant", "content": "answer"},
+        {"role": "user", "content": "second"},
+    ]
+    asyncio.run(check_pii(_request({"messages": messages}, "a"), analyzer, config))
+    assert [call.kwargs["text"] for call in analyzer.analyze.await_args_list] == [
+        "first",
+        "second",
+    ]
+
+    # Another session, which evicts the first one
+    asyncio.run(check_pii(_request({"messages": messages}, "b"), analyzer, config))
+    assert analyzer.analyze.await_args.kwargs["text"] == "first\n\nsecond"
+    assert list(pii_middleware._scanned_messages) == ["b"]
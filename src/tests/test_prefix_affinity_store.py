@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+
+from vllm_router.prefix.affinity_store import (
+    LocalPrefixAffinityStore,
+    WorkerPrefixAffinityStore,
+)
+from vllm_router.prefix.hashtrie import HashTrie
+
+PROMPT = "You are a helpful assistant. " * 20
+
+
+async def _start_replica(namespace: str):
+    trie = HashTrie()
+    store = LocalPrefixAffinityStore(namespace=namespace, flush_interval=0.01)
+    await store.start(trie.insert_hashes)
+    return trie, store
+
+
+def test_local_store_shares_insertions_between_replicas() -> None:
+    async def _run():
+        trie1, store1 = await _start_replica("shares")
+        trie2, store2 = await _start_replica("shares")
+
+        chunk_hashes = await trie1.insert(PROMPT, "http://engine1")
+        store1.publish(chunk_hashes, "http://engine1")
+        # Published in the background within the flush interval
+        await asyncio.sleep(0.05)
+
+        match_length, endpoints = await trie2.longest_prefix_match(
+            PROMPT, {"http://engine1", "http://engine2"}
+        )
+        await store1.close()
+        await store2.close()
+        return match_length, endpoints
+
+    match_length, endpoints = asyncio.run(_run())
+    assert match_length == len(PROMPT) // 128 * 128 + 128
+    assert endpoints == {"http://engine1"}
+
+
+def test_local_store_close_publishes_pending_insertions() -> None:
+    async def _run():
+        trie1, store1 = await _start_replica("close")
+        trie2, store2 = await _start_replica("close")
+        store1.flush_interval = 60
+
+        store1.publish(await trie1.insert(PROMPT, "http://engine2"), "http://engine2")
+        await store1.close()
+
+        _, endpoints = await trie2.longest_prefix_match(
+            PROMPT, {"http://engine1", "http://engine2"}
+        )
+        await store2.close()
+        return endpoints
+
+    assert asyncio.run(_run()) == {"http://engine2"}
+
+
+def test_worker_store_shares_insertions_between_workers() -> None:
+    async def _run():
+        context = multiprocessing.get_context("spawn")
+        inboxes = [context.Queue() for _ in range(2)]
+        tries, stores = [], []
+        for worker_id in range(2):
+            trie = HashTrie()
+            store = WorkerPrefixAffinityStore(inboxes, worker_id, flush_interval=0.01)
+            await store.start(trie.insert_hashes)
+            tries.append(trie)
+            stores.append(store)
+
+        chunk_hashes = await tries[1].insert(PROMPT, "http://engine2")
+        stores[1].publish(chunk_hashes, "http://engine2")
+        await asyncio.sleep(0.2)
+
+        _, endpoints = await tries[0].longest_prefix_match(
+            PROMPT, {"http://engine1", "http://engine2"}
+        )
+        for store in stores:
+            await store.close()
+        return endpoints
+
+    assert asyncio.run(_run()) == {"http://engine2"}
@@ -0,0 +1,170 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from vllm_router.services.request_service.response_cache import (
+    ResponseCache,
+    assemble_streamed_response,
+    check_response_cache,
+    get_response_cache,
+    response_cache_key,
+    response_to_sse,
+)
+from vllm_router.utils import SingletonMeta
+
+CHAT = "/v1/chat/completions"
+REQUEST = {
+    "model": "llama3",
+    "messages": [{"role": "user", "content": "Hi"}],
+    "temperature": 0,
+}
+RESPONSE = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 1,
+    "model": "llama3",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello there"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 2, "completion_tokens": 2, "total_tokens": 4},
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    SingletonMeta._instances.pop(ResponseCache, None)
+    yield ResponseCache(max_bytes=1000, spill_dir=str(tmp_path), spill_max_bytes=250)
+    SingletonMeta._instances.pop(ResponseCache, None)
+
+
+def _stream(response):
+    return b"".join(response_to_sse(response, CHAT, include_usage=True))
+
+
+def test_get_response_cache_not_initialized() -> None:
+    SingletonMeta._instances.pop(ResponseCache, None)
+    assert get_response_cache() is None
+
+
+def test_key_ignores_streaming_options() -> None:
+    key = response_cache_key(CHAT, REQUEST)
+    streaming = {**REQUEST, "stream": True, "stream_options": {"include_usage": True}}
+    assert response_cache_key(CHAT, dict(reversed(streaming.items()))) == key
+    assert response_cache_key(CHAT, {**REQUEST, "max_tokens": 5}) != key
+    assert response_cache_key("/v1/completions", REQUEST) != key
+    assert response_cache_key(CHAT, {**REQUEST, "skip_cache": True}) is None
+    assert response_cache_key("/v1/embeddings", REQUEST) is None
+
+
+def test_only_deterministic_requests_are_cached() -> None:
+    assert response_cache_key(CHAT, REQUEST) is not None
+    sampled = {**REQUEST, "temperature": 0.7}
+    assert response_cache_key(CHAT, sampled) is None
+    assert response_cache_key(CHAT, {**sampled, "seed": 1}) is not None
+    assert response_cache_key(CHAT, {**sampled, "seed": 1, "n": 2}) is None
+    # The default temperature of the engines samples
+    request = {k: v for k, v in REQUEST.items() if k != "temperature"}
+    assert response_cache_key(CHAT, request) is None
+
+
+def test_streamed_response_is_assembled() -> None:
+    assert assemble_streamed_response(_stream(RESPONSE), CHAT) == RESPONSE
+    # The stream broke off before the finish reason
+    body = b"".join(response_to_sse(RESPONSE, CHAT)[:1])
+    assert assemble_streamed_response(body, CHAT) is None
+
+    completion = {
+        "id": "cmpl-1",
+        "object": "text_completion",
+        "created": 1,
+        "model": "llama3",
+        "choices": [{"index": 0, "text": "Hello there", "finish_reason": "length"}],
+    }
+    body = b"".join(response_to_sse(completion, "/v1/completions"))
+    assert assemble_streamed_response(body, "/v1/completions") == completion
+
+
+def test_tool_calls_are_not_streamed() -> None:
+    response = json.loads(json.dumps(RESPONSE))
+    response["choices"][0]["message"]["tool_calls"] = [{"id": "call_1"}]
+    assert response_to_sse(response, CHAT) is None
+
+
+def test_evicted_responses_spill_to_disk(cache, tmp_path) -> None:
+    async def run():
+        for i in range(13):
+            await cache.put(f"key{i}", bytes([i]) * 100)
+        assert cache.size == 1000
+        # key0 to key2 were spilled, and key0 was dropped from the disk
+        assert await cache.get("key0") is None
+        assert list(cache.spilled) == ["key1", "key2"]
+
+        # Found on disk after a restart, and moved back to memory
+        SingletonMeta._instances.pop(ResponseCache, None)
+        reloaded = ResponseCache(
+            max_bytes=1000, spill_dir=str(tmp_path), spill_max_bytes=250
+        )
+        assert await reloaded.get("key1") == bytes([1]) * 100
+        assert list(reloaded.entries) == ["key1"]
+        assert [path.name for path in tmp_path.iterdir()] == ["key2.json"]
+
+    asyncio.run(run())
+
+
+def test_streamed_response_is_served_to_both_request_types(cache) -> None:
+    key = response_cache_key(CHAT, REQUEST)
+    asyncio.run(cache.store_response(key, CHAT, _stream(RESPONSE), True))
+
+    def make_request(request_json):
+        return SimpleNamespace(
+            state=SimpleNamespace(), json=AsyncMock(return_value=request_json)
+        )
+
+    async def body(response):
+        chunks = [chunk async for chunk in response.body_iterator]
+        return b"".join(c if isinstance(c, bytes) else c.encode() for c in chunks)
+
+    async def run():
+        request = make_request(REQUEST)
+        response = await check_response_cache(request, CHAT)
+        assert response.headers["X-Response-Cache"] == "hit"
+        assert json.loads(response.body) == RESPONSE
+        assert request.state.router_stage_labels["routing_logic"] == "response_cache"
+
+        request = make_request(
+            {**REQUEST, "stream": True, "stream_options": {"include_usage": True}}
+        )
+        response = await check_response_cache(request, CHAT)
+        assert response.media_type == "text/event-stream"
+        assert await body(response) == _stream(RESPONSE)
+
+        # A miss keeps the key to cache the response of the engine
+        request = make_request({**REQUEST, "max_tokens": 5})
+        assert await check_response_cache(request, CHAT) is None
+        assert request.state.response_cache_key == response_cache_key(
+            CHAT, {**REQUEST, "max_tokens": 5}
+        )
+
+    asyncio.run(run())
+
+
+def test_response_is_streamed_in_chunks() -> None:
+    events = response_to_sse(RESPONSE, CHAT, chunk_size=4)
+    deltas = [json.loads(event[len(b"data: ") :]) for event in events[:-1]]
+    assert [d["choices"][0]["delta"].get("content") for d in deltas] == [
+        "Hell",
+        "o th",
+        "ere",
+        None,
+    ]
+    assert deltas[0]["choices"][0]["delta"]["role"] == "assistant"
+    assert "role" not in deltas[1]["choices"][0]["delta"]
+    response = {k: v for k, v in RESPONSE.items() if k != "usage"}
+    assert assemble_streamed_response(b"".join(events), CHAT) == response
@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import Request
+from prometheus_client import REGISTRY
+
+from vllm_router.services.metrics_service import (
+    model_label,
+    observe_router_stage,
+    set_router_stage_labels,
+)
+from vllm_router.stats.engine_stats import EngineStats
+from vllm_router.stats.request_stats import RequestStats
+from vllm_router.stats.router_metrics import RouterMetricsCollector
+from vllm_router.utils import SingletonMeta
+
+
+@pytest.fixture
+def router_metrics_collector(monkeypatch: pytest.MonkeyPatch):
+    SingletonMeta._instances.pop(RouterMetricsCollector, None)
+    monkeypatch.setattr(RouterMetricsCollector, "_collect_worker", lambda self: None)
+    yield RouterMetricsCollector(1.0)
+    SingletonMeta._instances.pop(RouterMetricsCollector, None)
+
+
+def test_collect_refreshes_router_gauges(
+    router_metrics_collector, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    request_stats_monitor = MagicMock()
+    request_stats_monitor.get_request_stats.return_value = {
+        "http://engine1": RequestStats(
+            qps=4.0,
+            ttft=0.1,
+            in_prefill_requests=1,
+            in_decoding_requests=2,
+            finished_requests=10,
+            uptime=100,
+            avg_decoding_length=20,
+            avg_latency=1.5,
+            avg_itl=0.01,
+            num_swapped_requests=0,
+        )
+    }
+    engine_stats_scraper = MagicMock()
+    engine_stats_scraper.get_engine_stats.return_value = {
+        "http://engine1": EngineStats(gpu_prefix_cache_hit_rate=0.25)
+    }
+    service_discovery = MagicMock()
+    service_discovery.get_endpoint_info.return_value = [
+        MagicMock(url="http://engine1", healthy=True)
+    ]
+    module = "vllm_router.stats.router_metrics"
+    monkeypatch.setattr(
+        f"{module}.get_request_stats_monitor", lambda: request_stats_monitor
+    )
+    monkeypatch.setattr(
+        f"{module}.get_engine_stats_scraper", lambda: engine_stats_scraper
+    )
+    monkeypatch.setattr(f"{module}.get_service_discovery", lambda: service_discovery)
+    cpu_percent = MagicMock(return_value=12.5)
+    monkeypatch.setattr(f"{module}.psutil.cpu_percent", cpu_percent)
+
+    router_metrics_collector.collect()
+
+    # CPU usage must be sampled without sleeping
+    cpu_percent.assert_called_once_with(interval=None)
+    labels = {"server": "http://engine1"}
+    assert REGISTRY.get_sample_value("router_cpu_usage_percent") == 12.5
+    assert REGISTRY.get_sample_value("vllm:current_qps", labels) == 4.0
+    assert REGISTRY.get_sample_value("vllm:num_requests_running", labels) == 3
+    assert REGISTRY.get_sample_value("vllm:gpu_prefix_cache_hit_rate", labels) == 0.25
+    assert REGISTRY.get_sample_value("vllm:healthy_pods_total", labels) == 1
+
+
+@pytest.fixture
+def served_models(monkeypatch: pytest.MonkeyPatch):
+    service_discovery = MagicMock(aliases={"llama": "llama3"})
+    service_discovery.get_endpoint_info.return_value = [
+        MagicMock(url="http://engine1", model_names=["llama3"])
+    ]
+    monkeypatch.setattr(
+        "vllm_router.services.metrics_service.get_service_discovery",
+        lambda: service_discovery,
+    )
+
+
+def test_router_stages_observed_before_labels_are_recorded_with_them(
+    served_models,
+) -> None:
+    request = Request({"type": "http"})
+    labels = {"stage": "body_read", "model": "llama3", "routing_logic": "Router"}
+    before = REGISTRY.get_sample_value(
+        "vllm:router_stage_latency_seconds_count", labels
+    )
+
+    observe_router_stage(request, "body_read", 0.001)
+    assert (
+        REGISTRY.get_sample_value("vllm:router_stage_latency_seconds_count", labels)
+        == before
+    )
+
+    set_router_stage_labels(request, "llama3", "Router")
+    observe_router_stage(request, "body_read", 0.002)
+
+    assert (
+        REGISTRY.get_sample_value("vllm:router_stage_latency_seconds_count", labels)
+        == (before or 0) + 2
+    )
+
+
+def test_models_not_served_are_labelled_unknown(served_models) -> None:
+    assert model_label("llama3") == "llama3"
+    assert model_label("llama") == "llama"
+    assert model_label(None) == "unknown"
+
+    request = Request({"type": "http"})
+    labels = {"stage": "body_read", "model": "unknown", "routing_logic": "Router"}
+    before = REGISTRY.get_sample_value(
+        "vllm:router_stage_latency_seconds_count", labels
+    )
+    observe_router_stage(request, "body_read", 0.001)
+    set_router_stage_labels(request, "no-such-model-0123", "Router")
+
+    assert request.state.router_stage_labels["model"] == "unknown"
+    assert (
+        REGISTRY.get_sample_value("vllm:router_stage_latency_seconds_count", labels)
+        == (before or 0) + 1
+    )
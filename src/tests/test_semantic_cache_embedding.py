@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+# The semantic cache package needs its optional dependencies
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("faiss")
+
+from vllm_router.experimental.semantic_cache.embedding_service import (
+    EmbeddingService,
+)
+
+
+class FakeEncoder:
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.threads = set()
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        if self.delay:
+            threading.Event().wait(self.delay)
+        if self.fail:
+            raise RuntimeError("encoder failed")
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_embeddings_are_batched_off_the_event_loop() -> None:
+    encoder = FakeEncoder()
+    service = EmbeddingService(encoder, max_batch_size=32, batch_window=0.01)
+
+    async def run():
+        return await asyncio.gather(*(service.embed("a" * i) for i in range(10)))
+
+    embeddings = asyncio.run(run())
+    service.close()
+    assert [embedding[0] for embedding in embeddings] == list(range(10))
+    assert len(encoder.batches) == 1
+    assert encoder.threads != {threading.main_thread().name}
+
+
+def test_full_batch_is_encoded_without_waiting() -> None:
+    encoder = FakeEncoder()
+    service = EmbeddingService(encoder, max_batch_size=4, batch_window=10)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(service.embed(str(i)) for i in range(8))), timeout=5
+        )
+
+    asyncio.run(run())
+    service.close()
+    assert [len(batch) for batch in encoder.batches] == [4, 4]
+
+
+def test_event_loop_runs_while_encoding() -> None:
+    encoder = FakeEncoder(delay=0.2)
+    service = EmbeddingService(encoder, batch_window=0)
+    ticks = []
+
+    async def tick():
+        for _ in range(10):
+            ticks.append(True)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(service.embed("text"), tick())
+
+    asyncio.run(run())
+    service.close()
+    assert len(ticks) == 10
+
+
+def test_encoder_error_fails_the_batch() -> None:
+    service = EmbeddingService(FakeEncoder(fail=True), batch_window=0)
+
+    async def run():
+        return await asyncio.gather(
+            service.embed("a"), service.embed("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    service.close()
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_blocking_lookups_and_stores_run_on_the_database_thread() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from vllm_router.experimental.semantic_cache.semantic_cache import SemanticCache
+
+    threads = []
+
+    class FakeDB:
+        num_entries = 0
+
+        def search(self, **kwargs):
+            threads.append(threading.current_thread().name)
+
+        def store(self, **kwargs):
+            threads.append(threading.current_thread().name)
+
+    cache = SemanticCache.__new__(SemanticCache)
+    cache.db = FakeDB()
+    cache.db_executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="semantic-cache-db"
+    )
+    cache.default_similarity_threshold = 0.9
+    cache.get_embedding = lambda messages: np.zeros(2, dtype=np.float32)
+    messages = [{"role": "user", "content": "hello"}]
+
+    assert cache.search(messages, "model") is None
+    assert cache.store(messages, messages, "model", {})
+    cache.db_executor.shutdown(wait=True)
+    assert len(threads) == 2
+    assert all(name.startswith("semantic-cache-db") for name in threads)
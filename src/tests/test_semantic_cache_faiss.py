@@ -0,0 +1,198 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+# The semantic cache package needs its optional dependencies
+pytest.importorskip("sentence_transformers")
+faiss = pytest.importorskip("faiss")
+
+from vllm_router.experimental.semantic_cache.db_adapters import (
+    FAISSAdapter,
+)
+
+DIM = 8
+
+
+def _embedding(i):
+    embedding = np.random.default_rng(i).standard_normal(DIM).astype(np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def _store(db, i, model="llama3"):
+    db.store(
+        embedding=_embedding(i),
+        request_messages=[{"role": "user", "content": f"question {i}"}],
+        response_messages=[{"role": "assistant", "content": f"answer {i}"}],
+        model=model,
+        usage={"total_tokens": i},
+    )
+
+
+def _answer(db, i, model="llama3"):
+    result = db.search(_embedding(i), model, similarity_threshold=0.99)
+    return result and result["response_messages"][0]["content"]
+
+
+def test_entries_are_appended_and_replayed_after_the_snapshot(tmp_path) -> None:
+    db = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path), snapshot_interval=3)
+    for i in range(5):
+        _store(db, i)
+    # Snapshotted after 3 stores, the last 2 are only in the append-only files
+    assert db.snapshot_size == 3
+    assert _answer(db, 4) == "answer 4"
+    assert _answer(db, 0, model="other") is None
+
+    reloaded = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path), snapshot_interval=3)
+    assert reloaded.num_entries == 5
+    assert [_answer(reloaded, i) for i in range(5)] == [f"answer {i}" for i in range(5)]
+    reloaded.close()
+    db.close()
+
+
+def test_interrupted_store_is_dropped_on_load(tmp_path) -> None:
+    db = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path))
+    _store(db, 0)
+    _store(db, 1)
+    db.close()
+    # A crash after the metadata of an entry, before its embedding
+    with open(os.path.join(tmp_path, "faiss_metadata.jsonl"), "ab") as f:
+        f.write(b'{"model": "llama3", "respo')
+
+    reloaded = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path))
+    assert reloaded.num_entries == 2
+    _store(reloaded, 2)
+    assert _answer(reloaded, 2) == "answer 2"
+    reloaded.close()
+
+
+def test_ivf_index_is_trained_once_large_enough(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(FAISSAdapter, "IVF_MIN_TRAIN_SIZE", 64)
+    db = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path), index_type="ivf")
+    for i in range(63):
+        _store(db, i)
+    partition = db.partitions[db.model_ids["llama3"]]
+    assert partition.index.is_trained and not hasattr(partition.index, "nlist")
+
+    _store(db, 63)
+    partition = db.partitions[db.model_ids["llama3"]]
+    assert partition.index.nlist == 8
+    assert partition.trained_size == 64
+    assert _answer(db, 10) == "answer 10"
+    db.close()
+
+    # An index type change rebuilds the index from the stored embeddings
+    reloaded = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path), index_type="hnsw")
+    assert reloaded.num_entries == 64
+    assert _answer(reloaded, 10) == "answer 10"
+    reloaded.close()
+
+
+def test_search_only_compares_entries_of_the_model(tmp_path) -> None:
+    db = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path))
+    _store(db, 0, model="other")
+    # A slightly different question for llama3, further than the other model's
+    db.store(
+        embedding=_embedding(0) * 0.999 + _embedding(1) * 0.001,
+        request_messages=[],
+        response_messages=[{"role": "assistant", "content": "llama3 answer"}],
+        model="llama3",
+        usage={},
+    )
+    assert _answer(db, 0) == "llama3 answer"
+    assert _answer(db, 0, model="other") == "answer 0"
+    assert _answer(db, 0, model="unknown") is None
+    db.close()
+
+
+def test_expired_entries_are_evicted(tmp_path, monkeypatch) -> None:
+    evicted = []
+    db = FAISSAdapter(
+        dim=DIM,
+        cache_dir=str(tmp_path),
+        ttl=60,
+        on_evict=lambda model, reason: evicted.append((model, reason)),
+    )
+    _store(db, 0)
+    _store(db, 1)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    _store(db, 2)
+
+    assert evicted == [("llama3", "expired"), ("llama3", "expired")]
+    assert db.num_model_entries("llama3") == 1
+    assert _answer(db, 0) is None
+    assert _answer(db, 2) == "answer 2"
+    db.close()
+
+    # Evictions are persisted
+    reloaded = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path), ttl=60)
+    assert reloaded.num_entries == 1
+    reloaded.close()
+
+
+def test_search_skips_expired_entries_without_evicting(tmp_path, monkeypatch) -> None:
+    evicted = []
+    db = FAISSAdapter(
+        dim=DIM,
+        cache_dir=str(tmp_path),
+        ttl=60,
+        on_evict=lambda model, reason: evicted.append((model, reason)),
+    )
+    _store(db, 0)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    assert _answer(db, 0) is None
+    assert evicted == []
+    assert db.num_entries == 1
+    # The next store sweeps the expired entry
+    _store(db, 1)
+    assert evicted == [("llama3", "expired")]
+    assert db.num_entries == 1
+    db.close()
+
+
+@pytest.mark.parametrize("eviction_policy", ["lru", "lfu"])
+def test_least_used_entries_are_evicted_when_full(
+    tmp_path, monkeypatch, eviction_policy
+) -> None:
+    monkeypatch.setattr(FAISSAdapter, "COMPACTION_MIN_EVICTED", 4)
+    db = FAISSAdapter(
+        dim=DIM,
+        cache_dir=str(tmp_path),
+        max_entries=10,
+        eviction_policy=eviction_policy,
+    )
+    for i in range(10):
+        _store(db, i)
+    # Entry 0 is used the most, entry 1 never, and entries 2-9 most recently
+    time.sleep(0.01)
+    for _ in range(3):
+        _answer(db, 0)
+    time.sleep(0.01)
+    for i in range(2, 10):
+        _answer(db, i)
+    _store(db, 10)
+
+    # The batch evicted down to 95% of the capacity
+    assert db.num_entries == 9
+    assert _answer(db, 1) is None
+    assert _answer(db, 9) == "answer 9"
+    if eviction_policy == "lru":
+        assert _answer(db, 0) is None
+        assert _answer(db, 10) == "answer 10"
+    else:
+        assert _answer(db, 0) == "answer 0"
+        assert _answer(db, 10) is None
+
+    for i in range(11, 20):
+        _store(db, i)
+    # The files were compacted to the live entries
+    assert len(db.ends) - db.num_entries < 4
+    db.close()
+    reloaded = FAISSAdapter(dim=DIM, cache_dir=str(tmp_path))
+    assert reloaded.num_entries == db.num_entries
+    assert _answer(reloaded, 19) == "answer 19"
+    reloaded.close()
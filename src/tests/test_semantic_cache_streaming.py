@@ -0,0 +1,102 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+# The semantic cache package needs its optional dependencies
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("faiss")
+
+from vllm_router.experimental import semantic_cache_integration
+from vllm_router.services.request_service.response_cache import (
+    response_to_sse,
+)
+
+CHAT = "/v1/chat/completions"
+MESSAGES = [{"role": "user", "content": "Hi"}]
+ANSWER = {"role": "assistant", "content": "Hello there"}
+USAGE = {"prompt_tokens": 2, "completion_tokens": 2, "total_tokens": 4}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SimpleNamespace(
+        streaming=True,
+        stream_chunk_size=4,
+        stream_interval=0.0,
+        search_async=AsyncMock(return_value=None),
+        store_async=AsyncMock(return_value=False),
+    )
+    monkeypatch.setattr(semantic_cache_integration, "get_semantic_cache", lambda: cache)
+    monkeypatch.setattr(
+        semantic_cache_integration, "is_semantic_cache_enabled", lambda: True
+    )
+    return cache
+
+
+def _request(body):
+    return SimpleNamespace(json=AsyncMock(return_value=body))
+
+
+def test_streamed_response_is_stored(cache) -> None:
+    body = json.dumps({"model": "llama3", "messages": MESSAGES, "stream": True})
+    response = {
+        "model": "llama3",
+        "choices": [{"index": 0, "message": ANSWER, "finish_reason": "stop"}],
+        "usage": USAGE,
+    }
+    stream = b"".join(response_to_sse(response, CHAT, True, chunk_size=3))
+    asyncio.run(
+        semantic_cache_integration.store_in_semantic_cache(CHAT, "POST", body, stream)
+    )
+    cache.store_async.assert_awaited_once_with(
+        request_messages=MESSAGES,
+        response_messages=[ANSWER],
+        model="llama3",
+        usage=USAGE,
+    )
+
+    # A stream that broke off is not stored
+    cache.store_async.reset_mock()
+    asyncio.run(
+        semantic_cache_integration.store_in_semantic_cache(
+            CHAT, "POST", body, stream[: len(stream) // 2]
+        )
+    )
+    cache.store_async.assert_not_awaited()
+
+
+def test_cache_hit_is_streamed(cache) -> None:
+    cache.search_async.return_value = {
+        "response_messages": [ANSWER],
+        "usage": USAGE,
+        "similarity_score": 0.99,
+    }
+    body = {
+        "model": "llama3",
+        "messages": MESSAGES,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+
+    async def run():
+        response = await semantic_cache_integration.check_semantic_cache(_request(body))
+        return [chunk async for chunk in response.body_iterator]
+
+    events = asyncio.run(run())
+    assert events[-1] == b"data: [DONE]\n\n"
+    chunks = [json.loads(event[len(b"data: ") :]) for event in events[:-1]]
+    content = "".join(
+        c["choices"][0]["delta"].get("content", "") for c in chunks if c["choices"]
+    )
+    assert content == "Hello there"
+    assert chunks[-1]["usage"] == USAGE
+
+    # Without the streaming mode, streaming requests bypass the cache
+    cache.streaming = False
+    assert (
+        asyncio.run(semantic_cache_integration.check_semantic_cache(_request(body)))
+        is None
+    )
@@ -1,6 +1,7 @@
 from typing import Dict
 
 from vllm_router.routers.routing_logic import SessionRouter
+from vllm_router.stats.engine_stats import EngineStats
 
 
 class EndpointInfo:
@@ -54,12 +55,16 @@ def test_route_request_without_session_id():
         "http://engine1.com": RequestStats(qps=10),
         "http://engine2.com": RequestStats(qps=5),
     }
+    engine_stats = {
+        "http://engine1.com": EngineStats(num_running_requests=2),
+        "http://engine2.com": EngineStats(num_running_requests=1),
+    }
     request = Request(headers={})  # No session ID
 
     router = SessionRouter(session_key="session_id")
-    url = router.route_request(endpoints, None, request_stats, request)
+    url = router.route_request(endpoints, engine_stats, request_stats, request)
 
-    # Ensure the endpoint with the lowest QPS is selected
+    # Ensure the least loaded endpoint is selected
     assert url == "http://engine2.com"
 
 
@@ -1,4 +1,5 @@
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -49,10 +50,16 @@ def test_init_when_endpoint_health_check_disabled_does_not_call_start_health_che
     discovery_instance.start_health_check_task.assert_not_called()
 
 
-def test_get_unhealthy_endpoint_hashes_when_only_healthy_models_exist_does_not_return_unhealthy_endpoint_hashes(
+def _check_backends_health(discovery_instance: StaticServiceDiscovery) -> None:
+    asyncio.run(discovery_instance.check_backends_health(None))
+
+
+def test_check_backends_health_when_only_healthy_models_exist_keeps_all_endpoints(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    monkeypatch.setattr("vllm_router.utils.is_model_healthy", lambda *_: True)
+    monkeypatch.setattr(
+        "vllm_router.utils.is_model_healthy", AsyncMock(return_value=True)
+    )
     discovery_instance = StaticServiceDiscovery(
         None,
         ["http://localhost.com"],
@@ -60,17 +67,20 @@ def test_get_unhealthy_endpoint_hashes_when_only_healthy_models_exist_does_not_r
         None,
         None,
         ["chat"],
-        static_backend_health_checks=True,
+        static_backend_health_checks=False,
         prefill_model_labels=None,
         decode_model_labels=None,
     )
-    assert discovery_instance.get_unhealthy_endpoint_hashes() == []
+    _check_backends_health(discovery_instance)
+    assert len(discovery_instance.get_endpoint_info()) == 1
 
 
-def test_get_unhealthy_endpoint_hashes_when_unhealthy_model_exist_returns_unhealthy_endpoint_hash(
+def test_check_backends_health_marks_backend_down_after_unhealthy_threshold(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    monkeypatch.setattr("vllm_router.utils.is_model_healthy", lambda *_: False)
+    monkeypatch.setattr(
+        "vllm_router.utils.is_model_healthy", AsyncMock(return_value=False)
+    )
     discovery_instance = StaticServiceDiscovery(
         None,
         ["http://localhost.com"],
@@ -81,18 +91,22 @@ def test_get_unhealthy_endpoint_hashes_when_unhealthy_model_exist_returns_unheal
         static_backend_health_checks=False,
         prefill_model_labels=None,
         decode_model_labels=None,
+        health_check_unhealthy_threshold=2,
     )
-    assert discovery_instance.get_unhealthy_endpoint_hashes() == [
-        "ee7d421a744e07595b70f98c11be93e7"
-    ]
+    _check_backends_health(discovery_instance)
+    assert len(discovery_instance.get_endpoint_info()) == 1
+    _check_backends_health(discovery_instance)
+    assert discovery_instance.get_endpoint_info() == []
 
 
-def test_get_unhealthy_endpoint_hashes_when_healthy_and_unhealthy_models_exist_returns_only_unhealthy_endpoint_hash(
+def test_check_backends_health_when_healthy_and_unhealthy_models_exist_excludes_only_unhealthy_endpoint(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     unhealthy_model = "bge-m3"
 
-    def mock_is_model_healthy(url: str, model: str, model_type: str) -> bool:
+    async def mock_is_model_healthy(
+        session, url: str, model: str, model_type: str
+    ) -> bool:
         return model != unhealthy_model
 
     monkeypatch.setattr("vllm_router.utils.is_model_healthy", mock_is_model_healthy)
@@ -106,34 +120,65 @@ def test_get_unhealthy_endpoint_hashes_when_healthy_and_unhealthy_models_exist_r
         static_backend_health_checks=False,
         prefill_model_labels=None,
         decode_model_labels=None,
+        health_check_unhealthy_threshold=1,
     )
-    assert discovery_instance.get_unhealthy_endpoint_hashes() == [
-        "01e1b07eca36d39acacd55a33272a225"
-    ]
+    _check_backends_health(discovery_instance)
+    endpoints = discovery_instance.get_endpoint_info()
+    assert len(endpoints) == 1
+    assert "llama3" in endpoints[0].model_names
 
 
-def test_get_endpoint_info_when_model_endpoint_hash_is_in_unhealthy_endpoint_does_not_return_endpoint(
+def test_check_backends_health_marks_backend_up_after_healthy_threshold(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    unhealthy_model = "mistral"
+    is_model_healthy = AsyncMock(return_value=False)
+    monkeypatch.setattr("vllm_router.utils.is_model_healthy", is_model_healthy)
+    discovery_instance = StaticServiceDiscovery(
+        None,
+        ["http://localhost.com"],
+        ["llama3"],
+        None,
+        None,
+        ["chat"],
+        static_backend_health_checks=False,
+        prefill_model_labels=None,
+        decode_model_labels=None,
+        health_check_unhealthy_threshold=1,
+        health_check_healthy_threshold=2,
+    )
+    _check_backends_health(discovery_instance)
+    assert discovery_instance.get_endpoint_info() == []
+
+    is_model_healthy.return_value = True
+    _check_backends_health(discovery_instance)
+    assert discovery_instance.get_endpoint_info() == []
+    _check_backends_health(discovery_instance)
+    assert len(discovery_instance.get_endpoint_info()) == 1
+
 
-    def mock_get_model_endpoint_hash(url: str, model: str) -> str:
-        return "some-hash" if model == unhealthy_model else "other-hash"
+def test_health_checks_are_concurrent(monkeypatch: pytest.MonkeyPatch) -> None:
+    in_flight = 0
+    max_in_flight = 0
 
+    async def mock_is_model_healthy(session, url, model, model_type) -> bool:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return True
+
+    monkeypatch.setattr("vllm_router.utils.is_model_healthy", mock_is_model_healthy)
     discovery_instance = StaticServiceDiscovery(
         None,
-        ["http://localhost.com", "http://10.123.112.412"],
-        ["llama3", unhealthy_model],
+        [f"http://10.0.0.{i}" for i in range(10)],
+        ["llama3"] * 10,
         None,
         None,
-        ["chat", "chat"],
+        ["chat"] * 10,
         static_backend_health_checks=False,
         prefill_model_labels=None,
         decode_model_labels=None,
     )
-    discovery_instance.unhealthy_endpoint_hashes = ["some-hash"]
-    monkeypatch.setattr(
-        discovery_instance, "get_model_endpoint_hash", mock_get_model_endpoint_hash
-    )
-    assert len(discovery_instance.get_endpoint_info()) == 1
-    assert "llama3" in discovery_instance.get_endpoint_info()[0].model_names
+    _check_backends_health(discovery_instance)
+    assert max_in_flight == 10
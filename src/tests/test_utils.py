@@ -1,8 +1,8 @@
+import asyncio
 import json
 from unittest.mock import MagicMock
 
 import pytest
-import requests
 from starlette.datastructures import MutableHeaders
 
 from vllm_router import utils
@@ -85,25 +85,36 @@ def test_get_all_fields_returns_list_of_strings() -> None:
     assert isinstance(fields[0], str)
 
 
-def test_is_model_healthy_when_requests_responds_with_status_code_200_returns_true(
-    monkeypatch: pytest.MonkeyPatch,
-) -> None:
-    request_mock = MagicMock(return_value=MagicMock(status_code=200))
-    monkeypatch.setattr("requests.post", request_mock)
-    assert utils.is_model_healthy("http://localhost", "test", "chat") is True
+def _mock_session(status: int) -> MagicMock:
+    session = MagicMock()
+    session.post.return_value.__aenter__.return_value = MagicMock(status=status)
+    return session
 
 
-def test_is_model_healthy_when_requests_raises_exception_returns_false(
-    monkeypatch: pytest.MonkeyPatch,
-) -> None:
-    request_mock = MagicMock(side_effect=requests.exceptions.ReadTimeout)
-    monkeypatch.setattr("requests.post", request_mock)
-    assert utils.is_model_healthy("http://localhost", "test", "chat") is False
+def test_is_model_healthy_when_requests_responds_with_status_code_200_returns_true() -> (
+    None
+):
+    session = _mock_session(200)
+    assert (
+        asyncio.run(utils.is_model_healthy(session, "http://localhost", "test", "chat"))
+        is True
+    )
 
 
-def test_is_model_healthy_when_requests_status_with_status_code_not_200_returns_false(
-    monkeypatch: pytest.MonkeyPatch,
-) -> None:
-    request_mock = MagicMock(return_value=MagicMock(status_code=500))
-    monkeypatch.setattr("requests.post", request_mock)
-    assert utils.is_model_healthy("http://localhost", "test", "chat") is False
+def test_is_model_healthy_when_requests_raises_exception_returns_false() -> None:
+    session = MagicMock()
+    session.post.side_effect = asyncio.TimeoutError
+    assert (
+        asyncio.run(utils.is_model_healthy(session, "http://localhost", "test", "chat"))
+        is False
+    )
+
+
+def test_is_model_healthy_when_requests_status_with_status_code_not_200_returns_false() -> (
+    None
+):
+    session = _mock_session(500)
+    assert (
+        asyncio.run(utils.is_model_healthy(session, "http://localhost", "test", "chat"))
+        is False
+    )
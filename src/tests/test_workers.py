@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+
+from vllm_router.workers import (
+    SLOT_RELEASE_DELAY,
+    Coordinator,
+    SharedInflightCounters,
+    SharedSnapshot,
+    create_shared_inflight_counts,
+)
+
+SLOTS = {"http://engine1": 0, "http://engine2": 5}
+
+
+def _counters(counts, worker_id):
+    return SharedInflightCounters(counts, 2, worker_id, lambda: SLOTS)
+
+
+def test_shared_inflight_counters_sum_the_counts_of_all_workers() -> None:
+    counts = create_shared_inflight_counts(num_workers=2)
+    worker0 = _counters(counts, 0)
+    worker1 = _counters(counts, 1)
+
+    worker0.add("http://engine1", 2)
+    worker1.add("http://engine1", 1)
+    worker1.add("http://engine2", 1)
+    worker0.add("http://engine1", -1)
+    # Engines without a slot are not counted
+    worker0.add("http://engine3", 1)
+
+    assert worker0.get("http://engine1") == 2
+    assert worker1.get("http://engine1") == 2
+    assert worker0.get("http://engine2") == 1
+    assert worker0.get("http://engine3") == 0
+    assert _counters(counts, None).get("http://engine1") == 2
+
+
+def _dispatch_in_worker(counts) -> None:
+    _counters(counts, 1).add("http://engine1", 3)
+
+
+def test_shared_inflight_counters_are_shared_with_spawned_workers() -> None:
+    counts = create_shared_inflight_counts(num_workers=2)
+    worker = multiprocessing.get_context("spawn").Process(
+        target=_dispatch_in_worker, args=(counts,)
+    )
+    worker.start()
+    worker.join()
+
+    assert _counters(counts, 0).get("http://engine1") == 3
+
+
+def test_shared_snapshot_publishes_new_versions() -> None:
+    snapshot = SharedSnapshot(multiprocessing.get_context("spawn"), max_size=1024)
+    assert snapshot.read(0) is None
+
+    snapshot.publish({"slots": SLOTS})
+    version, state = snapshot.read(0)
+    assert state == {"slots": SLOTS}
+    assert snapshot.read(version) is None
+
+
+def test_coordinator_reuses_the_slots_of_removed_engines() -> None:
+    context = multiprocessing.get_context("spawn")
+    counts = create_shared_inflight_counts(num_workers=2)
+    coordinator = Coordinator(SharedSnapshot(context, 1024), None, counts, 2)
+    now = time.time()
+
+    coordinator._assign_slots(["http://engine1", "http://engine2"], now)
+    slots = coordinator.slots
+    assert sorted(slots.values()) == [0, 1]
+    worker = SharedInflightCounters(counts, 2, 0, lambda: slots)
+    worker.add("http://engine1", 1)
+
+    # engine1 left but still has a request in flight, engine2 left
+    later = now + SLOT_RELEASE_DELAY + 1
+    coordinator._assign_slots(["http://engine3"], later)
+    assert set(coordinator.slots) == {"http://engine1", "http://engine3"}
+
+    worker.add("http://engine1", -1)
+    coordinator._assign_slots(["http://engine3"], later)
+    coordinator._assign_slots(["http://engine3", "http://engine4"], later)
+    assert coordinator.slots == {
+        "http://engine3": 2,
+        "http://engine4": 3,
+    }
+    # The slots of an assigned table never change
+    assert slots == {"http://engine1": 0, "http://engine2": 1}
@@ -11,12 +11,47 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterable, Optional, Set
+
 import aiohttp
 
 from vllm_router.log import init_logger
 
 logger = init_logger(__name__)
 
+# Time in seconds an idle connection to an engine stays open for reuse
+KEEPALIVE_TIMEOUT = 15.0
+
+# Timeout of the requests proxied to the engines, see set_backend_timeout
+_backend_timeout = aiohttp.ClientTimeout(total=None)
+
+
+def set_backend_timeout(
+    connect_timeout: Optional[float], read_timeout: Optional[float]
+) -> None:
+    """
+    Set the timeout of the requests proxied to the engines. A request that
+    times out fails, and counts as a failure of its engine.
+
+    Args:
+        connect_timeout (Optional[float]): The maximum time in seconds to
+            open a connection to an engine, None for no limit
+        read_timeout (Optional[float]): The maximum time in seconds between
+            two reads of a response, None for no limit
+    """
+    global _backend_timeout
+    _backend_timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=connect_timeout, sock_read=read_timeout
+    )
+
+
+def get_backend_timeout() -> aiohttp.ClientTimeout:
+    """Get the timeout of the requests proxied to the engines."""
+    return _backend_timeout
+
 
 class AiohttpClientWrapper:
 
@@ -46,3 +81,112 @@ class AiohttpClientWrapper:
         # Ensure we don't use it if not started / running
         assert self.async_client is not None
         return self.async_client
+
+
+class EndpointSessionPool:
+    """
+    One aiohttp ClientSession, and so one connection pool, per engine, so
+    that the connections to an engine are reused and the requests to the
+    other engines do not wait for them.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        # Requests in flight on the session of each engine
+        self.in_use: Dict[str, int] = {}
+        # When the requests that left an open connection in the pool of each
+        # engine finished, most recent last
+        self.idle_since: Dict[str, Deque[float]] = {}
+        # Engines no longer discovered, whose session is closed once their
+        # requests in flight are done
+        self.removed: Set[str] = set()
+
+    def get(self, url: str) -> aiohttp.ClientSession:
+        """
+        Get the session of an engine, created on its first request. Call
+        from the event loop of the router.
+        """
+        session = self.sessions.get(url)
+        if session is None:
+            session = aiohttp.ClientSession(
+                base_url=url,
+                timeout=get_backend_timeout(),
+                connector=aiohttp.TCPConnector(keepalive_timeout=KEEPALIVE_TIMEOUT),
+            )
+            self.sessions[url] = session
+            logger.info(f"aiohttp ClientSession instantiated for {url}")
+        return session
+
+    def _pop_expired(self, url: str) -> Deque[float]:
+        idle_since = self.idle_since.setdefault(url, deque())
+        expired_before = time.monotonic() - KEEPALIVE_TIMEOUT
+        while idle_since and idle_since[0] <= expired_before:
+            idle_since.popleft()
+        return idle_since
+
+    @asynccontextmanager
+    async def use(self, url: str) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        Get the session of an engine for one request, which must be done
+        when the context exits. Call from the event loop of the router.
+
+        The pool counts the connections that the requests leave open, to
+        tell whether the next request to an engine can reuse one (see
+        has_idle_connection). A request that fails or is cancelled is
+        assumed to close its connection.
+        """
+        session = self.get(url)
+        idle_since = self._pop_expired(url)
+        if idle_since:
+            # Reuses the most recently released connection
+            idle_since.pop()
+        self.in_use[url] = self.in_use.get(url, 0) + 1
+        released = False
+        try:
+            yield session
+            released = True
+        finally:
+            # Unless the whole pool was closed meanwhile
+            if url in self.in_use:
+                self.in_use[url] -= 1
+                if released:
+                    self.idle_since[url].append(time.monotonic())
+                if url in self.removed and not self.in_use[url]:
+                    await self._close_session(url)
+
+    def has_idle_connection(self, url: str) -> bool:
+        """
+        Whether the pool of an engine holds an open connection that the next
+        request to the engine can reuse, as far as the requests made through
+        use() tell. The engine may still have closed it in the meantime.
+        """
+        return url in self.sessions and bool(self._pop_expired(url))
+
+    async def _close_session(self, url: str):
+        logger.info(f"Closing aiohttp ClientSession of removed engine {url}")
+        self.removed.discard(url)
+        self.in_use.pop(url, None)
+        self.idle_since.pop(url, None)
+        await self.sessions.pop(url).close()
+
+    async def sync(self, urls: Iterable[str]):
+        """
+        Close the sessions of the engines that are no longer discovered.
+        The session of an engine with requests in flight is closed when they
+        are done, unless the engine is discovered again meanwhile.
+
+        Args:
+            urls (Iterable[str]): The URLs of the discovered engines
+        """
+        self.removed = self.sessions.keys() - set(urls)
+        for url in list(self.removed):
+            if not self.in_use.get(url):
+                await self._close_session(url)
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions.clear()
+        self.in_use.clear()
+        self.idle_since.clear()
+        self.removed.clear()
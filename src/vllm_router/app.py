@@ -11,22 +11,35 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import functools
 import logging
+import socket
 import threading
 from contextlib import asynccontextmanager
+from typing import Optional
 
 import sentry_sdk
 import uvicorn
 from fastapi import FastAPI
 
-from vllm_router.aiohttp_client import AiohttpClientWrapper
+from vllm_router.aiohttp_client import (
+    AiohttpClientWrapper,
+    EndpointSessionPool,
+    set_backend_timeout,
+)
 from vllm_router.dynamic_config import (
     DynamicRouterConfig,
     get_dynamic_config_watcher,
     initialize_dynamic_config_watcher,
 )
 from vllm_router.experimental import get_feature_gates, initialize_feature_gates
+from vllm_router.log import initialize_access_logger, set_log_level
 from vllm_router.parsers.parser import parse_args
+from vllm_router.prefix.affinity_store import (
+    PrefixAffinityStore,
+    WorkerPrefixAffinityStore,
+    initialize_prefix_affinity_store,
+)
 from vllm_router.routers.batches_router import batches_router
 from vllm_router.routers.files_router import files_router
 from vllm_router.routers.main_router import main_router
@@ -43,6 +56,11 @@ from vllm_router.service_discovery import (
 from vllm_router.services.batch_service import initialize_batch_processor
 from vllm_router.services.callbacks_service.callbacks import configure_custom_callbacks
 from vllm_router.services.files_service import initialize_storage
+from vllm_router.services.request_service.failover import initialize_request_failover
+from vllm_router.services.request_service.hedging import initialize_request_hedger
+from vllm_router.services.request_service.response_cache import (
+    initialize_response_cache,
+)
 from vllm_router.services.request_service.rewriter import (
     get_request_rewriter,
 )
@@ -51,21 +69,33 @@ from vllm_router.stats.engine_stats import (
     initialize_engine_stats_scraper,
 )
 from vllm_router.stats.log_stats import log_stats
+from vllm_router.stats.outlier_detection import initialize_outlier_detector
 from vllm_router.stats.request_stats import (
     get_request_stats_monitor,
     initialize_request_stats_monitor,
 )
+from vllm_router.stats.router_metrics import (
+    get_router_metrics_collector,
+    initialize_router_metrics_collector,
+)
 from vllm_router.utils import (
     parse_comma_separated_args,
     parse_static_aliases,
     parse_static_urls,
     set_ulimit,
 )
+from vllm_router.workers import (
+    CoordinatorLink,
+    get_coordinator_link,
+    get_shared_inflight_counters,
+    run_workers,
+)
 
 try:
     # Semantic cache integration
     from vllm_router.experimental.semantic_cache import (
         enable_semantic_cache,
+        get_semantic_cache,
         initialize_semantic_cache,
         is_semantic_cache_enabled,
     )
@@ -86,18 +116,25 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "batch_processor"):
         await app.state.batch_processor.initialize()
 
-    service_discovery = get_service_discovery()
-    if hasattr(service_discovery, "initialize_client_sessions"):
-        await service_discovery.initialize_client_sessions()
+    if hasattr(app.state.router, "start_affinity_store"):
+        await app.state.router.start_affinity_store()
 
     yield
+    if hasattr(app.state.router, "close_affinity_store"):
+        await app.state.router.close_affinity_store()
     await app.state.aiohttp_client_wrapper.stop()
+    await app.state.endpoint_session_pool.close()
 
     # Close the threaded-components
     logger.info("Closing engine stats scraper")
     engine_stats_scraper = get_engine_stats_scraper()
     engine_stats_scraper.close()
 
+    # The coordinator refreshes the router gauges of the workers
+    if get_coordinator_link() is None:
+        logger.info("Closing router metrics collector")
+        get_router_metrics_collector().close()
+
     logger.info("Closing service discovery module")
     service_discovery = get_service_discovery()
     service_discovery.close()
@@ -108,27 +145,19 @@ async def lifespan(app: FastAPI):
         logger.info("Closing dynamic config watcher")
         dyn_cfg_watcher.close()
 
+    # Close the optional semantic cache
+    if semantic_cache_available and get_semantic_cache() is not None:
+        logger.info("Closing semantic cache")
+        get_semantic_cache().close()
 
-def initialize_all(app: FastAPI, args):
-    """
-    Initialize all the components of the router with the given arguments.
 
-    Args:
-        app (FastAPI): FastAPI application
-        args: the parsed command-line arguments
+def _initialize_service_discovery(app: Optional[FastAPI], args):
+    """
+    Initialize the service discovery module with the given arguments.
 
     Raises:
         ValueError: if the service discovery type is invalid
     """
-    if sentry_dsn := args.sentry_dsn:
-        sentry_sdk.init(
-            dsn=sentry_dsn,
-            send_default_pii=True,
-            profile_lifecycle="trace",
-            traces_sample_rate=args.sentry_traces_sample_rate,
-            profile_session_sample_rate=args.sentry_profile_session_sample_rate,
-        )
-
     if args.service_discovery == "static":
         initialize_service_discovery(
             ServiceDiscoveryType.STATIC,
@@ -153,8 +182,17 @@ def initialize_all(app: FastAPI, args):
             static_backend_health_checks=args.static_backend_health_checks,
             prefill_model_labels=args.prefill_model_labels,
             decode_model_labels=args.decode_model_labels,
+            health_check_interval=args.static_backend_health_check_interval,
+            health_check_timeout=args.static_backend_health_check_timeout,
+            health_check_unhealthy_threshold=args.static_backend_unhealthy_threshold,
+            health_check_healthy_threshold=args.static_backend_healthy_threshold,
         )
     elif args.service_discovery == "k8s":
+        # The services of the service-name discovery are probed one at a time
+        # by its watcher thread
+        probe_kwargs = {}
+        if args.k8s_service_discovery_type != "service-name":
+            probe_kwargs["max_concurrent_probes"] = args.k8s_max_concurrent_probes
         initialize_service_discovery(
             ServiceDiscoveryType.K8S,
             k8s_service_discovery_type=args.k8s_service_discovery_type,
@@ -164,14 +202,119 @@ def initialize_all(app: FastAPI, args):
             label_selector=args.k8s_label_selector,
             prefill_model_labels=args.prefill_model_labels,
             decode_model_labels=args.decode_model_labels,
+            probe_timeout=args.k8s_probe_timeout,
+            **probe_kwargs,
         )
 
     else:
         raise ValueError(f"Invalid service discovery type: {args.service_discovery}")
 
+
+def _initialize_stats(args, coordinator: Optional[CoordinatorLink] = None):
+    """
+    Initialize the engine stats scraper, the request stats monitor and the
+    outlier detector. In a router worker, they rely on the coordinator, which
+    also refreshes the router gauges.
+    """
+    initialize_engine_stats_scraper(
+        args.engine_stats_interval,
+        args.engine_stats_push_ttl if args.engine_stats_push else None,
+        get_shared_inflight_counters(),
+        coordinator,
+    )
+    initialize_request_stats_monitor(args.request_stats_window, coordinator)
+    if coordinator is None:
+        initialize_router_metrics_collector(args.metrics_collect_interval)
+    if args.outlier_detection:
+        initialize_outlier_detector(
+            args.outlier_consecutive_errors,
+            args.outlier_error_rate,
+            args.outlier_ttft_factor,
+            args.outlier_base_ejection_time,
+            args.outlier_max_ejection_percent,
+            coordinator,
+        )
+
+
+def _initialize_prefix_affinity_store(
+    args, coordinator: Optional[CoordinatorLink] = None
+) -> Optional[PrefixAffinityStore]:
+    """
+    Create the store sharing the prefix affinity of the prefix-aware routing,
+    if any. The router workers share it with each other by default.
+    """
+    if args.prefix_affinity_store:
+        return initialize_prefix_affinity_store(
+            args.prefix_affinity_store,
+            args.prefix_affinity_store_url,
+            args.prefix_affinity_flush_interval,
+        )
+    if coordinator is not None and args.routing_logic == "prefixaware":
+        return WorkerPrefixAffinityStore(
+            coordinator.inboxes,
+            coordinator.worker_id,
+            flush_interval=args.prefix_affinity_flush_interval,
+        )
+    return None
+
+
+def initialize_coordinator(args):
+    """
+    Initialize the components shared by the router workers, in the
+    coordinator process (see vllm_router.workers).
+
+    Args:
+        args: the parsed command-line arguments
+    """
+    set_log_level(args.log_level)
+    _initialize_service_discovery(None, args)
+    _initialize_stats(args)
+
+
+def initialize_all(app: FastAPI, args):
+    """
+    Initialize all the components of the router with the given arguments.
+
+    Args:
+        app (FastAPI): FastAPI application
+        args: the parsed command-line arguments
+
+    Raises:
+        ValueError: if the service discovery type is invalid
+    """
+    set_log_level(args.log_level)
+    set_backend_timeout(args.backend_connect_timeout, args.backend_read_timeout)
+    if args.access_log:
+        initialize_access_logger(args.access_log_file, args.access_log_sample_rate)
+
+    if sentry_dsn := args.sentry_dsn:
+        sentry_sdk.init(
+            dsn=sentry_dsn,
+            send_default_pii=True,
+            profile_lifecycle="trace",
+            traces_sample_rate=args.sentry_traces_sample_rate,
+            profile_session_sample_rate=args.sentry_profile_session_sample_rate,
+        )
+
+    coordinator = get_coordinator_link()
+    if coordinator is None:
+        _initialize_service_discovery(app, args)
+    else:
+        initialize_service_discovery(ServiceDiscoveryType.WORKER, coordinator)
+
     # Initialize singletons via custom functions.
-    initialize_engine_stats_scraper(args.engine_stats_interval)
-    initialize_request_stats_monitor(args.request_stats_window)
+    _initialize_stats(args, coordinator)
+    initialize_request_failover(args.max_request_attempts, args.failover_cooldown)
+    if args.request_hedging:
+        initialize_request_hedger(
+            args.hedging_percentile, args.hedging_budget, args.hedging_min_delay
+        )
+    if args.response_cache:
+        initialize_response_cache(
+            args.response_cache_max_bytes,
+            args.response_cache_spill_dir,
+            args.response_cache_spill_max_bytes,
+        )
 
     if args.enable_batch_api:
         logger.info("Initializing batch API")
@@ -203,7 +346,10 @@ def initialize_all(app: FastAPI, args):
         lmcache_controller_port=args.lmcache_controller_port,
         prefill_model_labels=args.prefill_model_labels,
         decode_model_labels=args.decode_model_labels,
+        pd_pipelined_handoff=args.pd_pipelined_handoff,
+        pd_prefix_aware_prefill=args.pd_prefix_aware_prefill,
         kv_aware_threshold=args.kv_aware_threshold,
+        prefix_affinity_store=_initialize_prefix_affinity_store(args, coordinator),
     )
 
     # Initialize feature gates
@@ -237,15 +383,26 @@ def initialize_all(app: FastAPI, args):
                     embedding_model=args.semantic_cache_model,
                     cache_dir=args.semantic_cache_dir,
                     default_similarity_threshold=args.semantic_cache_threshold,
+                    embedding_batch_size=args.semantic_cache_batch_size,
+                    embedding_batch_window=args.semantic_cache_batch_window,
+                    embedding_workers=args.semantic_cache_embedding_workers,
+                    index_type=args.semantic_cache_index,
+                    snapshot_interval=args.semantic_cache_snapshot_interval,
+                    ttl=args.semantic_cache_ttl,
+                    max_entries=args.semantic_cache_max_entries,
+                    eviction_policy=args.semantic_cache_eviction_policy,
+                    streaming=args.semantic_cache_streaming,
+                    stream_chunk_size=args.semantic_cache_stream_chunk_size,
+                    stream_interval=args.semantic_cache_stream_interval,
                 )
 
                 # Update cache size metric
-                if cache and hasattr(cache, "db") and hasattr(cache.db, "index"):
+                if cache and hasattr(cache, "db"):
                     semantic_cache_size.labels(server="router").set(
-                        cache.db.index.ntotal
+                        cache.db.num_entries
                     )
                     logger.info(
-                        f"Semantic cache initialized with {cache.db.index.ntotal} entries"
+                        f"Semantic cache initialized with {cache.db.num_entries} entries"
                     )
 
                 logger.info(
@@ -276,13 +433,23 @@ app.include_router(files_router)
 app.include_router(batches_router)
 app.include_router(metrics_router)
 app.state.aiohttp_client_wrapper = AiohttpClientWrapper()
+app.state.endpoint_session_pool = EndpointSessionPool()
 app.state.semantic_cache_available = semantic_cache_available
 
 
-def main():
-    args = parse_args()
+def serve(args, sock: Optional[socket.socket] = None):
+    """
+    Initialize the router and serve requests until it is stopped.
+
+    Args:
+        args: the parsed command-line arguments
+        sock (Optional[socket.socket]): A listening socket to serve on
+            instead of binding args.host and args.port, e.g. in a worker
+    """
     initialize_all(app, args)
-    if args.log_stats:
+    coordinator = get_coordinator_link()
+    # With multiple workers, the first one logs the stats of the router
+    if args.log_stats and (coordinator is None or coordinator.worker_id == 0):
         threading.Thread(
             target=log_stats,
             args=(
@@ -292,10 +459,29 @@ def main():
             daemon=True,
         ).start()
 
+    if sock is None:
+        uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+    else:
+        config = uvicorn.Config(app, log_level=args.log_level)
+        uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    args = parse_args()
+
     # Workaround to avoid footguns where uvicorn drops requests with too
     # many concurrent requests active.
     set_ulimit()
-    uvicorn.run(app, host=args.host, port=args.port)
+    if args.workers > 1:
+        run_workers(
+            args.workers,
+            args.host,
+            args.port,
+            functools.partial(serve, args),
+            functools.partial(initialize_coordinator, args),
+        )
+    else:
+        serve(args)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 
 import logging
 import re
-from typing import Dict, Optional, Set
+from typing import Dict, FrozenSet, Iterator, Match, Optional, Pattern, Set
 
 from ..types import PIIType
 from .base import PIIAnalysisResult, PIIAnalyzer, PIILocation
@@ -19,6 +19,26 @@ PII_PATTERNS = {
 }
 
 
+# Every match of PII_PATTERNS has a digit or an @. A fast pass over the text
+# for them finds the lines to analyze, the other lines are skipped.
+PII_TRIGGER = re.compile(r"[\d@]")
+
+
+def combine_patterns(patterns: Dict[PIIType, str]) -> Pattern:
+    """
+    Compile PII patterns into one alternation with a named group per PII type,
+    so that a single pass over the text finds all of them.
+
+    Matches do not overlap: where the patterns of several types match at the
+    same position, the type listed first wins.
+    """
+    return re.compile(
+        "|".join(
+            f"(?P<{pii_type.name}>{pattern})" for pii_type, pattern in patterns.items()
+        )
+    )
+
+
 class RegexAnalyzer(PIIAnalyzer):
     """PII analyzer using regular expressions."""
 
@@ -26,6 +46,8 @@ class RegexAnalyzer(PIIAnalyzer):
         """Initialize the analyzer with optional config."""
         super().__init__(config)
         self.patterns = {}
+        # Combined pattern of each set of PII types analyzed
+        self.combined_patterns: Dict[FrozenSet[PIIType], Pattern] = {}
 
     async def initialize(self) -> None:
         """Initialize regex patterns."""
@@ -35,6 +57,9 @@ class RegexAnalyzer(PIIAnalyzer):
                 pii_type: re.compile(pattern)
                 for pii_type, pattern in PII_PATTERNS.items()
             }
+            self.combined_patterns = {
+                frozenset(PII_PATTERNS): combine_patterns(PII_PATTERNS)
+            }
             logger.info("Initialized Regex analyzer successfully")
         except Exception as e:
             error_msg = f"Failed to initialize Regex analyzer: {str(e)}"
@@ -44,6 +69,29 @@ class RegexAnalyzer(PIIAnalyzer):
     async def shutdown(self) -> None:
         """Shutdown the analyzer."""
         self.patterns = {}
+        self.combined_patterns = {}
+
+    def _get_combined_pattern(self, pii_types: Optional[Set[PIIType]]) -> Pattern:
+        key = frozenset(t for t in (pii_types or self.patterns) if t in self.patterns)
+        pattern = self.combined_patterns.get(key)
+        if pattern is None:
+            # Keep the order of PII_PATTERNS, which settles overlapping matches
+            pattern = self.combined_patterns[key] = combine_patterns(
+                {t: p for t, p in PII_PATTERNS.items() if t in key}
+            )
+        return pattern
+
+    @staticmethod
+    def _finditer(pattern: Pattern, text: str) -> Iterator[Match]:
+        """Find the matches of pattern in the lines of text with a trigger."""
+        pos = 0
+        while (trigger := PII_TRIGGER.search(text, pos)) is not None:
+            start = text.rfind("\n", 0, trigger.start()) + 1
+            end = text.find("\n", trigger.end())
+            if end == -1:
+                end = len(text)
+            yield from pattern.finditer(text, start, end)
+            pos = end
 
     async def analyze(
         self,
@@ -59,26 +107,24 @@ class RegexAnalyzer(PIIAnalyzer):
             detected_types = set()
             pii_locations = []
 
-            # Determine which patterns to use
-            patterns_to_check = (
-                {t: self.patterns[t] for t in pii_types if t in self.patterns}
-                if pii_types
-                else self.patterns
-            )
+            if pii_types and not any(t in self.patterns for t in pii_types):
+                # None of the requested types has a pattern
+                return PIIAnalysisResult(has_pii=False, detected_types=set())
 
-            # Search for each pattern
-            for pii_type, pattern in patterns_to_check.items():
-                for match in pattern.finditer(text):
-                    detected_types.add(pii_type)
-                    pii_locations.append(
-                        PIILocation(
-                            start=match.start(),
-                            end=match.end(),
-                            pii_type=pii_type,
-                            value=match.group(),
-                            score=1.0,  # Regex matches are binary - either match or no match
-                        )
+            # One pass over the text for all the PII types
+            pattern = self._get_combined_pattern(pii_types)
+            for match in self._finditer(pattern, text):
+                pii_type = PIIType[match.lastgroup]
+                detected_types.add(pii_type)
+                pii_locations.append(
+                    PIILocation(
+                        start=match.start(),
+                        end=match.end(),
+                        pii_type=pii_type,
+                        value=match.group(),
+                        score=1.0,  # Regex matches are binary - either match or no match
                     )
+                )
 
             return PIIAnalysisResult(
                 has_pii=bool(detected_types),
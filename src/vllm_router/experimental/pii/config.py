@@ -20,6 +20,14 @@ class PIIConfig:
     # Analyzer-specific configuration
     score_threshold: float = 0.5
 
+    # Header identifying the session of a request. The messages of a session
+    # found free of PII are not analyzed again in its later requests
+    # If None, every request is analyzed in full
+    session_key: Optional[str] = None
+
+    # Maximum number of sessions whose analyzed messages are remembered
+    max_sessions: int = 10000
+
     @staticmethod
     def from_dict(config_dict: dict) -> "PIIConfig":
         """Create a PIIConfig from a dictionary."""
@@ -32,7 +40,11 @@ class PIIConfig:
         score_threshold = config_dict.get("score_threshold", 0.5)
 
         return PIIConfig(
-            enabled=enabled, pii_types=pii_types, score_threshold=score_threshold
+            enabled=enabled,
+            pii_types=pii_types,
+            score_threshold=score_threshold,
+            session_key=config_dict.get("session_key"),
+            max_sessions=config_dict.get("max_sessions", 10000),
         )
 
     def to_dict(self) -> dict:
@@ -41,4 +53,6 @@ class PIIConfig:
             "enabled": self.enabled,
             "pii_types": [t.value for t in self.pii_types] if self.pii_types else None,
             "score_threshold": self.score_threshold,
+            "session_key": self.session_key,
+            "max_sessions": self.max_sessions,
         }
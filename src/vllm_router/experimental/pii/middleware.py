@@ -1,14 +1,15 @@
 """FastAPI middleware for PII detection."""
 
-import json
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from prometheus_client import Counter, Histogram
 
 from vllm_router.log import init_logger
+from vllm_router.services.metrics_service import observe_router_stage
 
 from .analyzers.base import PIIAnalyzer
 from .config import PIIConfig
@@ -40,6 +41,53 @@ pii_analyzer_errors = Counter(
 )
 
 
+# Hashes of the messages of each session found free of PII, least recently
+# used session first
+_scanned_messages: "OrderedDict[str, Set[int]]" = OrderedDict()
+
+
+def _content_text(content: Any) -> str:
+    # A message content is a string or a list of parts, e.g. text and images
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            part["text"] if isinstance(part, dict) else part
+            for part in content
+            if isinstance(part, str)
+            or (isinstance(part, dict) and isinstance(part.get("text"), str))
+        )
+    return ""
+
+
+def extract_user_content(body: Dict[str, Any]) -> List[Tuple[int, str]]:
+    """
+    Extract the text written by the user from a request body: the content of
+    the chat messages but the assistant ones, the prompt of a completion and
+    the input of an embedding. The keys and sampling parameters are skipped.
+
+    Args:
+        body: The request body
+
+    Returns:
+        List of (hash, text) of the pieces of user content, the hash
+        identifying a chat message in later requests of its session
+    """
+    texts = []
+    for message in body.get("messages") or []:
+        if not isinstance(message, dict) or message.get("role") == "assistant":
+            continue
+        text = _content_text(message.get("content"))
+        if text:
+            texts.append((hash((message.get("role"), text)), text))
+    for field in ("prompt", "input"):
+        value = body.get(field)
+        for text in [value] if isinstance(value, str) else value or []:
+            if isinstance(text, str) and text:
+                texts.append((hash((field, text)), text))
+    return texts
+
+
 async def check_pii_content(
     text: str,
     analyzer: PIIAnalyzer,
@@ -117,14 +165,32 @@ async def check_pii(
     if not config or not config.enabled:
         return None
 
+    start_time = time.perf_counter()
     try:
         body = await request.json()
 
-        # Extract text to analyze from request body
-        text_to_analyze = json.dumps(body)
+        # Only the user content is analyzed, and in a session only the
+        # messages not found free of PII by its earlier requests
+        texts = extract_user_content(body)
+        session_id = (
+            request.headers.get(config.session_key) if config.session_key else None
+        )
+        scanned = _scanned_messages.get(session_id, set()) if session_id else set()
+        texts = [(key, text) for key, text in texts if key not in scanned]
+        if not texts:
+            return None
 
-        result = await check_pii_content(text_to_analyze, analyzer, config)
+        result = await check_pii_content(
+            "\n\n".join(text for _, text in texts), analyzer, config
+        )
         if not result:
+            if session_id:
+                _scanned_messages.setdefault(session_id, set()).update(
+                    key for key, _ in texts
+                )
+                _scanned_messages.move_to_end(session_id)
+                while len(_scanned_messages) > config.max_sessions:
+                    _scanned_messages.popitem(last=False)
             return None
 
         should_block, pii_types = result
@@ -152,3 +218,5 @@ async def check_pii(
         logger.error(f"Error in PII middleware: {str(e)}")
         pii_analyzer_errors.labels(error_type=type(e).__name__).inc()
         return None
+    finally:
+        observe_router_stage(request, "pii_check", time.perf_counter() - start_time)
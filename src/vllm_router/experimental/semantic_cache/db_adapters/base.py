@@ -44,3 +44,7 @@ class VectorDBAdapterBase(ABC):
             usage: The token usage information
         """
         pass
+
+    def close(self):
+        """Persist the pending changes and release the database resources."""
+        pass
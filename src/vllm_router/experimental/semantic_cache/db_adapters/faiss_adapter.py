@@ -1,7 +1,12 @@
+import json
 import logging
+import math
 import os
 import pickle
-from typing import Any, Dict, List, Optional
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
 
 import faiss
 import numpy as np
@@ -10,64 +15,416 @@ from .base import VectorDBAdapterBase
 
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+EVICTION_POLICIES = ("lru", "lfu")
+
+# Record of an entry in the entries file: the end offset of its metadata in the
+# metadata file, its model and its creation time
+ENTRY_DTYPE = np.dtype([("end", "<u8"), ("model", "<u4"), ("created", "<f8")])
+
+
+@dataclass
+class _Partition:
+    """The FAISS index of the entries of one model."""
+
+    index: Any
+    # Entry at each position of the index
+    entries: array = field(default_factory=lambda: array("Q"))
+    trained_size: int = 0
+    # Evicted entries still in the index, skipped by the searches
+    num_evicted: int = 0
+
 
 class FAISSAdapter(VectorDBAdapterBase):
-    """FAISS-based vector database adapter for semantic caching."""
+    """
+    FAISS-based vector database adapter for semantic caching.
+
+    Each model has its own FAISS index, so a lookup only compares against the
+    entries of the requested model.
+
+    The entries are persisted incrementally. A store appends the embedding to
+    a raw float32 file, memory-mapped when an index is rebuilt, the metadata to
+    a JSON lines file, and a fixed-size record with the metadata end offset to
+    an entries file. Only the records stay in memory, the metadata of an entry
+    is read from disk on a hit. The FAISS indexes are snapshotted every
+    snapshot_interval stores, and the entries appended after the snapshot are
+    added back to them on load.
+
+    Entries expire ttl seconds after being stored, and the least recently or
+    least frequently used ones are evicted beyond max_entries. Evicted entries
+    are appended to an evictions file and skipped by the searches until their
+    index is rebuilt, and the files are compacted once most entries are evicted.
+    """
+
+    # Clusters visited by an IVF search
+    IVF_NPROBE = 16
+    # Below this many entries, the IVF index is a flat index: it is exact and
+    # fast enough, and there is too little data to train the clusters
+    IVF_MIN_TRAIN_SIZE = 4096
+    # Training points per IVF cluster, capped to bound the training time
+    IVF_MAX_POINTS_PER_CLUSTER = 256
+    # The IVF index is trained again when the model's entries grew by this factor
+    IVF_RETRAIN_GROWTH = 4
+    HNSW_M = 32
+    HNSW_EF_SEARCH = 64
+    # Embeddings added to a rebuilt index at a time
+    REBUILD_CHUNK_SIZE = 65536
+    # Neighbors fetched by a search, to skip the evicted ones
+    SEARCH_K = 8
+    # An index is rebuilt when this fraction of its entries was evicted
+    REBUILD_EVICTED_RATIO = 0.25
+    # The files are compacted when the evicted entries outnumber the live ones
+    COMPACTION_MIN_EVICTED = 1024
+    # Fraction of max_entries evicted at once when the cache is full, to
+    # amortize the choice of the evicted entries
+    EVICTION_BATCH_RATIO = 0.05
+    # Seconds between two sweeps of the expired entries. Expired entries are
+    # never returned by a search in between
+    EXPIRY_SWEEP_INTERVAL = 60
 
     def __init__(
-        self, dim: int = 384, index_file: str = "faiss_index.pkl", cache_dir: str = None
+        self,
+        dim: int = 384,
+        index_file: str = "faiss_index.bin",
+        cache_dir: str = None,
+        index_type: str = "flat",
+        snapshot_interval: int = 1000,
+        ttl: float = 0,
+        max_entries: int = 0,
+        eviction_policy: str = "lru",
+        on_evict: Optional[Callable[[str, str], None]] = None,
     ):
         """
         Initialize the FAISS adapter.
 
         Args:
             dim: The dimension of the embedding vectors
-            index_file: The filename to use for storing the FAISS index
+            index_file: The filename to use for storing the FAISS index snapshot
             cache_dir: The directory to store cache files in (defaults to current directory)
+            index_type: "flat" for an exact search, "ivf" or "hnsw" for an
+                approximate search that scales to millions of entries
+            snapshot_interval: The number of stores between two snapshots of the
+                FAISS indexes
+            ttl: The time in seconds after which an entry expires, 0 to never expire
+            max_entries: The maximum number of entries, 0 for no limit
+            eviction_policy: "lru" or "lfu", the entries evicted when the cache is full
+            on_evict: Called with the model and the reason ("expired" or
+                "capacity") of each evicted entry
         """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown semantic cache index type: {index_type}")
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown semantic cache eviction policy: {eviction_policy}"
+            )
         self.dim = dim
+        self.index_type = index_type
+        self.snapshot_interval = snapshot_interval
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.eviction_policy = eviction_policy
+        self.on_evict = on_evict
 
+        self.cache_dir = cache_dir or ""
         if cache_dir:
             os.makedirs(cache_dir, exist_ok=True)
-            self.index_file = os.path.join(cache_dir, index_file)
-            self.metadata_file = os.path.join(cache_dir, "faiss_metadata.pkl")
-        else:
-            self.index_file = index_file
-            self.metadata_file = "faiss_metadata.pkl"
+        self.index_file = self._path(index_file)
+        self.embeddings_file = self._path("faiss_embeddings.f32")
+        self.metadata_file = self._path("faiss_metadata.jsonl")
+        self.entries_file = self._path("faiss_entries.idx")
+        self.evictions_file = self._path("faiss_evictions.idx")
+        self.models_file = self._path("faiss_models.json")
+        self.compaction_file = self._path("faiss_compaction")
 
-        if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
-            self.load_index()
-        else:
-            self.index = faiss.IndexFlatIP(dim)  # Inner product similarity
-            self.metadata: List[Dict[str, Any]] = []
+        self.load_index()
+        logger.info(
+            f"Initialized FAISS adapter with dimension {dim}, {index_type} index "
+            f"and {self.num_entries} entries for {len(self.partitions)} models"
+        )
 
-        self.save_index()
-        logger.info(f"Initialized FAISS adapter with dimension {dim}")
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    @property
+    def num_entries(self) -> int:
+        """The number of entries in the cache."""
+        return self.num_live
+
+    def num_model_entries(self, model: str) -> int:
+        """The number of entries of a model in the cache."""
+        model_id = self.model_ids.get(model)
+        return self.model_sizes.get(model_id, 0) if model_id is not None else 0
 
     def load_index(self):
-        """Load the FAISS index and metadata from disk."""
+        """
+        Load the entries from disk, and the FAISS indexes from their snapshot
+        and the entries stored after it.
+        """
+        self._finish_compaction()
+        records = self._read_records(self.entries_file, ENTRY_DTYPE)
+        num_embeddings = 0
+        if os.path.exists(self.embeddings_file):
+            num_embeddings = os.path.getsize(self.embeddings_file) // (self.dim * 4)
+
+        # An entry is complete once its embedding is written: drop the tail of
+        # a store interrupted by a crash
+        num_entries = min(len(records), num_embeddings)
+        records = records[:num_entries]
+        metadata_size = int(records["end"][-1]) if num_entries else 0
+        self._truncate(self.entries_file, num_entries * ENTRY_DTYPE.itemsize)
+        self._truncate(self.embeddings_file, num_entries * self.dim * 4)
+        self._truncate(self.metadata_file, metadata_size)
+
+        self.models: List[str] = []
+        if os.path.exists(self.models_file):
+            with open(self.models_file) as f:
+                self.models = json.load(f)
+        self.model_ids = {model: i for i, model in enumerate(self.models)}
+        self.ends = array("Q", records["end"].tolist())
+        self.entry_models = array("I", records["model"].tolist())
+        self.created = array("d", records["created"].tolist())
+        # Usage of the entries since the router started, for the evictions
+        self.last_access = array("d", self.created)
+        self.hits = array("I", bytes(4 * num_entries))
+        self.alive = bytearray(b"\x01" * num_entries)
+        for entry in self._read_records(self.evictions_file, np.dtype("<u8")).tolist():
+            if entry < num_entries:
+                self.alive[entry] = 0
+        self.num_live = 0
+        self.model_sizes: Dict[int, int] = {}
+        for entry in range(num_entries):
+            if self.alive[entry]:
+                model_id = self.entry_models[entry]
+                self.model_sizes[model_id] = self.model_sizes.get(model_id, 0) + 1
+                self.num_live += 1
+        self._open_files()
+
+        self.partitions: Dict[int, _Partition] = {}
+        self.snapshot_size = 0
+        self.last_expiry_sweep = 0.0
+        loaded = False
         try:
-            self.index = faiss.read_index(self.index_file)
-            with open(self.metadata_file, "rb") as f:
-                self.metadata = pickle.load(f)
-            logger.info(f"Loaded FAISS index with {self.index.ntotal} entries")
+            loaded = self._load_snapshot()
         except Exception as e:
-            logger.error(f"Error loading FAISS index: {str(e)}")
-            # Create a new index if loading fails
-            self.index = faiss.IndexFlatIP(self.dim)
-            self.metadata = []
+            logger.error(f"Error loading FAISS index snapshot: {str(e)}")
+            self.partitions = {}
+        if not loaded:
+            self._rebuild_partitions()
             self.save_index()
 
+        if num_entries == 0:
+            self._migrate_pickled_index()
+        self._evict_expired()
+
+    def _open_files(self):
+        self.metadata_fp = open(self.metadata_file, "ab")
+        self.entries_fp = open(self.entries_file, "ab")
+        self.embeddings_fp = open(self.embeddings_file, "ab")
+        self.evictions_fp = open(self.evictions_file, "ab")
+        self.metadata_fd = os.open(self.metadata_file, os.O_RDONLY)
+
+    def _close_files(self):
+        self.metadata_fp.close()
+        self.entries_fp.close()
+        self.embeddings_fp.close()
+        self.evictions_fp.close()
+        os.close(self.metadata_fd)
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.index_file):
+            return False
+        with open(self.index_file, "rb") as f:
+            snapshot = pickle.load(f)
+        num_entries = len(self.ends)
+        if (
+            snapshot["index_type"] != self.index_type
+            or snapshot["ntotal"] > num_entries
+        ):
+            logger.info("FAISS index snapshot is out of date, rebuilding the indexes")
+            return False
+        for model_id, (index, entries, trained_size) in snapshot["partitions"].items():
+            index = faiss.deserialize_index(index)
+            self._configure_search(index)
+            partition = _Partition(index, array("Q", entries), trained_size)
+            partition.num_evicted = sum(
+                1 for entry in partition.entries if not self.alive[entry]
+            )
+            self.partitions[model_id] = partition
+        embeddings = self._embeddings()
+        for entry in range(snapshot["ntotal"], num_entries):
+            if self.alive[entry]:
+                self._add_to_partition(entry, embeddings[entry : entry + 1])
+        self.snapshot_size = snapshot["ntotal"]
+        for model_id, partition in list(self.partitions.items()):
+            if self._needs_rebuild(partition):
+                self._rebuild_partition(model_id)
+        logger.info(
+            f"Loaded FAISS index snapshot with {snapshot['ntotal']} entries, "
+            f"replayed {num_entries - snapshot['ntotal']} entries"
+        )
+        return True
+
+    def _migrate_pickled_index(self):
+        """Import the entries of a cache saved as pickles by previous versions."""
+        legacy_index_file = self._path("faiss_index.pkl")
+        legacy_metadata_file = self._path("faiss_metadata.pkl")
+        if not (
+            os.path.exists(legacy_index_file) and os.path.exists(legacy_metadata_file)
+        ):
+            return
+        try:
+            index = faiss.read_index(legacy_index_file)
+            with open(legacy_metadata_file, "rb") as f:
+                metadata = pickle.load(f)
+            embeddings = index.reconstruct_n(0, index.ntotal)
+        except Exception as e:
+            logger.error(f"Error loading pickled FAISS index: {str(e)}")
+            return
+        for embedding, entry in zip(embeddings, metadata):
+            self.store(embedding=embedding, **entry)
+        self.save_index()
+        logger.info(f"Imported {len(metadata)} entries from the pickled FAISS index")
+
+    @staticmethod
+    def _read_records(path: str, dtype: np.dtype) -> np.ndarray:
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        with open(path, "rb") as f:
+            data = f.read()
+        # Ignore a record partially written by a crash
+        return np.frombuffer(data[: len(data) - len(data) % dtype.itemsize], dtype)
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _embeddings(self) -> np.ndarray:
+        if not self.ends:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(
+            self.embeddings_file,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self.ends), self.dim),
+        )
+
+    def _new_index(self, num_entries: int):
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(
+                self.dim, self.HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+        elif self.index_type == "ivf" and num_entries >= self.IVF_MIN_TRAIN_SIZE:
+            nlist = int(math.sqrt(num_entries))
+            index = faiss.IndexIVFFlat(
+                faiss.IndexFlatIP(self.dim),
+                self.dim,
+                nlist,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        else:
+            index = faiss.IndexFlatIP(self.dim)  # Inner product similarity
+        self._configure_search(index)
+        return index
+
+    def _configure_search(self, index):
+        if hasattr(index, "nprobe"):
+            index.nprobe = self.IVF_NPROBE
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+
+    def _add_to_partition(self, entry: int, embedding: np.ndarray):
+        model_id = self.entry_models[entry]
+        partition = self.partitions.get(model_id)
+        if partition is None:
+            partition = self.partitions[model_id] = _Partition(self._new_index(0))
+        partition.index.add(np.ascontiguousarray(embedding, dtype=np.float32))
+        partition.entries.append(entry)
+
+    def _rebuild_partitions(self):
+        """Build the FAISS index of every model from the stored embeddings."""
+        self.partitions = {}
+        entry_models = np.array(self.entry_models, dtype=np.uint32)
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        for model_id in np.unique(entry_models[alive]).tolist():
+            entries = np.flatnonzero(alive & (entry_models == model_id))
+            self.partitions[model_id] = self._build_partition(entries)
+
+    def _rebuild_partition(self, model_id: int):
+        """Build the FAISS index of a model from its live entries."""
+        entries = np.array(
+            [entry for entry in self.partitions[model_id].entries if self.alive[entry]],
+            dtype=np.int64,
+        )
+        if len(entries):
+            self.partitions[model_id] = self._build_partition(entries)
+        else:
+            del self.partitions[model_id]
+
+    def _build_partition(self, entries: np.ndarray) -> _Partition:
+        embeddings = self._embeddings()
+        index = self._new_index(len(entries))
+        partition = _Partition(index, array("Q", entries.tolist()))
+        if not index.is_trained:
+            # Train on an evenly spaced sample of the entries
+            sample_size = min(
+                len(entries), index.nlist * self.IVF_MAX_POINTS_PER_CLUSTER
+            )
+            sample = entries[np.linspace(0, len(entries) - 1, sample_size).astype(int)]
+            index.train(np.array(embeddings[sample]))
+            partition.trained_size = len(entries)
+            logger.info(
+                f"Trained an IVF index with {index.nlist} clusters on "
+                f"{sample_size} of {len(entries)} entries"
+            )
+        for start in range(0, len(entries), self.REBUILD_CHUNK_SIZE):
+            chunk = entries[start : start + self.REBUILD_CHUNK_SIZE]
+            index.add(np.array(embeddings[chunk]))
+        return partition
+
+    def _needs_rebuild(self, partition: _Partition) -> bool:
+        num_indexed = partition.index.ntotal
+        if partition.num_evicted > self.REBUILD_EVICTED_RATIO * num_indexed:
+            return True
+        num_entries = num_indexed - partition.num_evicted
+        return (
+            self.index_type == "ivf"
+            and num_entries >= self.IVF_MIN_TRAIN_SIZE
+            and num_entries >= self.IVF_RETRAIN_GROWTH * partition.trained_size
+        )
+
     def save_index(self):
-        """Save the FAISS index and metadata to disk."""
+        """Snapshot the FAISS indexes to disk."""
         try:
-            faiss.write_index(self.index, self.index_file)
-            with open(self.metadata_file, "wb") as f:
-                pickle.dump(self.metadata, f)
-            logger.debug(f"Saved FAISS index with {self.index.ntotal} entries")
+            snapshot = {
+                "index_type": self.index_type,
+                "ntotal": len(self.ends),
+                "partitions": {
+                    model_id: (
+                        faiss.serialize_index(partition.index),
+                        partition.entries.tobytes(),
+                        partition.trained_size,
+                    )
+                    for model_id, partition in self.partitions.items()
+                },
+            }
+            with open(self.index_file + ".tmp", "wb") as f:
+                pickle.dump(snapshot, f)
+            os.replace(self.index_file + ".tmp", self.index_file)
+            self.snapshot_size = len(self.ends)
+            logger.debug(f"Saved FAISS indexes with {self.num_live} entries")
         except Exception as e:
             logger.error(f"Error saving FAISS index: {str(e)}")
 
+    def _read_metadata(self, entry: int) -> Dict[str, Any]:
+        start = self.ends[entry - 1] if entry > 0 else 0
+        end = self.ends[entry]
+        return json.loads(os.pread(self.metadata_fd, end - start, start))
+
+    def _is_expired(self, entry: int, now: float) -> bool:
+        return self.ttl > 0 and now - self.created[entry] > self.ttl
+
     def search(
         self, embedding: np.ndarray, model: str, similarity_threshold: float
     ) -> Optional[Dict[str, Any]]:
@@ -82,20 +439,33 @@ class FAISSAdapter(VectorDBAdapterBase):
         Returns:
             A dictionary containing the matched data or None if no match is found
         """
-        if self.index.ntotal == 0:
+        model_id = self.model_ids.get(model)
+        partition = self.partitions.get(model_id)
+        if partition is None or partition.index.ntotal == 0:
             return None
 
-        embedding = embedding.reshape(1, -1)
-        distances, indices = self.index.search(embedding, 1)
+        embedding = embedding.reshape(1, -1).astype(np.float32)
+        k = min(self.SEARCH_K, partition.index.ntotal)
+        distances, positions = partition.index.search(embedding, k)
 
-        if indices[0][0] != -1 and distances[0][0] >= similarity_threshold:
-            metadata = self.metadata[indices[0][0]]
-            if metadata["model"] == model:
-                return {
-                    "response_messages": metadata["response_messages"],
-                    "similarity_score": float(distances[0][0]),
-                    "usage": metadata["usage"],
-                }
+        # A lookup only records the usage of its hit: the expired entries it
+        # skips are evicted by the next sweep of a store, which also rebuilds
+        # and compacts the indexes
+        now = time.time()
+        for distance, position in zip(distances[0], positions[0]):
+            if position == -1 or distance < similarity_threshold:
+                break
+            entry = partition.entries[position]
+            if not self.alive[entry] or self._is_expired(entry, now):
+                continue
+            self.last_access[entry] = now
+            self.hits[entry] += 1
+            metadata = self._read_metadata(entry)
+            return {
+                "response_messages": metadata["response_messages"],
+                "similarity_score": float(distance),
+                "usage": metadata["usage"],
+            }
         return None
 
     def store(
@@ -116,19 +486,167 @@ class FAISSAdapter(VectorDBAdapterBase):
             model: The model name
             usage: The token usage information
         """
-        embedding = embedding.reshape(1, -1)
-        self.index.add(embedding)
-
-        self.metadata.append(
-            {
-                "request_messages": request_messages,
-                "response_messages": response_messages,
-                "model": model,
-                "usage": usage,
-            }
+        embedding = embedding.reshape(1, -1).astype(np.float32)
+        if model not in self.model_ids:
+            self.model_ids[model] = len(self.models)
+            self.models.append(model)
+            with open(self.models_file + ".tmp", "w") as f:
+                json.dump(self.models, f)
+            os.replace(self.models_file + ".tmp", self.models_file)
+        model_id = self.model_ids[model]
+        line = (
+            json.dumps(
+                {
+                    "request_messages": request_messages,
+                    "response_messages": response_messages,
+                    "model": model,
+                    "usage": usage,
+                }
+            )
+            + "\n"
+        ).encode()
+        end = (self.ends[-1] if self.ends else 0) + len(line)
+        now = time.time()
+        record = np.array([(end, model_id, now)], dtype=ENTRY_DTYPE)
+        # The embedding is written last, it commits the entry
+        self.metadata_fp.write(line)
+        self.metadata_fp.flush()
+        self.entries_fp.write(record.tobytes())
+        self.entries_fp.flush()
+        self.embeddings_fp.write(embedding.tobytes())
+        self.embeddings_fp.flush()
+
+        entry = len(self.ends)
+        self.ends.append(end)
+        self.entry_models.append(model_id)
+        self.created.append(now)
+        self.last_access.append(now)
+        self.hits.append(0)
+        self.alive.append(1)
+        self.model_sizes[model_id] = self.model_sizes.get(model_id, 0) + 1
+        self.num_live += 1
+        self._add_to_partition(entry, embedding)
+
+        if now - self.last_expiry_sweep >= self.EXPIRY_SWEEP_INTERVAL:
+            self._evict_expired()
+        if self.max_entries and self.num_live > self.max_entries:
+            self._evict_least_used()
+        partition = self.partitions.get(model_id)
+        if partition is not None and self._needs_rebuild(partition):
+            self._rebuild_partition(model_id)
+            self.save_index()
+        elif len(self.ends) - self.snapshot_size >= self.snapshot_interval:
+            self.save_index()
+        logger.debug(f"Stored new entry in FAISS index, total entries: {self.num_live}")
+
+    def _evict(self, entry: int, reason: str):
+        self.alive[entry] = 0
+        self.evictions_fp.write(array("Q", [entry]).tobytes())
+        self.evictions_fp.flush()
+        model_id = self.entry_models[entry]
+        self.model_sizes[model_id] -= 1
+        self.num_live -= 1
+        self.partitions[model_id].num_evicted += 1
+        if self.on_evict is not None:
+            self.on_evict(self.models[model_id], reason)
+
+    def _evict_expired(self):
+        self.last_expiry_sweep = time.time()
+        if self.ttl <= 0 or not self.num_live:
+            return
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        created = np.array(self.created, dtype=np.float64)
+        expired = np.flatnonzero(alive & (created < self.last_expiry_sweep - self.ttl))
+        for entry in expired.tolist():
+            self._evict(entry, "expired")
+        if len(expired):
+            logger.info(f"Evicted {len(expired)} expired semantic cache entries")
+            self._maintain()
+
+    def _evict_least_used(self):
+        """Evict a batch of the least recently or least frequently used entries."""
+        count = self.num_live - self.max_entries
+        count += max(1, int(self.max_entries * self.EVICTION_BATCH_RATIO))
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        candidates = np.flatnonzero(alive)
+        last_access = np.array(self.last_access, dtype=np.float64)[candidates]
+        if self.eviction_policy == "lfu":
+            hits = np.array(self.hits, dtype=np.uint32)[candidates]
+            order = np.lexsort((last_access, hits))
+        else:
+            order = np.argsort(last_access, kind="stable")
+        for entry in candidates[order[:count]].tolist():
+            self._evict(entry, "capacity")
+        self._maintain()
+
+    def _maintain(self):
+        """Rebuild the indexes and compact the files holding many evicted entries."""
+        num_evicted = len(self.ends) - self.num_live
+        if num_evicted >= max(self.COMPACTION_MIN_EVICTED, self.num_live):
+            self._compact()
+            return
+        rebuilt = False
+        for model_id, partition in list(self.partitions.items()):
+            if self._needs_rebuild(partition):
+                self._rebuild_partition(model_id)
+                rebuilt = True
+        if rebuilt:
+            self.save_index()
+
+    def _compact(self):
+        """Rewrite the cache files with the live entries only."""
+        entries = [entry for entry in range(len(self.ends)) if self.alive[entry]]
+        logger.info(
+            f"Compacting the semantic cache files from {len(self.ends)} to "
+            f"{len(entries)} entries"
         )
+        # The snapshot refers to the entries before compaction
+        if os.path.exists(self.index_file):
+            os.remove(self.index_file)
+        embeddings = self._embeddings()
+        records = np.empty(len(entries), dtype=ENTRY_DTYPE)
+        end = 0
+        with (
+            open(self.metadata_file + ".tmp", "wb") as metadata_fp,
+            open(self.embeddings_file + ".tmp", "wb") as embeddings_fp,
+        ):
+            for i, entry in enumerate(entries):
+                start = self.ends[entry - 1] if entry > 0 else 0
+                line = os.pread(self.metadata_fd, self.ends[entry] - start, start)
+                metadata_fp.write(line)
+                end += len(line)
+                records[i] = (end, self.entry_models[entry], self.created[entry])
+                embeddings_fp.write(np.array(embeddings[entry]).tobytes())
+        records.tofile(self.entries_file + ".tmp")
+        del embeddings
+
+        self._close_files()
+        # From here, a crash is recovered by finishing the compaction on load
+        open(self.compaction_file, "w").close()
+        self._finish_compaction()
+        self._open_files()
 
+        self.ends = array("Q", records["end"].tolist())
+        self.entry_models = array("I", records["model"].tolist())
+        self.created = array("d", records["created"].tolist())
+        self.last_access = array("d", [self.last_access[entry] for entry in entries])
+        self.hits = array("I", [self.hits[entry] for entry in entries])
+        self.alive = bytearray(b"\x01" * len(entries))
+        self._rebuild_partitions()
         self.save_index()
-        logger.debug(
-            f"Stored new entry in FAISS index, total entries: {self.index.ntotal}"
-        )
+
+    def _finish_compaction(self):
+        if not os.path.exists(self.compaction_file):
+            return
+        for path in (self.embeddings_file, self.metadata_file, self.entries_file):
+            if os.path.exists(path + ".tmp"):
+                os.replace(path + ".tmp", path)
+        if os.path.exists(self.evictions_file):
+            os.remove(self.evictions_file)
+        os.remove(self.compaction_file)
+
+    def close(self):
+        """Snapshot the FAISS indexes and close the cache files."""
+        if len(self.ends) != self.snapshot_size:
+            self.save_index()
+        self._close_files()
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """
+    Computes embeddings on a thread pool, off the event loop.
+
+    The texts embedded concurrently within a small batching window are encoded
+    together by a single call to the encoder, which amortizes its per-call
+    overhead across the in-flight cache lookups and stores.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        batch_window: float = 0.005,
+        num_workers: int = 1,
+    ):
+        """
+        Initialize the embedding service.
+
+        Args:
+            encode: Encodes a list of texts into a (len(texts), dim) array
+            max_batch_size: The maximum number of texts encoded by one call
+            batch_window: The time in seconds to wait for other texts to batch
+                with the first one
+            num_workers: The number of threads running the encoder
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="semantic-cache-embedding"
+        )
+        self.pending: List[Tuple[str, asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batch_tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Compute the embedding of a text, batched with the concurrent ones.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            The embedding vector of the text
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((text, future))
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Encode the pending texts as one batch."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._encode_batch(batch))
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.encode, texts
+            )
+        except Exception as e:
+            logger.error(f"Failed to embed a batch of {len(texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        logger.debug(f"Embedded a batch of {len(texts)} texts")
+        for (_, future), embedding in zip(batch, embeddings):
+            # The caller may have been cancelled while the batch was encoded
+            if not future.done():
+                future.set_result(embedding)
+
+    def close(self) -> None:
+        """Cancel the pending embeddings and stop the worker threads."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        for _, future in self.pending:
+            future.cancel()
+        self.pending = []
+        self.executor.shutdown(wait=False, cancel_futures=True)
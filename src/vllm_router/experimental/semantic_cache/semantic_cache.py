@@ -1,6 +1,9 @@
+import asyncio
+import functools
 import logging
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 import numpy as np
@@ -9,6 +12,9 @@ from sentence_transformers import SentenceTransformer
 from vllm_router.experimental.semantic_cache.db_adapters import (
     FAISSAdapter,
 )
+from vllm_router.experimental.semantic_cache.embedding_service import (
+    EmbeddingService,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +32,17 @@ class SemanticCache:
         embedding_model: str = "all-MiniLM-L6-v2",
         cache_dir: str = None,
         default_similarity_threshold: float = 0.95,
+        embedding_batch_size: int = 32,
+        embedding_batch_window: float = 0.005,
+        embedding_workers: int = 1,
+        index_type: str = "flat",
+        snapshot_interval: int = 1000,
+        ttl: float = 0,
+        max_entries: int = 0,
+        eviction_policy: str = "lru",
+        streaming: bool = False,
+        stream_chunk_size: int = 16,
+        stream_interval: float = 0.0,
     ):
         """
         Initialize the semantic cache.
@@ -34,20 +51,64 @@ class SemanticCache:
             embedding_model: The name of the sentence transformer model to use for embeddings
             cache_dir: The directory to store cache files in
             default_similarity_threshold: The default similarity threshold to use for cache hits
+            embedding_batch_size: The maximum number of concurrent lookups and stores
+                embedded by one encode call
+            embedding_batch_window: The time in seconds to wait for concurrent lookups
+                and stores to embed in the same batch
+            embedding_workers: The number of threads computing embeddings
+            index_type: The FAISS index type, "flat" for an exact search, "ivf" or
+                "hnsw" for an approximate search
+            snapshot_interval: The number of stores between two snapshots of the
+                FAISS index
+            ttl: The time in seconds after which an entry expires, 0 to never expire
+            max_entries: The maximum number of entries, 0 for no limit
+            eviction_policy: "lru" or "lfu", the entries evicted when the cache is full
+            streaming: Whether to cache the streamed responses and serve the
+                streaming requests, as SSE events
+            stream_chunk_size: The number of characters of a cached response
+                sent by each SSE event
+            stream_interval: The time in seconds between the SSE events of a
+                cached response
         """
         self.embedding_model = SentenceTransformer(embedding_model)
         embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
 
+        # Embeddings of the async lookups and stores, batched off the event loop
+        self.embedding_service = EmbeddingService(
+            self._encode,
+            max_batch_size=embedding_batch_size,
+            batch_window=embedding_batch_window,
+            num_workers=embedding_workers,
+        )
+        # A single thread serializes the vector database operations
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="semantic-cache-db"
+        )
+
         # Create cache directory if it doesn't exist
         if cache_dir:
             os.makedirs(cache_dir, exist_ok=True)
 
         # Initialize the vector database
-        self.db = FAISSAdapter(dim=embedding_dim, cache_dir=cache_dir)
+        self.db = FAISSAdapter(
+            dim=embedding_dim,
+            cache_dir=cache_dir,
+            index_type=index_type,
+            snapshot_interval=snapshot_interval,
+            ttl=ttl,
+            max_entries=max_entries,
+            eviction_policy=eviction_policy,
+            on_evict=self._on_evict,
+        )
 
         # Default similarity threshold
         self.default_similarity_threshold = default_similarity_threshold
 
+        # Streamed responses and pacing of the cache hits streamed back
+        self.streaming = streaming
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_interval = stream_interval
+
         # In-memory storage for pending requests
         self.pending_searches: Dict[str, Dict[str, Any]] = {}
         self.pending_stores: Dict[str, Dict[str, Any]] = {}
@@ -57,6 +118,25 @@ class SemanticCache:
             f"(dim={embedding_dim}) and threshold {default_similarity_threshold}"
         )
 
+    def _on_evict(self, model: str, reason: str):
+        # Update the eviction and cache size metrics if available
+        try:
+            from vllm_router.experimental.semantic_cache_integration import (
+                semantic_cache_model_evictions,
+                semantic_cache_model_size,
+                semantic_cache_size,
+            )
+            from vllm_router.services.metrics_service import model_label
+
+            label = model_label(model)
+            semantic_cache_model_evictions.labels(model=label, reason=reason).inc()
+            semantic_cache_model_size.labels(model=label).set(
+                self.db.num_model_entries(model)
+            )
+            semantic_cache_size.labels(server="router").set(self.db.num_entries)
+        except ImportError:
+            pass
+
     def get_embedding(self, messages: List[Dict[str, str]]) -> np.ndarray:
         """
         Generate an embedding for a list of messages.
@@ -67,12 +147,33 @@ class SemanticCache:
         Returns:
             The embedding vector for the messages
         """
+        embedding = self.embedding_model.encode(
+            self._messages_to_text(messages), convert_to_numpy=True
+        )
+        return embedding.astype(np.float32)
+
+    @staticmethod
+    def _messages_to_text(messages: List[Dict[str, str]]) -> str:
         # Concatenate all message content with role prefixes
-        text = " ".join(
+        return " ".join(
             [f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in messages]
         )
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
-        return embedding.astype(np.float32)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.embedding_model.encode(
+            texts, batch_size=len(texts), convert_to_numpy=True
+        )
+        return embeddings.astype(np.float32)
+
+    async def _run_db(self, func, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.db_executor, functools.partial(func, **kwargs)
+        )
+
+    def _call_db(self, func, **kwargs):
+        # The blocking paths go through the database thread as well, so they
+        # never run concurrently with the async lookups and stores
+        return self.db_executor.submit(functools.partial(func, **kwargs)).result()
 
     def search(
         self,
@@ -97,8 +198,52 @@ class SemanticCache:
 
         embedding = self.get_embedding(messages)
 
-        result = self.db.search(
-            embedding=embedding, model=model, similarity_threshold=similarity_threshold
+        result = self._call_db(
+            self.db.search,
+            embedding=embedding,
+            model=model,
+            similarity_threshold=similarity_threshold,
+        )
+
+        if result:
+            logger.info(
+                f"Cache hit for model {model} with similarity score: {result['similarity_score']}"
+            )
+            return result
+
+        logger.info(f"Cache miss for model {model}")
+        return None
+
+    async def search_async(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        similarity_threshold: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Search the cache for a similar request without blocking the event loop.
+
+        The embedding is computed with the ones of the concurrent lookups and
+        stores, and the search runs on the database thread.
+
+        Args:
+            messages: The messages to search for
+            model: The model name to filter by
+            similarity_threshold: The minimum similarity score to consider a match
+                                 (defaults to self.default_similarity_threshold)
+
+        Returns:
+            A dictionary containing the cached response or None if no match is found
+        """
+        if similarity_threshold is None:
+            similarity_threshold = self.default_similarity_threshold
+
+        embedding = await self.embedding_service.embed(self._messages_to_text(messages))
+        result = await self._run_db(
+            self.db.search,
+            embedding=embedding,
+            model=model,
+            similarity_threshold=similarity_threshold,
         )
 
         if result:
@@ -129,7 +274,8 @@ class SemanticCache:
         try:
             embedding = self.get_embedding(request_messages)
 
-            self.db.store(
+            self._call_db(
+                self.db.store,
                 embedding=embedding,
                 request_messages=request_messages,
                 response_messages=response_messages,
@@ -137,7 +283,7 @@ class SemanticCache:
                 usage=usage,
             )
             logger.debug(
-                f"Stored new entry in FAISS index, total entries: {self.db.index.ntotal}"
+                f"Stored new entry in FAISS index, total entries: {self.db.num_entries}"
             )
             logger.info(f"Successfully stored chat for model {model}")
 
@@ -147,9 +293,9 @@ class SemanticCache:
                     semantic_cache_size,
                 )
 
-                semantic_cache_size.labels(server="router").set(self.db.index.ntotal)
+                semantic_cache_size.labels(server="router").set(self.db.num_entries)
                 logger.debug(
-                    f"Updated cache size metric: {self.db.index.ntotal} entries"
+                    f"Updated cache size metric: {self.db.num_entries} entries"
                 )
             except ImportError:
                 logger.debug(
@@ -161,6 +307,49 @@ class SemanticCache:
             logger.error(f"Failed to store chat: {str(e)}")
             return False
 
+    async def store_async(
+        self,
+        request_messages: List[Dict[str, str]],
+        response_messages: List[Dict[str, str]],
+        model: str,
+        usage: Dict[str, int],
+    ) -> bool:
+        """
+        Store a request-response pair in the cache without blocking the event loop.
+
+        Args:
+            request_messages: The messages from the request
+            response_messages: The messages from the response
+            model: The model name
+            usage: The token usage information
+
+        Returns:
+            True if the store operation was successful, False otherwise
+        """
+        try:
+            embedding = await self.embedding_service.embed(
+                self._messages_to_text(request_messages)
+            )
+            await self._run_db(
+                self.db.store,
+                embedding=embedding,
+                request_messages=request_messages,
+                response_messages=response_messages,
+                model=model,
+                usage=usage,
+            )
+            logger.info(f"Successfully stored chat for model {model}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store chat: {str(e)}")
+            return False
+
+    def close(self) -> None:
+        """Stop the embedding and database threads and close the database."""
+        self.embedding_service.close()
+        self.db_executor.shutdown(wait=True)
+        self.db.close()
+
     def initiate_search(
         self,
         messages: List[Dict[str, str]],
@@ -215,7 +404,8 @@ class SemanticCache:
             return None
 
         # Perform search
-        result = self.db.search(
+        result = self._call_db(
+            self.db.search,
             embedding=search_data["embedding"],
             model=search_data["model"],
             similarity_threshold=search_data["similarity_threshold"],
@@ -283,7 +473,8 @@ class SemanticCache:
 
         try:
             # Store in database
-            self.db.store(
+            self._call_db(
+                self.db.store,
                 embedding=store_data["embedding"],
                 request_messages=store_data["request_messages"],
                 response_messages=response_messages,
@@ -298,9 +489,9 @@ class SemanticCache:
                     semantic_cache_size,
                 )
 
-                semantic_cache_size.labels(server="router").set(self.db.index.ntotal)
+                semantic_cache_size.labels(server="router").set(self.db.num_entries)
                 logger.debug(
-                    f"Updated cache size metric: {self.db.index.ntotal} entries"
+                    f"Updated cache size metric: {self.db.num_entries} entries"
                 )
             except ImportError:
                 logger.debug(
@@ -321,6 +512,17 @@ def initialize_semantic_cache(
     embedding_model: str = "all-MiniLM-L6-v2",
     cache_dir: str = None,
     default_similarity_threshold: float = 0.95,
+    embedding_batch_size: int = 32,
+    embedding_batch_window: float = 0.005,
+    embedding_workers: int = 1,
+    index_type: str = "flat",
+    snapshot_interval: int = 1000,
+    ttl: float = 0,
+    max_entries: int = 0,
+    eviction_policy: str = "lru",
+    streaming: bool = False,
+    stream_chunk_size: int = 16,
+    stream_interval: float = 0.0,
 ) -> SemanticCache:
     """
     Initialize the semantic cache singleton.
@@ -329,6 +531,24 @@ def initialize_semantic_cache(
         embedding_model: The name of the sentence transformer model to use for embeddings
         cache_dir: The directory to store cache files in
         default_similarity_threshold: The default similarity threshold to use for cache hits
+        embedding_batch_size: The maximum number of concurrent lookups and stores
+            embedded by one encode call
+        embedding_batch_window: The time in seconds to wait for concurrent lookups
+            and stores to embed in the same batch
+        embedding_workers: The number of threads computing embeddings
+        index_type: The FAISS index type, "flat" for an exact search, "ivf" or
+            "hnsw" for an approximate search
+        snapshot_interval: The number of stores between two snapshots of the
+            FAISS index
+        ttl: The time in seconds after which an entry expires, 0 to never expire
+        max_entries: The maximum number of entries, 0 for no limit
+        eviction_policy: "lru" or "lfu", the entries evicted when the cache is full
+        streaming: Whether to cache the streamed responses and serve the
+            streaming requests, as SSE events
+        stream_chunk_size: The number of characters of a cached response sent
+            by each SSE event
+        stream_interval: The time in seconds between the SSE events of a
+            cached response
 
     Returns:
         The initialized semantic cache instance
@@ -339,6 +559,17 @@ def initialize_semantic_cache(
             embedding_model=embedding_model,
             cache_dir=cache_dir,
             default_similarity_threshold=default_similarity_threshold,
+            embedding_batch_size=embedding_batch_size,
+            embedding_batch_window=embedding_batch_window,
+            embedding_workers=embedding_workers,
+            index_type=index_type,
+            snapshot_interval=snapshot_interval,
+            ttl=ttl,
+            max_entries=max_entries,
+            eviction_policy=eviction_policy,
+            streaming=streaming,
+            stream_chunk_size=stream_chunk_size,
+            stream_interval=stream_interval,
         )
     return _semantic_cache_instance
 
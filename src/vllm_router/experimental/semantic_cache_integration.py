@@ -5,20 +5,26 @@ This module provides functions to integrate the semantic cache with the vLLM rou
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import time
 import uuid
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Union
 
 from fastapi import Request
-from fastapi.responses import JSONResponse
-from prometheus_client import Gauge
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import Counter, Gauge
 
 from vllm_router.experimental.semantic_cache import (
     get_semantic_cache,
     is_semantic_cache_enabled,
 )
+from vllm_router.services.metrics_service import model_label
+from vllm_router.services.request_service.response_cache import (
+    assemble_streamed_response,
+    response_to_sse,
+)
 
 logger = logging.getLogger("uvicorn")
 
@@ -42,6 +48,22 @@ semantic_cache_latency = Gauge(
     "Average latency for semantic cache lookups",
     ["server"],
 )
+semantic_cache_model_hits = Counter(
+    "vllm:semantic_cache_model_hits", "Number of semantic cache hits", ["model"]
+)
+semantic_cache_model_misses = Counter(
+    "vllm:semantic_cache_model_misses", "Number of semantic cache misses", ["model"]
+)
+semantic_cache_model_evictions = Counter(
+    "vllm:semantic_cache_model_evictions",
+    "Number of semantic cache entries evicted, by reason (expired or capacity)",
+    ["model", "reason"],
+)
+semantic_cache_model_size = Gauge(
+    "vllm:semantic_cache_model_size",
+    "Number of entries in the semantic cache",
+    ["model"],
+)
 
 
 def add_semantic_cache_args(parser: argparse.ArgumentParser) -> None:
@@ -69,6 +91,90 @@ def add_semantic_cache_args(parser: argparse.ArgumentParser) -> None:
         default=0.95,
         help="Default similarity threshold for semantic cache hits",
     )
+    parser.add_argument(
+        "--semantic-cache-batch-size",
+        type=int,
+        default=32,
+        help="Maximum number of concurrent semantic cache lookups and stores "
+        "embedded by one call to the embedding model",
+    )
+    parser.add_argument(
+        "--semantic-cache-batch-window",
+        type=float,
+        default=0.005,
+        help="Time in seconds to wait for concurrent semantic cache lookups and "
+        "stores to embed them in the same batch",
+    )
+    parser.add_argument(
+        "--semantic-cache-embedding-workers",
+        type=int,
+        default=1,
+        help="Number of threads computing the semantic cache embeddings, "
+        "off the event loop",
+    )
+    parser.add_argument(
+        "--semantic-cache-index",
+        type=str,
+        default="flat",
+        choices=["flat", "ivf", "hnsw"],
+        help="FAISS index of the semantic cache: flat for an exact search, ivf or "
+        "hnsw for an approximate search that scales to millions of entries",
+    )
+    parser.add_argument(
+        "--semantic-cache-snapshot-interval",
+        type=int,
+        default=1000,
+        help="Number of semantic cache stores between two snapshots of the FAISS "
+        "index. The entries are appended to disk as they are stored",
+    )
+    parser.add_argument(
+        "--semantic-cache-ttl",
+        type=float,
+        default=0,
+        help="Time in seconds after which a semantic cache entry expires, "
+        "0 to never expire",
+    )
+    parser.add_argument(
+        "--semantic-cache-max-entries",
+        type=int,
+        default=0,
+        help="Maximum number of semantic cache entries, 0 for no limit",
+    )
+    parser.add_argument(
+        "--semantic-cache-eviction-policy",
+        type=str,
+        default="lru",
+        choices=["lru", "lfu"],
+        help="Semantic cache entries evicted when it is full: the least recently "
+        "used (lru) or the least frequently used (lfu)",
+    )
+    parser.add_argument(
+        "--semantic-cache-streaming",
+        action="store_true",
+        help="Cache the streamed chat completions, assembled from their SSE "
+        "events, and answer the streaming requests from the semantic cache "
+        "with SSE events",
+    )
+    parser.add_argument(
+        "--semantic-cache-stream-chunk-size",
+        type=int,
+        default=16,
+        help="Number of characters of a cached response sent by each SSE event, "
+        "0 to send it in one event",
+    )
+    parser.add_argument(
+        "--semantic-cache-stream-interval",
+        type=float,
+        default=0.0,
+        help="Time in seconds between the SSE events of a cached response",
+    )
+
+
+async def _paced(events: List[bytes], interval: float) -> AsyncIterator[bytes]:
+    for i, event in enumerate(events):
+        if i and interval > 0:
+            await asyncio.sleep(interval)
+        yield event
 
 
 async def store_in_semantic_cache(
@@ -81,7 +187,7 @@ async def store_in_semantic_cache(
         endpoint: The API endpoint that was called
         method: The HTTP method used
         body: The request body
-        chunk: The response body chunk (may not be complete JSON)
+        chunk: The full response body, SSE events for a streaming request
     """
     # Check if semantic cache is enabled via feature gates
     if not is_semantic_cache_enabled():
@@ -102,20 +208,27 @@ async def store_in_semantic_cache(
                 logger.info("Skipping cache storage due to skip_cache flag")
                 return
 
-            # For streaming responses, we can't reliably cache from chunks
-            # as they may not contain complete JSON
             if request_body.get("stream", False):
-                logger.info("Skipping cache storage for streaming response")
-                return
-
-            # Try to parse the response chunk as JSON, but handle errors gracefully
-            try:
-                response_body = json.loads(chunk)
-            except json.JSONDecodeError:
-                logger.warning(
-                    "Cannot parse response chunk as JSON, skipping cache storage"
-                )
-                return
+                if not semantic_cache.streaming:
+                    logger.info("Skipping cache storage for streaming response")
+                    return
+                # Assemble the message from the deltas of the SSE events
+                response_body = assemble_streamed_response(chunk, endpoint)
+                if response_body is None:
+                    logger.info(
+                        "Streaming response did not finish or is not text, "
+                        "skipping cache storage"
+                    )
+                    return
+            else:
+                # Try to parse the response as JSON, but handle errors gracefully
+                try:
+                    response_body = json.loads(chunk)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        "Cannot parse response chunk as JSON, skipping cache storage"
+                    )
+                    return
 
             # Extract the necessary information
             model = request_body.get("model", "")
@@ -152,7 +265,7 @@ async def store_in_semantic_cache(
 
             # Store in the cache
             logger.info("Storing response in semantic cache")
-            success = semantic_cache.store(
+            success = await semantic_cache.store_async(
                 request_messages=request_messages,
                 response_messages=response_messages,
                 model=model,
@@ -160,16 +273,15 @@ async def store_in_semantic_cache(
             )
 
             # Update the cache size metric if store was successful
-            if (
-                success
-                and hasattr(semantic_cache, "db")
-                and hasattr(semantic_cache.db, "index")
-            ):
+            if success and hasattr(semantic_cache, "db"):
                 semantic_cache_size.labels(server="router").set(
-                    semantic_cache.db.index.ntotal
+                    semantic_cache.db.num_entries
+                )
+                semantic_cache_model_size.labels(model=model_label(model)).set(
+                    semantic_cache.db.num_model_entries(model)
                 )
                 logger.info(
-                    f"Updated cache size metric: {semantic_cache.db.index.ntotal} entries"
+                    f"Updated cache size metric: {semantic_cache.db.num_entries} entries"
                 )
         except Exception as e:
             logger.error(f"Error storing in semantic cache: {str(e)}")
@@ -178,7 +290,9 @@ async def store_in_semantic_cache(
             logger.error(traceback.format_exc())
 
 
-async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
+async def check_semantic_cache(
+    request: Request,
+) -> Optional[Union[JSONResponse, StreamingResponse]]:
     """
     Check if a request can be served from the semantic cache.
 
@@ -186,7 +300,8 @@ async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
         request: The FastAPI request object
 
     Returns:
-        A JSONResponse if the request can be served from cache, None otherwise
+        A JSONResponse if the request can be served from cache, or a
+        StreamingResponse of SSE events for a streaming request, None otherwise
     """
     # Check if semantic cache is enabled via feature gates
     if not is_semantic_cache_enabled():
@@ -216,6 +331,12 @@ async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
             logger.info("Skipping cache check due to skip_cache flag")
             return None
 
+        # Streaming clients expect SSE events rather than a JSON response
+        is_streaming = body.get("stream", False)
+        if is_streaming and not semantic_cache.streaming:
+            logger.info("Skipping cache check for streaming request")
+            return None
+
         if messages:
             # Log request details
             if messages and len(messages) > 0:
@@ -230,7 +351,7 @@ async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
             logger.info("Performing semantic cache lookup")
 
             # Search the cache
-            cache_result = semantic_cache.search(
+            cache_result = await semantic_cache.search_async(
                 messages=messages,
                 model=model,
                 similarity_threshold=similarity_threshold,
@@ -241,9 +362,21 @@ async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
             semantic_cache_latency.labels(server="router").set(cache_latency)
             logger.info(f"Cache lookup took {cache_latency:.4f} seconds")
 
+            if is_streaming and cache_result:
+                # Tool calls are not replayed as SSE events
+                if any(
+                    message.get(key)
+                    for message in cache_result["response_messages"]
+                    for key in message
+                    if key not in ("role", "content")
+                ):
+                    logger.info("Cached response cannot be streamed")
+                    cache_result = None
+
             if cache_result:
                 # Cache hit
                 semantic_cache_hits.labels(server="router").inc()
+                semantic_cache_model_hits.labels(model=model_label(model)).inc()
                 logger.info(
                     f"CACHE HIT with similarity score: {cache_result['similarity_score']:.4f}"
                 )
@@ -286,10 +419,25 @@ async def check_semantic_cache(request: Request) -> Optional[JSONResponse]:
                 logger.info(
                     f"Returning cached response with usage: {cache_result['usage']}"
                 )
-                return JSONResponse(content=response)
+                if not is_streaming:
+                    return JSONResponse(content=response)
+                include_usage = bool(
+                    (body.get("stream_options") or {}).get("include_usage")
+                )
+                events = response_to_sse(
+                    response,
+                    "/v1/chat/completions",
+                    include_usage=include_usage,
+                    chunk_size=semantic_cache.stream_chunk_size,
+                )
+                return StreamingResponse(
+                    _paced(events, semantic_cache.stream_interval),
+                    media_type="text/event-stream",
+                )
             else:
                 # Cache miss
                 semantic_cache_misses.labels(server="router").inc()
+                semantic_cache_model_misses.labels(model=model_label(model)).inc()
                 logger.info("CACHE MISS - will forward request to backend")
 
                 # Update hit ratio
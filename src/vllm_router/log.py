@@ -1,6 +1,13 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
 
 
 def build_format(color):
@@ -41,20 +48,163 @@ class MaxLevelFilter(logging.Filter):
         return record.levelno <= self.max_level
 
 
-def init_logger(name: str, log_level=logging.DEBUG) -> Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+# Records of all the router loggers go through this queue, and are written
+# to stdout/stderr by a background thread so that logging does not block the
+# event loop on slow streams.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener: Optional[QueueListener] = None
+_loggers: List[Logger] = []
+# Level set by set_log_level, also applied to the loggers created afterwards
+_log_level: Optional[str] = None
+
+
+def _start_log_listener() -> None:
+    global _log_listener
+    if _log_listener is not None:
+        return
 
     stdout_stream = logging.StreamHandler(sys.stdout)
-    stdout_stream.setLevel(log_level)
+    stdout_stream.setLevel(logging.DEBUG)
     stdout_stream.setFormatter(CustomFormatter())
     stdout_stream.addFilter(MaxLevelFilter(logging.INFO))
-    logger.addHandler(stdout_stream)
 
     error_stream = logging.StreamHandler()
     error_stream.setLevel(logging.WARNING)
     error_stream.setFormatter(CustomFormatter())
-    logger.addHandler(error_stream)
+
+    _log_listener = QueueListener(
+        _log_queue, stdout_stream, error_stream, respect_handler_level=True
+    )
+    _log_listener.start()
+    # Flush the pending records on exit
+    atexit.register(_log_listener.stop)
+
+
+def _restart_log_listener_after_fork() -> None:
+    # The listener thread does not survive a fork (e.g. of the router
+    # workers), and the queue may have been locked by another thread.
+    global _log_queue, _log_listener
+    _log_queue = queue.SimpleQueue()
+    _log_listener = None
+    _start_log_listener()
+    for logger in _loggers:
+        for handler in logger.handlers:
+            if isinstance(handler, QueueHandler):
+                handler.queue = _log_queue
+
+
+os.register_at_fork(after_in_child=_restart_log_listener_after_fork)
+
+
+def init_logger(name: str, log_level=None) -> Logger:
+    logger = logging.getLogger(name)
+    if log_level is None:
+        log_level = _log_level or logging.DEBUG
+    logger.setLevel(log_level)
+
+    _start_log_listener()
+    logger.addHandler(QueueHandler(_log_queue))
     logger.propagate = False
+    _loggers.append(logger)
 
     return logger
+
+
+def set_log_level(log_level: str) -> None:
+    """
+    Set the level of all the router loggers.
+
+    Args:
+        log_level (str): The name of the level, e.g. "info". "trace" is
+            treated as "debug".
+    """
+    global _log_level
+    if log_level.lower() == "trace":
+        log_level = "debug"
+    _log_level = log_level.upper()
+    for logger in _loggers:
+        logger.setLevel(_log_level)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves the formatting of the records to the listener
+    thread. Only suitable for records without arguments or exception info.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+_access_logger: Optional[Logger] = None
+_access_log_listener: Optional[QueueListener] = None
+_access_log_sample_rate: float = 1.0
+
+
+def initialize_access_logger(
+    log_file: Optional[str] = None, sample_rate: float = 1.0
+) -> None:
+    """
+    Enable the structured access log: one JSON line per request, serialized
+    and written by a background thread.
+
+    Args:
+        log_file (Optional[str]): The file to append the access log to.
+            None writes it to stdout.
+        sample_rate (float): The fraction of the successful requests to
+            log. Failed requests are always logged.
+    """
+    global _access_logger, _access_log_listener, _access_log_sample_rate
+    if log_file:
+        handler = logging.FileHandler(log_file)
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_JSONFormatter())
+    access_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(access_log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    access_logger = logging.getLogger("vllm_router.access")
+    access_logger.setLevel(logging.INFO)
+    access_logger.addHandler(_DeferredQueueHandler(access_log_queue))
+    access_logger.propagate = False
+    _access_log_sample_rate = sample_rate
+    _access_logger = access_logger
+    _access_log_listener = listener
+
+
+def is_access_log_sampled(status: Optional[int]) -> bool:
+    """
+    Decide whether a request with the given response status is logged in the
+    access log.
+
+    Args:
+        status (Optional[int]): The response status, None if no response
+            was received from the serving engine.
+
+    Returns:
+        bool: True if the access log is enabled and the request is sampled
+    """
+    if _access_logger is None:
+        return False
+    if status is None or status >= 400:
+        return True
+    return _access_log_sample_rate >= 1.0 or random.random() < _access_log_sample_rate
+
+
+def log_access(record: dict) -> None:
+    """
+    Write a record to the access log. The caller must first check that the
+    request is sampled with is_access_log_sampled.
+
+    Args:
+        record (dict): The JSON-serializable fields of the record. It must
+            not be modified afterwards, since it is serialized later on.
+    """
+    _access_logger.info(record)
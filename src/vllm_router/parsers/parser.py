@@ -95,8 +95,25 @@ def validate_args(args):
             )
         if args.static_backend_health_checks:
             validate_static_model_types(args.static_model_types)
+        if args.static_backend_health_check_interval <= 0:
+            raise ValueError(
+                "Static backend health check interval must be greater than 0."
+            )
+        if args.static_backend_health_check_timeout <= 0:
+            raise ValueError(
+                "Static backend health check timeout must be greater than 0."
+            )
+        if (
+            args.static_backend_unhealthy_threshold < 1
+            or args.static_backend_healthy_threshold < 1
+        ):
+            raise ValueError("Static backend health thresholds must be at least 1.")
     if args.service_discovery == "k8s" and args.k8s_port is None:
         raise ValueError("K8s port must be provided when using K8s service discovery.")
+    if args.k8s_probe_timeout <= 0:
+        raise ValueError("K8s probe timeout must be greater than 0.")
+    if args.k8s_max_concurrent_probes < 1:
+        raise ValueError("K8s max concurrent probes must be at least 1.")
     if args.routing_logic == "session" and args.session_key is None:
         raise ValueError(
             "Session key must be provided when using session routing logic."
@@ -105,6 +122,62 @@ def validate_args(args):
         raise ValueError("Log stats interval must be greater than 0.")
     if args.engine_stats_interval <= 0:
         raise ValueError("Engine stats interval must be greater than 0.")
+    if args.engine_stats_push and args.engine_stats_push_ttl <= 0:
+        raise ValueError("Engine stats push TTL must be greater than 0.")
+    if not 0.0 <= args.access_log_sample_rate <= 1.0:
+        raise ValueError("Access log sample rate must be between 0.0 and 1.0.")
+    if args.prefix_affinity_store and args.routing_logic != "prefixaware":
+        raise ValueError(
+            "Prefix affinity store requires the prefixaware routing logic."
+        )
+    if args.prefix_affinity_store == "redis" and not args.prefix_affinity_store_url:
+        raise ValueError("Redis prefix affinity store requires a URL.")
+    if args.prefix_affinity_flush_interval <= 0:
+        raise ValueError("Prefix affinity flush interval must be greater than 0.")
+    if args.outlier_consecutive_errors < 1:
+        raise ValueError("Outlier consecutive errors must be at least 1.")
+    if not 0.0 < args.outlier_error_rate <= 1.0:
+        raise ValueError("Outlier error rate must be in (0.0, 1.0].")
+    if args.outlier_ttft_factor <= 1.0:
+        raise ValueError("Outlier TTFT factor must be greater than 1.")
+    if args.outlier_base_ejection_time <= 0:
+        raise ValueError("Outlier base ejection time must be greater than 0.")
+    if not 0.0 <= args.outlier_max_ejection_percent <= 100.0:
+        raise ValueError("Outlier max ejection percent must be between 0 and 100.")
+    if args.backend_connect_timeout is not None and args.backend_connect_timeout <= 0:
+        raise ValueError("Backend connect timeout must be greater than 0.")
+    if args.backend_read_timeout is not None and args.backend_read_timeout <= 0:
+        raise ValueError("Backend read timeout must be greater than 0.")
+    if args.max_request_attempts < 1:
+        raise ValueError("Max request attempts must be at least 1.")
+    if args.failover_cooldown < 0:
+        raise ValueError("Failover cooldown must be at least 0.")
+    if not 0.0 < args.hedging_percentile < 100.0:
+        raise ValueError("Hedging percentile must be between 0 and 100.")
+    if not 0.0 < args.hedging_budget <= 1.0:
+        raise ValueError("Hedging budget must be in (0.0, 1.0].")
+    if args.hedging_min_delay < 0:
+        raise ValueError("Hedging minimum delay must be at least 0.")
+    if args.response_cache_max_bytes < 1:
+        raise ValueError("Response cache max bytes must be at least 1.")
+    if args.response_cache_spill_max_bytes < 0:
+        raise ValueError("Response cache spill max bytes must be at least 0.")
+    if args.workers < 1:
+        raise ValueError("Number of workers must be at least 1.")
+    if args.workers > 1 and args.routing_logic == "kvaware":
+        raise ValueError(
+            "KV-aware routing does not support multiple workers, as every "
+            "worker would start its own LMCache controller."
+        )
+    if args.workers > 1 and args.enable_batch_api:
+        raise ValueError("The batch API does not support multiple workers.")
+    if args.workers > 1 and (args.dynamic_config_yaml or args.dynamic_config_json):
+        raise ValueError(
+            "The dynamic config does not support multiple workers, as the "
+            "service discovery runs in the coordinator of the workers."
+        )
+    if args.metrics_collect_interval <= 0:
+        raise ValueError("Metrics collect interval must be greater than 0.")
     if args.request_stats_window <= 0:
         raise ValueError("Request stats window must be greater than 0.")
     if not (0.0 <= args.sentry_traces_sample_rate <= 1.0):
@@ -123,6 +196,12 @@ def parse_args():
     parser.add_argument(
         "--port", type=int, default=8001, help="The port to run the server on."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of router processes serving on the same port. Default is 1.",
+    )
     parser.add_argument(
         "--service-discovery",
         type=str,
@@ -170,6 +249,30 @@ def parse_args():
         action="store_true",
         help="Enable this flag to make vllm-router check periodically if the models work by sending dummy requests to their endpoints.",
     )
+    parser.add_argument(
+        "--static-backend-health-check-interval",
+        type=float,
+        default=60.0,
+        help="The interval in seconds between two health checks of the static backends. Default is 60.",
+    )
+    parser.add_argument(
+        "--static-backend-health-check-timeout",
+        type=float,
+        default=30.0,
+        help="The timeout in seconds of a health check request. Default is 30.",
+    )
+    parser.add_argument(
+        "--static-backend-unhealthy-threshold",
+        type=int,
+        default=1,
+        help="The number of failed health checks in a row that marks a static backend down. Default is 1.",
+    )
+    parser.add_argument(
+        "--static-backend-healthy-threshold",
+        type=int,
+        default=1,
+        help="The number of successful health checks in a row that marks a static backend up again. Default is 1.",
+    )
     parser.add_argument(
         "--k8s-port",
         type=int,
@@ -188,6 +291,18 @@ def parse_args():
         default="",
         help="The label selector to filter vLLM pods when using K8s service discovery.",
     )
+    parser.add_argument(
+        "--k8s-probe-timeout",
+        type=float,
+        default=5.0,
+        help="The timeout in seconds of the requests probing the models and sleep status of a discovered engine. Default is 5.",
+    )
+    parser.add_argument(
+        "--k8s-max-concurrent-probes",
+        type=int,
+        default=32,
+        help="The maximum number of discovered pods probed at the same time by the pod-ip service discovery. Default is 32.",
+    )
     parser.add_argument(
         "--routing-logic",
         type=str,
@@ -263,12 +378,29 @@ def parse_args():
         default=30,
         help="The interval in seconds to scrape engine statistics.",
     )
+    parser.add_argument(
+        "--engine-stats-push",
+        action="store_true",
+        help="Accept engine statistics pushed by the engines (or their sidecars) to the /engine_stats endpoint, in addition to scraping them.",
+    )
+    parser.add_argument(
+        "--engine-stats-push-ttl",
+        type=float,
+        default=2.0,
+        help="The time in seconds a pushed engine statistics report stays valid before falling back to the scraped statistics.",
+    )
     parser.add_argument(
         "--request-stats-window",
         type=int,
         default=60,
         help="The sliding window in seconds to compute request statistics.",
     )
+    parser.add_argument(
+        "--metrics-collect-interval",
+        type=float,
+        default=1.0,
+        help="The interval in seconds to refresh the router metrics exposed on /metrics.",
+    )
     parser.add_argument(
         "--log-stats", action="store_true", help="Log statistics periodically."
     )
@@ -317,6 +449,24 @@ def parse_args():
         help="Comma-separated list of feature gates (e.g., 'SemanticCache=true')",
     )
 
+    parser.add_argument(
+        "--access-log",
+        action="store_true",
+        help="Write a structured (JSON lines) access log with one record per proxied request.",
+    )
+    parser.add_argument(
+        "--access-log-file",
+        type=str,
+        default=None,
+        help="The file to append the access log to. Default is stdout.",
+    )
+    parser.add_argument(
+        "--access-log-sample-rate",
+        type=float,
+        default=1.0,
+        help="The fraction of successful requests written to the access log. Failed requests are always logged. Default is 1.0.",
+    )
+
     # Add log level argument
     parser.add_argument(
         "--log-level",
@@ -360,6 +510,23 @@ def parse_args():
         help="The model labels of decode backends, separated by commas. E.g., model1,model2",
     )
 
+    parser.add_argument(
+        "--pd-pipelined-handoff",
+        action="store_true",
+        help="With the disaggregated_prefill routing logic, place the decode "
+        "of a request and connect to its decoder while the prefill runs, and "
+        "send the decode request as soon as the prefill ends.",
+    )
+
+    parser.add_argument(
+        "--pd-prefix-aware-prefill",
+        action="store_true",
+        help="With the disaggregated_prefill routing logic, send the prefill "
+        "of a request preferably to a prefiller that prefilled the same "
+        "prompt prefix, as long as its pending prefill tokens do not outweigh "
+        "the reused ones.",
+    )
+
     parser.add_argument(
         "--kv-aware-threshold",
         type=int,
@@ -367,6 +534,132 @@ def parse_args():
         help="The threshold for kv-aware routing.",
     )
 
+    parser.add_argument(
+        "--prefix-affinity-store",
+        type=str,
+        default=None,
+        choices=["local", "redis"],
+        help="Share the prefix affinity of the prefix-aware routing between router replicas through this store.",
+    )
+    parser.add_argument(
+        "--prefix-affinity-store-url",
+        type=str,
+        default=None,
+        help="The URL of the prefix affinity store, e.g. redis://redis:6379/0.",
+    )
+    parser.add_argument(
+        "--prefix-affinity-flush-interval",
+        type=float,
+        default=0.05,
+        help="The maximum time in seconds before a prefix insertion is published to the other replicas. Default is 0.05.",
+    )
+
+    parser.add_argument(
+        "--outlier-detection",
+        action="store_true",
+        help="Eject from routing the engines that fail requests or whose TTFT is far above the one of the other engines.",
+    )
+    parser.add_argument(
+        "--outlier-consecutive-errors",
+        type=int,
+        default=5,
+        help="The number of requests failed in a row that ejects an engine. Default is 5.",
+    )
+    parser.add_argument(
+        "--outlier-error-rate",
+        type=float,
+        default=0.5,
+        help="The error rate over the request stats window that ejects an engine. Default is 0.5.",
+    )
+    parser.add_argument(
+        "--outlier-ttft-factor",
+        type=float,
+        default=3.0,
+        help="An engine whose average TTFT is above this factor times the median TTFT of the other engines serving the same models is ejected. Default is 3.",
+    )
+    parser.add_argument(
+        "--outlier-base-ejection-time",
+        type=float,
+        default=30.0,
+        help="The time in seconds of a first ejection, doubled on each consecutive ejection up to 300 seconds. Default is 30.",
+    )
+    parser.add_argument(
+        "--outlier-max-ejection-percent",
+        type=float,
+        default=50.0,
+        help="The maximum percentage of the engines serving the same models ejected at once. Default is 50.",
+    )
+    parser.add_argument(
+        "--backend-connect-timeout",
+        type=float,
+        default=10.0,
+        help="The maximum time in seconds to open a connection to an engine. A request that times out fails, and counts as a failure of the engine for the outlier detection and the failover. Default is 10.",
+    )
+    parser.add_argument(
+        "--backend-read-timeout",
+        type=float,
+        default=None,
+        help="The maximum time in seconds between two reads of an engine response. A request that times out fails, and counts as a failure of the engine. Default is no limit, since a non-streaming request receives nothing until it completes.",
+    )
+    parser.add_argument(
+        "--max-request-attempts",
+        type=int,
+        default=1,
+        help="The maximum number of engines a request is sent to when an engine cannot be reached or answers 502/503 before the response starts. Set it to 2 or more to enable the failover. Default is 1, no failover.",
+    )
+    parser.add_argument(
+        "--failover-cooldown",
+        type=float,
+        default=10.0,
+        help="The time in seconds an engine that failed a request is excluded from routing. Default is 10.",
+    )
+    parser.add_argument(
+        "--request-hedging",
+        action="store_true",
+        help="Send a copy of the requests of the idempotent endpoints (embeddings, score, rerank) to a second engine when the first one is slower than usual, and use the first response.",
+    )
+    parser.add_argument(
+        "--hedging-percentile",
+        type=float,
+        default=95.0,
+        help="The percentile of the recent response times after which a request is hedged. Default is 95.",
+    )
+    parser.add_argument(
+        "--hedging-budget",
+        type=float,
+        default=0.05,
+        help="The maximum fraction of the eligible requests that are hedged. Default is 0.05.",
+    )
+    parser.add_argument(
+        "--hedging-min-delay",
+        type=float,
+        default=0.005,
+        help="The minimum time in seconds before a request is hedged. Default is 0.005.",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="Answer the deterministic chat and text completion requests identical to a previous one from an exact-match cache, before the semantic cache.",
+    )
+    parser.add_argument(
+        "--response-cache-max-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="The maximum size in bytes of the responses cached in memory. Default is 64 MiB.",
+    )
+    parser.add_argument(
+        "--response-cache-spill-dir",
+        type=str,
+        default=None,
+        help="The directory the responses evicted from memory are spilled to. Default is None, the evicted responses are dropped.",
+    )
+    parser.add_argument(
+        "--response-cache-spill-max-bytes",
+        type=int,
+        default=1024 * 1024 * 1024,
+        help="The maximum size in bytes of the responses spilled to disk. Default is 1 GiB.",
+    )
+
     args = parser.parse_args()
     args = load_initial_config_from_config_file_if_required(parser, args)
 
@@ -0,0 +1,304 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Prefix-affinity state shared between router replicas.
+
+Every replica keeps its own HashTrie, so that routing lookups stay local.
+The insertions of each replica are published in batches to a shared store,
+and the insertions published by the other replicas are applied to the local
+trie in the background. The replicas therefore converge to the same
+prefix-to-engine affinity within about one flush interval.
+"""
+
+import abc
+import asyncio
+import enum
+import json
+import threading
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from vllm_router.log import init_logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = init_logger(__name__)
+
+# Applies an insertion (chunk hashes of a request, endpoint) to the local trie
+ApplyUpdate = Callable[[List[int], str], Awaitable[None]]
+
+
+class PrefixAffinityStoreType(str, enum.Enum):
+    LOCAL = "local"
+    REDIS = "redis"
+
+
+class PrefixAffinityStore(abc.ABC):
+    def __init__(self, flush_interval: float = 0.05, max_batch_size: int = 512):
+        """
+        Args:
+            flush_interval (float): The maximum time in seconds an insertion
+                waits before being published.
+            max_batch_size (int): The number of pending insertions that
+                triggers a publication before the flush interval.
+        """
+        self.replica_id = uuid.uuid4().hex
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.pending: List[Tuple[List[int], str]] = []
+        self.apply_update: Optional[ApplyUpdate] = None
+        self.flush_event: Optional[asyncio.Event] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+    async def start(self, apply_update: ApplyUpdate) -> None:
+        """
+        Start publishing the local insertions and applying the remote ones.
+        Must be called from the event loop of the router.
+
+        Args:
+            apply_update (ApplyUpdate): Applies a remote insertion to the
+                local trie, e.g. HashTrie.insert_hashes
+        """
+        self.apply_update = apply_update
+        self.flush_event = asyncio.Event()
+        self.flush_task = asyncio.create_task(self._flush_worker())
+        await self._subscribe()
+
+    def publish(self, chunk_hashes: List[int], endpoint: str) -> None:
+        """
+        Queue a local insertion for publication. Does not block.
+
+        Args:
+            chunk_hashes (List[int]): The chunk hashes of the request
+            endpoint (str): The endpoint the request was routed to
+        """
+        if self.flush_event is None:
+            return
+        self.pending.append((chunk_hashes, endpoint))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush_event.set()
+
+    async def _flush(self) -> None:
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            await self._write_batch(batch)
+        except Exception as e:
+            # The affinity is only a hint, drop the batch rather than
+            # accumulating insertions while the store is unavailable.
+            logger.error(f"Failed to publish {len(batch)} prefix insertions: {e}")
+
+    async def _flush_worker(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_event.clear()
+            await self._flush()
+
+    async def close(self) -> None:
+        """
+        Publish the pending insertions and stop the background tasks.
+        """
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+            await self._flush()
+        await self._unsubscribe()
+
+    @abc.abstractmethod
+    async def _write_batch(self, batch: List[Tuple[List[int], str]]) -> None:
+        """
+        Publish a batch of local insertions to the other replicas.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def _subscribe(self) -> None:
+        """
+        Start applying the insertions published by the other replicas.
+        """
+        raise NotImplementedError
+
+    async def _unsubscribe(self) -> None:
+        pass
+
+
+class LocalPrefixAffinityStore(PrefixAffinityStore):
+    """
+    In-memory stand-in of a shared store: the routers of the current process
+    that use the same namespace exchange their insertions.
+    """
+
+    _channels: Dict[str, List["LocalPrefixAffinityStore"]] = {}
+
+    def __init__(self, namespace: str = "default", **kwargs):
+        super().__init__(**kwargs)
+        self.namespace = namespace
+
+    async def _write_batch(self, batch: List[Tuple[List[int], str]]) -> None:
+        for store in self._channels.get(self.namespace, []):
+            if store is self:
+                continue
+            for chunk_hashes, endpoint in batch:
+                await store.apply_update(chunk_hashes, endpoint)
+
+    async def _subscribe(self) -> None:
+        self._channels.setdefault(self.namespace, []).append(self)
+
+    async def _unsubscribe(self) -> None:
+        subscribers = self._channels.get(self.namespace, [])
+        if self in subscribers:
+            subscribers.remove(self)
+
+
+class RedisPrefixAffinityStore(PrefixAffinityStore):
+    """
+    Shares the insertions through a capped Redis stream (or any server
+    speaking the Redis protocol with streams, e.g. Valkey). Each batch is
+    one stream entry. A replica that starts replays the retained entries to
+    warm up its trie.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str = "vllm_router:prefix_affinity",
+        max_len: int = 10000,
+        **kwargs,
+    ):
+        """
+        Args:
+            url (str): The URL of the Redis server, e.g. redis://host:6379/0
+            key (str): The key of the stream
+            max_len (int): The approximate number of batches retained
+        """
+        if aioredis is None:
+            raise ImportError(
+                "The Redis prefix affinity store requires the redis package, "
+                "install it with `pip install vllm-router[redis]`"
+            )
+        super().__init__(**kwargs)
+        self.client = aioredis.from_url(url)
+        self.key = key
+        self.max_len = max_len
+        self.read_task: Optional[asyncio.Task] = None
+
+    async def _write_batch(self, batch: List[Tuple[List[int], str]]) -> None:
+        await self.client.xadd(
+            self.key,
+            {
+                "replica": self.replica_id,
+                "updates": json.dumps(
+                    [[endpoint, hashes] for hashes, endpoint in batch]
+                ),
+            },
+            maxlen=self.max_len,
+            approximate=True,
+        )
+
+    async def _subscribe(self) -> None:
+        self.read_task = asyncio.create_task(self._read_worker())
+
+    async def _unsubscribe(self) -> None:
+        if self.read_task is not None:
+            self.read_task.cancel()
+            self.read_task = None
+        await self.client.aclose()
+
+    async def _read_worker(self) -> None:
+        last_id = "0-0"
+        while True:
+            try:
+                response = await self.client.xread(
+                    {self.key: last_id}, count=100, block=1000
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to read prefix insertions from Redis: {e}")
+                await asyncio.sleep(1)
+                continue
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    if fields[b"replica"].decode() == self.replica_id:
+                        continue
+                    for endpoint, chunk_hashes in json.loads(fields[b"updates"]):
+                        await self.apply_update(chunk_hashes, endpoint)
+
+
+class WorkerPrefixAffinityStore(PrefixAffinityStore):
+    """
+    Shares the insertions between the workers of a router (see
+    vllm_router.workers) through one multiprocessing queue per worker.
+    """
+
+    def __init__(self, inboxes: List, worker_id: int, **kwargs):
+        """
+        Args:
+            inboxes (List): The queues of the insertions sent to each worker
+            worker_id (int): The index of the current worker
+        """
+        super().__init__(**kwargs)
+        self.inboxes = inboxes
+        self.worker_id = worker_id
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.read_thread: Optional[threading.Thread] = None
+
+    async def _write_batch(self, batch: List[Tuple[List[int], str]]) -> None:
+        for worker_id, inbox in enumerate(self.inboxes):
+            if worker_id != self.worker_id:
+                inbox.put(batch)
+
+    async def _apply_batch(self, batch: List[Tuple[List[int], str]]) -> None:
+        for chunk_hashes, endpoint in batch:
+            await self.apply_update(chunk_hashes, endpoint)
+
+    def _read_worker(self) -> None:
+        inbox = self.inboxes[self.worker_id]
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._apply_batch(batch), self.loop)
+
+    async def _subscribe(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.read_thread = threading.Thread(target=self._read_worker, daemon=True)
+        self.read_thread.start()
+
+    async def _unsubscribe(self) -> None:
+        if self.read_thread is not None:
+            self.inboxes[self.worker_id].put(None)
+            await asyncio.to_thread(self.read_thread.join)
+            self.read_thread = None
+
+
+def initialize_prefix_affinity_store(
+    store_type: PrefixAffinityStoreType,
+    url: Optional[str] = None,
+    flush_interval: float = 0.05,
+) -> PrefixAffinityStore:
+    if store_type == PrefixAffinityStoreType.LOCAL:
+        return LocalPrefixAffinityStore(flush_interval=flush_interval)
+    elif store_type == PrefixAffinityStoreType.REDIS:
+        return RedisPrefixAffinityStore(url, flush_interval=flush_interval)
+    else:
+        raise ValueError(f"Invalid prefix affinity store type {store_type}")
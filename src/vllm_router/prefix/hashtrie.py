@@ -14,7 +14,7 @@
 
 import asyncio
 import logging
-from typing import Generator, Set, Tuple
+from typing import Generator, Iterable, List, Set, Tuple
 
 import xxhash
 
@@ -53,19 +53,33 @@ class HashTrie:
         """
 
         for i in range(0, len(request), self.chunk_size):
-            yield xxhash.xxh64(request[i : i + self.chunk_size]).intdigest()
+            yield xxhash.xxh64(request[i : i + self.chunk_size].encode()).intdigest()
 
-    async def insert(self, request: str, endpoint: str) -> None:
+    async def insert(self, request: str, endpoint: str) -> List[int]:
         """
         Insert the request and endpoint into the trie.
         Args:
             request (str): The request to insert.
             endpoint (str): The endpoint to insert.
+        Returns:
+            List[int]: The chunk hashes of the request.
+        """
+        chunk_hashes = list(self._chunk_and_hash(request))
+        await self.insert_hashes(chunk_hashes, endpoint)
+        return chunk_hashes
+
+    async def insert_hashes(self, chunk_hashes: Iterable[int], endpoint: str) -> None:
+        """
+        Insert the endpoint along the path of already chunked and hashed
+        request, e.g. an insertion made by another router replica.
+        Args:
+            chunk_hashes (Iterable[int]): The chunk hashes of the request.
+            endpoint (str): The endpoint to insert.
         """
         node = self.root
         async with node.lock:
             node.endpoints.add(endpoint)
-        for chunk_hash in self._chunk_and_hash(request):
+        for chunk_hash in chunk_hashes:
             async with node.lock:
                 if chunk_hash not in node.children:
                     node.children[chunk_hash] = TrieNode()
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import json
+import time
 
 from fastapi import APIRouter, BackgroundTasks, Request
 from fastapi.responses import JSONResponse, Response
@@ -20,10 +21,15 @@ from vllm_router.dynamic_config import get_dynamic_config_watcher
 from vllm_router.log import init_logger
 from vllm_router.protocols import ModelCard, ModelList
 from vllm_router.service_discovery import get_service_discovery
+from vllm_router.services.metrics_service import (
+    observe_router_stage,
+    set_router_stage_labels,
+)
 from vllm_router.services.request_service.request import (
     route_general_request,
     route_sleep_wakeup_request,
 )
+from vllm_router.services.request_service.response_cache import check_response_cache
 from vllm_router.stats.engine_stats import get_engine_stats_scraper
 from vllm_router.version import __version__
 
@@ -44,13 +50,30 @@ logger = init_logger(__name__)
 
 @main_router.post("/v1/chat/completions")
 async def route_chat_completion(request: Request, background_tasks: BackgroundTasks):
+    request.state.router_start_time = time.perf_counter()
+    # Identical requests are served before computing any embedding
+    cache_response = await check_response_cache(request, "/v1/chat/completions")
+    if cache_response is not None:
+        logger.debug("Serving response from response cache")
+        return cache_response
+
     if semantic_cache_available:
+        lookup_start_time = time.perf_counter()
         # Check if the request can be served from the semantic cache
         logger.debug("Received chat completion request, checking semantic cache")
         cache_response = await check_semantic_cache(request=request)
+        cache_latency = time.perf_counter() - lookup_start_time
+        observe_router_stage(request, "semantic_cache_lookup", cache_latency)
 
         if cache_response:
             logger.info("Serving response from semantic cache")
+            request_json = await request.json()
+            set_router_stage_labels(
+                request, request_json.get("model"), "semantic_cache"
+            )
+            observe_router_stage(
+                request, "total", time.perf_counter() - request.state.router_start_time
+            )
             return cache_response
 
     logger.debug("No cache hit, forwarding request to backend")
@@ -61,6 +84,11 @@ async def route_chat_completion(request: Request, background_tasks: BackgroundTa
 
 @main_router.post("/v1/completions")
 async def route_completion(request: Request, background_tasks: BackgroundTasks):
+    request.state.router_start_time = time.perf_counter()
+    cache_response = await check_response_cache(request, "/v1/completions")
+    if cache_response is not None:
+        logger.debug("Serving response from response cache")
+        return cache_response
     return await route_general_request(request, "/v1/completions", background_tasks)
 
 
@@ -12,112 +12,140 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import os
 import time
+from typing import Set
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
 
-import psutil
-from fastapi import APIRouter, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Gauge, generate_latest
-
+from vllm_router.log import init_logger
 from vllm_router.service_discovery import get_service_discovery
-from vllm_router.services.metrics_service import (
-    avg_decoding_length,
-    avg_itl,
-    avg_latency,
-    current_qps,
-    gpu_prefix_cache_hit_rate,
-    gpu_prefix_cache_hits_total,
-    gpu_prefix_cache_queries_total,
-    healthy_pods_total,
-    num_decoding_requests,
-    num_prefill_requests,
-    num_requests_running,
-    num_requests_swapped,
-)
-from vllm_router.stats.engine_stats import get_engine_stats_scraper
-from vllm_router.stats.request_stats import get_request_stats_monitor
+from vllm_router.stats.engine_stats import EngineStats, get_engine_stats_scraper
 
 metrics_router = APIRouter()
 
-# Define Gauges for system resource usage
-router_cpu_usage_percent = Gauge(
-    "router_cpu_usage_percent",
-    "CPU usage percent",
-)
-router_memory_usage_percent = Gauge(
-    "router_memory_usage_percent",
-    "Memory usage percent",
-)
-router_disk_usage_percent = Gauge(
-    "router_disk_usage_percent",
-    "Disk usage percent",
-)
+logger = init_logger(__name__)
+
+# Maximum size in bytes of a pushed stats report, i.e. of a line of the body
+MAX_ENGINE_STATS_REPORT_SIZE = 64 * 1024
 
 
 # --- Prometheus Metrics Endpoint ---
 @metrics_router.get("/metrics")
 async def metrics():
-    # Retrieve request stats from the monitor.
     """
     Endpoint to expose Prometheus metrics for the vLLM router.
 
-    This function gathers request statistics, engine metrics, and health status
-    of the service endpoints to update Prometheus gauges. It exports metrics
-    such as queries per second (QPS), average decoding length, number of prefill
-    and decoding requests, average latency, average inter-token latency, number
-    of swapped requests, and the number of healthy pods for each server. The
-    metrics are used to monitor the performance and health of the vLLM router
-    services.
+    The router gauges (system resource usage, queries per second (QPS),
+    average decoding length, number of prefill and decoding requests, average
+    latency, average inter-token latency, number of swapped requests, GPU
+    prefix cache metrics and the number of healthy pods for each server) are
+    refreshed in the background by the RouterMetricsCollector, so this only
+    serializes their current values. The metrics are used to monitor the
+    performance and health of the vLLM router services.
+
+    With multiple router workers, the metrics of all the router processes
+    are aggregated, whichever worker serves the scrape.
 
     Returns:
         Response: A HTTP response containing the latest Prometheus metrics in
         the appropriate content type.
     """
+    # Return all metrics in Prometheus format
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
-    # Collect CPU utilization (short interval)
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    router_cpu_usage_percent.set(cpu_percent)
-
-    # Collect memory utilization
-    memory_percent = psutil.virtual_memory().percent
-    router_memory_usage_percent.set(memory_percent)
-
-    # Collect disk utilization on root filesystem
-    disk_percent = psutil.disk_usage("/").percent
-    router_disk_usage_percent.set(disk_percent)
-
-    # Existing vLLM router request statistics
-    stats = get_request_stats_monitor().get_request_stats(time.time())
-    for server, stat in stats.items():
-        current_qps.labels(server=server).set(stat.qps)
-        avg_decoding_length.labels(server=server).set(stat.avg_decoding_length)
-        num_prefill_requests.labels(server=server).set(stat.in_prefill_requests)
-        num_decoding_requests.labels(server=server).set(stat.in_decoding_requests)
-        num_requests_running.labels(server=server).set(
-            stat.in_prefill_requests + stat.in_decoding_requests
-        )
-        avg_latency.labels(server=server).set(stat.avg_latency)
-        avg_itl.labels(server=server).set(stat.avg_itl)
-        num_requests_swapped.labels(server=server).set(stat.num_swapped_requests)
-
-    # Engine statistics (GPU prefix cache metrics)
-    engine_stats = get_engine_stats_scraper().get_engine_stats()
-    for server, engine_stat in engine_stats.items():
-        gpu_prefix_cache_hit_rate.labels(server=server).set(
-            engine_stat.gpu_prefix_cache_hit_rate
-        )
-        gpu_prefix_cache_hits_total.labels(server=server).set(
-            engine_stat.gpu_prefix_cache_hits_total
-        )
-        gpu_prefix_cache_queries_total.labels(server=server).set(
-            engine_stat.gpu_prefix_cache_queries_total
+
+# --- Pushed engine stats ingestion endpoint ---
+@metrics_router.post("/engine_stats")
+async def push_engine_stats(request: Request):
+    """
+    Endpoint for serving engines (or their sidecars) to push their stats.
+
+    The body is newline-delimited JSON, one report per line, e.g.
+    `{"url": "http://10.0.0.1:8000", "num_queuing_requests": 3,
+    "gpu_cache_usage_perc": 0.5}`. A publisher can either send one report
+    per request or keep a single chunked request open and stream reports
+    through it; every report is applied as soon as its line is received,
+    for the engines known to the service discovery at that time.
+
+    Returns:
+        JSONResponse: The number of accepted reports, or a 4xx error if
+        pushed stats are disabled or a report is invalid or too large.
+    """
+    engine_stats_scraper = get_engine_stats_scraper()
+    if engine_stats_scraper.push_ttl is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Pushed engine stats are not enabled."},
         )
 
-    # Service discovery health status
-    endpoints = get_service_discovery().get_endpoint_info()
-    for ep in endpoints:
-        healthy_pods_total.labels(server=ep.url).set(
-            1 if getattr(ep, "healthy", True) else 0
+    accepted = 0
+    buffer = b""
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > MAX_ENGINE_STATS_REPORT_SIZE:
+                return JSONResponse(
+                    status_code=413,
+                    content={
+                        "error": "Engine stats report exceeds "
+                        f"{MAX_ENGINE_STATS_REPORT_SIZE} bytes.",
+                        "accepted": accepted,
+                    },
+                )
+            if lines:
+                known_urls = _known_engine_urls()
+            for line in lines:
+                accepted += _apply_engine_stats_report(line, known_urls)
+        accepted += _apply_engine_stats_report(buffer, _known_engine_urls())
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400, content={"error": str(e), "accepted": accepted}
         )
+    return JSONResponse(content={"accepted": accepted})
 
-    # Return all metrics in Prometheus format
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def _known_engine_urls() -> Set[str]:
+    """
+    Get the URLs of the engines currently known to the service discovery.
+    """
+    return {ep.url for ep in get_service_discovery().get_endpoint_info()}
+
+
+def _apply_engine_stats_report(line: bytes, known_urls: Set[str]) -> bool:
+    """
+    Apply one pushed stats report.
+
+    Returns:
+        bool: True if the report was applied, False if it was empty or
+        targets an engine unknown to the service discovery.
+
+    Raises:
+        ValueError: if the report is invalid
+    """
+    if not line.strip():
+        return False
+    try:
+        report = json.loads(line)
+        url = report.pop("url")
+        engine_stats = EngineStats.from_dict(report)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid engine stats report: {e!r}") from e
+    if url not in known_urls:
+        logger.debug(f"Ignoring pushed stats for unknown engine {url}")
+        return False
+    get_engine_stats_scraper().on_engine_stats_pushed(url, engine_stats, time.time())
+    return True
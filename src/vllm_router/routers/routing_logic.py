@@ -18,7 +18,7 @@ import enum
 import math
 import random
 import threading
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from fastapi import Request
 
@@ -38,6 +38,7 @@ except ImportError:
 from uhashring import HashRing
 
 from vllm_router.log import init_logger
+from vllm_router.prefix.affinity_store import PrefixAffinityStore
 from vllm_router.service_discovery import EndpointInfo
 from vllm_router.stats.engine_stats import EngineStats
 from vllm_router.stats.request_stats import RequestStats
@@ -54,6 +55,67 @@ class RoutingLogic(str, enum.Enum):
     DISAGGREGATED_PREFILL = "disaggregated_prefill"
 
 
+def _get_prompt(request_json: Dict):
+    """
+    Get the prompt of a completion request, or the concatenated contents of
+    the messages of a chat completion request.
+    """
+    # Handle chat completions
+    if "messages" in request_json:
+        # Get the last message from the messages array
+        messages = request_json["messages"]
+        if messages:
+            # Concatenate all message content
+            prompt_parts = []
+            for message in messages:
+                content = message.get("content", "")
+                if isinstance(content, list):
+                    # Handle multimodal messages
+                    text_content = " ".join(
+                        part.get("text", "")
+                        for part in content
+                        if part.get("type") == "text"
+                    )
+                    prompt_parts.append(text_content)
+                elif content is not None:
+                    prompt_parts.append(content)
+            prompt = "\n".join(prompt_parts)
+        else:
+            prompt = ""
+    else:
+        # Handle regular completions
+        prompt = request_json["prompt"]
+    return prompt
+
+
+# Average number of characters of a token, to estimate the number of tokens
+# of a prompt without tokenizing it
+CHARS_PER_TOKEN = 4
+
+
+def _estimate_tokens(prompt) -> int:
+    if isinstance(prompt, str):
+        return len(prompt) // CHARS_PER_TOKEN
+    if isinstance(prompt, list):
+        # Token IDs, or a batch of prompts
+        if prompt and isinstance(prompt[0], int):
+            return len(prompt)
+        return sum(_estimate_tokens(part) for part in prompt)
+    return 0
+
+
+def estimate_prompt_tokens(request_json: Dict) -> int:
+    """
+    Estimate the number of tokens of the prompt of a request, without
+    tokenizing it.
+    """
+    if "messages" in request_json:
+        prompt = _get_prompt(request_json)
+    else:
+        prompt = request_json.get("prompt", "")
+    return max(1, _estimate_tokens(prompt))
+
+
 class RoutingInterface(metaclass=SingletonABCMeta):
 
     def _qps_routing(
@@ -80,6 +142,43 @@ class RoutingInterface(metaclass=SingletonABCMeta):
                 ret = url
         return ret
 
+    def _get_effective_load(self, url: str, engine_stats: Dict[str, EngineStats]):
+        """
+        Get the optimistic number of requests on an engine, including the
+        ones the router dispatched since its stats were last collected.
+
+        Args:
+            url (str): The engine URL
+            engine_stats (Dict[str, EngineStats]): The engine stats indicating
+                the 'physical' load of each engine
+
+        Returns:
+            int: The effective load of the engine, 0 if it has no stats yet
+        """
+        stats = engine_stats.get(url)
+        return stats.effective_load if stats is not None else 0
+
+    def _least_loaded_routing(
+        self, endpoints: List[EndpointInfo], engine_stats: Dict[str, EngineStats]
+    ) -> str:
+        """
+        Route the request to the engine with the lowest effective load,
+        breaking ties randomly
+
+        Args:
+            endpoints (List[EndpointInfo]): The list of engine URLs
+            engine_stats (Dict[str, EngineStats]): The engine stats indicating
+                the 'physical' load of each engine
+        """
+        loads = {
+            info.url: self._get_effective_load(info.url, engine_stats)
+            for info in endpoints
+        }
+        lowest_load = min(loads.values())
+        return random.choice(
+            [url for url, load in loads.items() if load == lowest_load]
+        )
+
     def _update_hash_ring(self, endpoints: List["EndpointInfo"]):
         """
         Update the hash ring with the current list of endpoints.
@@ -209,8 +308,8 @@ class SessionRouter(RoutingInterface):
         self._update_hash_ring(endpoints)
 
         if session_id is None:
-            # Route based on QPS if no session ID is present
-            url = self._qps_routing(endpoints, request_stats)
+            # Route to the least loaded engine if no session ID is present
+            url = self._least_loaded_routing(endpoints, engine_stats)
         else:
             # Use the hash ring to get the endpoint for the session ID
             url = self.hash_ring.get_node(session_id)
@@ -311,8 +410,8 @@ class KvawareRouter(RoutingInterface):
             self._update_hash_ring(endpoints)
 
             if session_id is None:
-                # Route based on QPS if no session ID is present
-                url = self._qps_routing(endpoints, request_stats)
+                # Route to the least loaded engine if no session ID is present
+                url = self._least_loaded_routing(endpoints, engine_stats)
             else:
                 # Use the hash ring to get the endpoint for the session ID
                 url = self.hash_ring.get_node(session_id)
@@ -344,16 +443,35 @@ class PrefixAwareRouter(RoutingInterface):
     prefix match is found.
 
     In this class, we assume that there is no eviction of prefix cache.
+
+    With an affinity store, the insertions are shared with the other router
+    replicas, so that a prefix keeps going to the same engine whichever
+    replica receives the request.
     """
 
-    def __init__(self: int):
+    def __init__(self, affinity_store: Optional[PrefixAffinityStore] = None):
         if hasattr(self, "_initialized"):
             return
         from vllm_router.prefix.hashtrie import HashTrie
 
         self.hashtrie = HashTrie()
+        self.affinity_store = affinity_store
         self._initialized = True
 
+    async def start_affinity_store(self):
+        """
+        Start sharing the prefix affinity with the other router replicas.
+        """
+        if self.affinity_store is not None:
+            await self.affinity_store.start(self.hashtrie.insert_hashes)
+
+    async def close_affinity_store(self):
+        """
+        Stop sharing the prefix affinity with the other router replicas.
+        """
+        if self.affinity_store is not None:
+            await self.affinity_store.close()
+
     async def route_request(
         self,
         endpoints: List[EndpointInfo],
@@ -379,54 +497,222 @@ class PrefixAwareRouter(RoutingInterface):
             longest prefix match)
         """
 
-        # Handle chat completions
-        if "messages" in request_json:
-            # Get the last message from the messages array
-            messages = request_json["messages"]
-            if messages:
-                # Concatenate all message content
-                prompt_parts = []
-                for message in messages:
-                    content = message.get("content", "")
-                    if isinstance(content, list):
-                        # Handle multimodal messages
-                        text_content = " ".join(
-                            part.get("text", "")
-                            for part in content
-                            if part.get("type") == "text"
-                        )
-                        prompt_parts.append(text_content)
-                    elif content is not None:
-                        prompt_parts.append(content)
-                prompt = "\n".join(prompt_parts)
-            else:
-                prompt = ""
-        else:
-            # Handle regular completions
-            prompt = request_json["prompt"]
+        prompt = _get_prompt(request_json)
 
         available_endpoints = set(endpoint.url for endpoint in endpoints)
         _, matched_endpoint = await self.hashtrie.longest_prefix_match(
             prompt, available_endpoints
         )
 
-        selected_endpoint = random.choice(list(matched_endpoint))
+        selected_endpoint = self._least_loaded_routing(
+            [endpoint for endpoint in endpoints if endpoint.url in matched_endpoint],
+            engine_stats,
+        )
 
-        await self.hashtrie.insert(prompt, selected_endpoint)
+        chunk_hashes = await self.hashtrie.insert(prompt, selected_endpoint)
+        if self.affinity_store is not None:
+            self.affinity_store.publish(chunk_hashes, selected_endpoint)
 
         return selected_endpoint
 
 
 class DisaggregatedPrefillRouter(RoutingInterface):
     """
-    Route the request to the appropriate engine URL by handling prefill and decode operations sequentially.
-    First request goes to prefill endpoint, then second request goes to decode endpoint.
+    Route the requests to a pool of prefill engines and a pool of decode
+    engines, identified by their model labels. The prefill of a request goes
+    to the prefiller with the fewest pending prefill tokens, then its decode
+    goes to the decoder with the most free KV cache.
+
+    With prefix-aware prefill, the prompt tokens a prefiller likely holds
+    in its prefix cache, found as in PrefixAwareRouter, are not counted in
+    the prefill tokens of the request on that prefiller.
     """
 
-    def __init__(self, prefill_model_labels: List[str], decode_model_labels: List[str]):
+    # Decoders whose KV cache usage is within this tolerance of the lowest
+    # one are considered equal, the least loaded of them gets the decode
+    KV_USAGE_TOLERANCE = 0.05
+
+    def __init__(
+        self,
+        prefill_model_labels: List[str],
+        decode_model_labels: List[str],
+        pipelined_handoff: bool = False,
+        prefix_aware_prefill: bool = False,
+    ):
+        """
+        Args:
+            prefill_model_labels (List[str]): The model labels of the
+                prefill engines
+            decode_model_labels (List[str]): The model labels of the decode
+                engines
+            pipelined_handoff (bool): Place the decode of a request and
+                connect to its decoder while the prefill runs, instead of
+                after it
+            prefix_aware_prefill (bool): Send the prefill of a request
+                preferably to a prefiller that prefilled the same prefix
+        """
         self.prefill_model_labels = prefill_model_labels
         self.decode_model_labels = decode_model_labels
-        self.request_cache = {}  # Cache to store prefill results
+        self.pipelined_handoff = pipelined_handoff
+        # Prompt tokens of the prefills sent to each prefiller and not
+        # finished yet
+        self.pending_prefill_tokens: Dict[str, int] = {}
+        self.hashtrie = None
+        if prefix_aware_prefill:
+            from vllm_router.prefix.hashtrie import HashTrie
+
+            self.hashtrie = HashTrie()
+
+    def get_prefillers(self, endpoints: List[EndpointInfo]) -> List[EndpointInfo]:
+        return [e for e in endpoints if e.model_label in self.prefill_model_labels]
+
+    def get_decoders(self, endpoints: List[EndpointInfo]) -> List[EndpointInfo]:
+        return [e for e in endpoints if e.model_label in self.decode_model_labels]
+
+    def _select_prefiller(
+        self,
+        prefillers: List[EndpointInfo],
+        engine_stats: Dict[str, EngineStats],
+        num_tokens: int = 0,
+        cached_tokens: Optional[Dict[str, int]] = None,
+    ) -> str:
+        """
+        Select the prefiller that would have the fewest prefill tokens to
+        process with the request: its pending prefill tokens, plus the
+        prompt tokens not in its prefix cache. Ties are broken by the
+        effective load.
+        """
+        cached_tokens = cached_tokens or {}
+        prefill_tokens = {
+            info.url: self.pending_prefill_tokens.get(info.url, 0)
+            + num_tokens
+            - cached_tokens.get(info.url, 0)
+            for info in prefillers
+        }
+        fewest_tokens = min(prefill_tokens.values())
+        return self._least_loaded_routing(
+            [info for info in prefillers if prefill_tokens[info.url] == fewest_tokens],
+            engine_stats,
+        )
+
+    async def _find_cached_tokens(
+        self, prompt: str, prefillers: List[EndpointInfo], num_tokens: int
+    ) -> Dict[str, int]:
+        """
+        Find the prefillers that prefilled the longest prefix of the prompt.
+
+        Returns:
+            Dict[str, int]: The (estimated) number of prompt tokens in the
+                prefix cache of these prefillers
+        """
+        match_length, matched_urls = await self.hashtrie.longest_prefix_match(
+            prompt, {info.url for info in prefillers}
+        )
+        if match_length == 0:
+            return {}
+        cached = min(num_tokens, match_length // CHARS_PER_TOKEN)
+        return {url: cached for url in matched_urls}
+
+    def _select_decoder(
+        self, decoders: List[EndpointInfo], engine_stats: Dict[str, EngineStats]
+    ) -> str:
+        kv_usage = {
+            info.url: (
+                engine_stats[info.url].gpu_cache_usage_perc
+                if info.url in engine_stats
+                else 0.0
+            )
+            for info in decoders
+        }
+        lowest_usage = min(kv_usage.values())
+        # The KV cache usage is only updated at each scrape, the load of the
+        # engines also counts the requests sent since then
+        return self._least_loaded_routing(
+            [
+                info
+                for info in decoders
+                if kv_usage[info.url] <= lowest_usage + self.KV_USAGE_TOLERANCE
+            ],
+            engine_stats,
+        )
+
+    async def route_prefill(
+        self,
+        endpoints: List[EndpointInfo],
+        engine_stats: Dict[str, EngineStats],
+        request_json: Dict,
+        num_tokens: int,
+    ) -> Optional[str]:
+        """
+        Route the prefill of a request to the prefiller with the fewest
+        prefill tokens to process, and count its tokens as pending on it
+        until on_prefill_finished is called.
+
+        Args:
+            endpoints (List[EndpointInfo]): The list of engine URLs
+            engine_stats (Dict[str, EngineStats]): The engine stats indicating
+                the 'physical' load of each engine
+            request_json (Dict): The request body (needed for finding the
+                longest prefix match)
+            num_tokens (int): The (estimated) number of prompt tokens
+
+        Returns:
+            Optional[str]: The URL of the prefiller, None if there is none
+        """
+        prefillers = self.get_prefillers(endpoints)
+        if not prefillers:
+            return None
+        prompt = None
+        cached_tokens = None
+        if self.hashtrie is not None:
+            if "messages" in request_json:
+                prompt = _get_prompt(request_json)
+            else:
+                prompt = request_json.get("prompt")
+            # Prompts of token IDs are not matched
+            if isinstance(prompt, str) and prompt:
+                cached_tokens = await self._find_cached_tokens(
+                    prompt, prefillers, num_tokens
+                )
+            else:
+                prompt = None
+        url = self._select_prefiller(
+            prefillers, engine_stats, num_tokens, cached_tokens
+        )
+        if prompt is not None:
+            await self.hashtrie.insert(prompt, url)
+        self.pending_prefill_tokens[url] = (
+            self.pending_prefill_tokens.get(url, 0) + num_tokens
+        )
+        return url
+
+    def on_prefill_finished(self, url: str, num_tokens: int):
+        """
+        Remove the tokens of a finished or failed prefill from the pending
+        prefill tokens of its prefiller.
+        """
+        pending = self.pending_prefill_tokens.get(url, 0) - num_tokens
+        if pending > 0:
+            self.pending_prefill_tokens[url] = pending
+        else:
+            self.pending_prefill_tokens.pop(url, None)
+
+    def route_decode(
+        self,
+        endpoints: List[EndpointInfo],
+        engine_stats: Dict[str, EngineStats],
+    ) -> Optional[str]:
+        """
+        Route the decode of a request to the decoder with the most free KV
+        cache, breaking ties by the effective load.
+
+        Returns:
+            Optional[str]: The URL of the decoder, None if there is none
+        """
+        decoders = self.get_decoders(endpoints)
+        if not decoders:
+            return None
+        return self._select_decoder(decoders, engine_stats)
 
     def route_request(
         self,
@@ -437,27 +723,13 @@ class DisaggregatedPrefillRouter(RoutingInterface):
         request_json: Dict,
     ) -> str:
         """
-        Route the request to appropriate endpoints for prefill and decode operations.
-        First request goes to prefill endpoint, then second request goes to decode endpoint.
+        Route a request to the prefiller that would prefill it if it is a
+        prefill request (max_tokens of 1), else to the decoder that would
+        decode it.
         """
-        # Find prefill and decode endpoints
-        is_prefill = request_json.get("max_tokens", 0) == 1
-        if is_prefill:
-            logger.info("Prefill request")
-        else:
-            logger.info("Decode request")
-
-        # Find endpoints with matching model labels
-        prefiller_endpoints = [
-            e for e in endpoints if e.model_label in self.prefill_model_labels
-        ]
-        decoder_endpoints = [
-            e for e in endpoints if e.model_label in self.decode_model_labels
-        ]
-        if is_prefill:
-            return prefiller_endpoints[0].url
-        else:
-            return decoder_endpoints[0].url
+        if request_json.get("max_tokens", 0) == 1:
+            return self._select_prefiller(self.get_prefillers(endpoints), engine_stats)
+        return self._select_decoder(self.get_decoders(endpoints), engine_stats)
 
 
 # Instead of managing a global _global_router, we can define the initialization functions as:
@@ -481,11 +753,14 @@ def initialize_routing_logic(
         return router
     elif routing_logic == RoutingLogic.PREFIXAWARE:
         logger.info("Initializing prefix-aware routing logic")
-        return PrefixAwareRouter()
+        return PrefixAwareRouter(kwargs.get("prefix_affinity_store"))
     elif routing_logic == RoutingLogic.DISAGGREGATED_PREFILL:
         logger.info("Initializing disaggregated prefill routing logic")
         return DisaggregatedPrefillRouter(
-            kwargs.get("prefill_model_labels"), kwargs.get("decode_model_labels")
+            kwargs.get("prefill_model_labels"),
+            kwargs.get("decode_model_labels"),
+            kwargs.get("pd_pipelined_handoff", False),
+            kwargs.get("pd_prefix_aware_prefill", False),
         )
     else:
         raise ValueError(f"Invalid routing logic {routing_logic}")
@@ -14,13 +14,12 @@
 import abc
 import asyncio
 import enum
-import hashlib
 import os
 import threading
 import time
 import uuid
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 import aiohttp
 import requests
@@ -29,6 +28,9 @@ from kubernetes import client, config, watch
 from vllm_router import utils
 from vllm_router.log import init_logger
 
+if TYPE_CHECKING:
+    from vllm_router.workers import CoordinatorLink
+
 logger = init_logger(__name__)
 
 _global_service_discovery: "Optional[ServiceDiscovery]" = None
@@ -37,6 +39,8 @@ _global_service_discovery: "Optional[ServiceDiscovery]" = None
 class ServiceDiscoveryType(enum.Enum):
     STATIC = "static"
     K8S = "k8s"
+    # The engines discovered by the coordinator of the router workers
+    WORKER = "worker"
 
 
 @dataclass
@@ -77,6 +81,19 @@ class ModelInfo:
         }
 
 
+@dataclass(frozen=True)
+class _PodState:
+    """
+    The fields of an engine pod that the routing depends on.
+    """
+
+    ip: Optional[str]
+    ready: bool
+    model_label: Optional[str]
+    sleeping_label: Optional[str]
+    sleep_mode_enabled: bool
+
+
 @dataclass
 class EndpointInfo:
     # Endpoint's url
@@ -215,7 +232,22 @@ class StaticServiceDiscovery(ServiceDiscovery):
         static_backend_health_checks: bool = False,
         prefill_model_labels: List[str] | None = None,
         decode_model_labels: List[str] | None = None,
+        health_check_interval: float = 60.0,
+        health_check_timeout: float = 30.0,
+        health_check_unhealthy_threshold: int = 1,
+        health_check_healthy_threshold: int = 1,
     ):
+        """
+        Args:
+            health_check_interval (float): The time in seconds between two
+                health checks of the backends
+            health_check_timeout (float): The timeout in seconds of a health
+                check request
+            health_check_unhealthy_threshold (int): The number of failed
+                checks in a row that marks a backend down
+            health_check_healthy_threshold (int): The number of successful
+                checks in a row that marks a down backend up again
+        """
         self.app = app
         assert len(urls) == len(models), "URLs and models should have the same length"
         self.urls = urls
@@ -225,47 +257,117 @@ class StaticServiceDiscovery(ServiceDiscovery):
         self.model_types = model_types
         self.engines_id = [str(uuid.uuid4()) for i in range(0, len(urls))]
         self.added_timestamp = int(time.time())
-        self.unhealthy_endpoint_hashes = []
-        if static_backend_health_checks:
-            self.start_health_check_task()
         self.prefill_model_labels = prefill_model_labels
         self.decode_model_labels = decode_model_labels
 
-    def get_unhealthy_endpoint_hashes(self) -> list[str]:
-        unhealthy_endpoints = []
-        try:
-            for url, model, model_type in zip(
-                self.urls, self.models, self.model_types, strict=True
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.health_check_unhealthy_threshold = health_check_unhealthy_threshold
+        self.health_check_healthy_threshold = health_check_healthy_threshold
+        # Health of each backend, and its number of failed or successful
+        # health checks in a row
+        self.backend_healthy = [True] * len(urls)
+        self.failed_checks = [0] * len(urls)
+        self.successful_checks = [0] * len(urls)
+        # The endpoints of the healthy backends, rebuilt when a backend is
+        # marked down or up rather than on each request
+        self.endpoint_infos = self._build_endpoint_infos()
+
+        self.loop = None
+        self.health_check_task = None
+        if static_backend_health_checks:
+            self.start_health_check_task()
+
+    def _on_health_check_result(self, index: int, healthy: bool) -> bool:
+        """
+        Update the health of a backend with the result of a health check.
+
+        Returns:
+            bool: True if the backend was marked down or up
+        """
+        url, model = self.urls[index], self.models[index]
+        if healthy:
+            self.failed_checks[index] = 0
+            self.successful_checks[index] += 1
+            if (
+                not self.backend_healthy[index]
+                and self.successful_checks[index] >= self.health_check_healthy_threshold
             ):
-                if utils.is_model_healthy(url, model, model_type):
-                    logger.debug(f"{model} at {url} is healthy")
-                else:
-                    logger.warning(f"{model} at {url} not healthy!")
-                    unhealthy_endpoints.append(self.get_model_endpoint_hash(url, model))
-        except ValueError:
-            logger.error(
-                "To perform health check, each model has to define a static_model_type and at least one static_backend. "
-                "Skipping health checks for now."
+                logger.info(f"{model} at {url} is healthy again")
+                self.backend_healthy[index] = True
+                return True
+        else:
+            self.successful_checks[index] = 0
+            self.failed_checks[index] += 1
+            if (
+                self.backend_healthy[index]
+                and self.failed_checks[index] >= self.health_check_unhealthy_threshold
+            ):
+                logger.warning(f"{model} at {url} not healthy!")
+                self.backend_healthy[index] = False
+                return True
+        return False
+
+    async def check_backends_health(self, session: aiohttp.ClientSession) -> None:
+        """
+        Check all the backends concurrently, and rebuild the healthy
+        endpoints if a backend was marked down or up.
+
+        Args:
+            session (aiohttp.ClientSession): The session of the health checks
+        """
+        results = await asyncio.gather(
+            *(
+                utils.is_model_healthy(session, url, model, model_type)
+                for url, model, model_type in zip(
+                    self.urls, self.models, self.model_types
+                )
             )
-        return unhealthy_endpoints
+        )
+        changed = False
+        for index, healthy in enumerate(results):
+            changed |= self._on_health_check_result(index, healthy)
+        if changed:
+            self.endpoint_infos = self._build_endpoint_infos()
 
     async def check_model_health(self):
-        while True:
-            try:
-                self.unhealthy_endpoint_hashes = self.get_unhealthy_endpoint_hashes()
-                time.sleep(60)
-            except Exception as e:
-                logger.error(e)
+        timeout = aiohttp.ClientTimeout(total=self.health_check_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                try:
+                    await self.check_backends_health(session)
+                except Exception as e:
+                    logger.error(e)
+                await asyncio.sleep(self.health_check_interval)
 
     def start_health_check_task(self) -> None:
+        if self.model_types is None or len(self.model_types) != len(self.urls):
+            logger.error(
+                "To perform health check, each model has to define a static_model_type and at least one static_backend. "
+                "Skipping health checks for now."
+            )
+            return
         self.loop = asyncio.new_event_loop()
+        self.health_check_task = self.loop.create_task(self.check_model_health())
         self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
         self.thread.start()
-        asyncio.run_coroutine_threadsafe(self.check_model_health(), self.loop)
         logger.info("Health check thread started")
 
-    def get_model_endpoint_hash(self, url: str, model: str) -> str:
-        return hashlib.md5(f"{url}{model}".encode()).hexdigest()
+    async def _stop_health_checks(self) -> None:
+        self.health_check_task.cancel()
+        await asyncio.gather(self.health_check_task, return_exceptions=True)
+
+    def close(self) -> None:
+        """
+        Stop the health checks, if started.
+        """
+        if self.loop is None:
+            return
+        # Let the health checks close their session before stopping the loop
+        asyncio.run_coroutine_threadsafe(self._stop_health_checks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop = None
 
     def _get_model_info(self, model: str) -> Dict[str, ModelInfo]:
         """
@@ -290,20 +392,10 @@ class StaticServiceDiscovery(ServiceDiscovery):
             )
         }
 
-    def get_endpoint_info(self) -> List[EndpointInfo]:
-        """
-        Get the URLs of the serving engines that are available for
-        querying.
-
-        Returns:
-            a list of engine URLs
-        """
+    def _build_endpoint_infos(self) -> List[EndpointInfo]:
         endpoint_infos = []
         for i, (url, model) in enumerate(zip(self.urls, self.models)):
-            if (
-                self.get_model_endpoint_hash(url, model)
-                in self.unhealthy_endpoint_hashes
-            ):
+            if not self.backend_healthy[i]:
                 continue
             model_label = self.model_labels[i] if self.model_labels else "default"
             endpoint_info = EndpointInfo(
@@ -318,30 +410,27 @@ class StaticServiceDiscovery(ServiceDiscovery):
             endpoint_infos.append(endpoint_info)
         return endpoint_infos
 
-    async def initialize_client_sessions(self) -> None:
-        """
-        Initialize aiohttp ClientSession objects for prefill and decode endpoints.
-        This must be called from an async context during app startup.
-        """
-        if (
-            self.prefill_model_labels is not None
-            and self.decode_model_labels is not None
-        ):
-            endpoint_infos = self.get_endpoint_info()
-            for endpoint_info in endpoint_infos:
-                if endpoint_info.model_label in self.prefill_model_labels:
-                    self.app.state.prefill_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
-                elif endpoint_info.model_label in self.decode_model_labels:
-                    self.app.state.decode_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
+    def get_endpoint_info(self) -> List[EndpointInfo]:
+        """
+        Get the URLs of the serving engines that are available for
+        querying.
+
+        Returns:
+            a list of engine URLs
+        """
+        return list(self.endpoint_infos)
 
 
 class K8sPodIPServiceDiscovery(ServiceDiscovery):
+    # Delays in seconds between two probes of a ready pod whose engine does
+    # not serve its models yet, doubled after each probe up to the maximum
+    PROBE_RETRY_DELAY = 1.0
+    MAX_PROBE_RETRY_DELAY = 30.0
+    # Duration in seconds of a watch request, after which the watch is
+    # resumed from the last resource version. Kept short since close()
+    # waits for the running watch request to end
+    WATCH_TIMEOUT = 30
+
     def __init__(
         self,
         app,
@@ -350,19 +439,26 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         label_selector=None,
         prefill_model_labels: List[str] | None = None,
         decode_model_labels: List[str] | None = None,
+        probe_timeout: float = 5.0,
+        max_concurrent_probes: int = 32,
     ):
         """
         Initialize the Kubernetes service discovery module. This module
         assumes all serving engine pods are in the same namespace, listening
         on the same port, and have the same label selector.
 
-        It will start a daemon thread to watch the engine pods and update
-        the url of the available engines.
+        It will start a daemon thread to watch the engine pods, and a daemon
+        thread running the probes of the engines (models and sleep status)
+        concurrently, so that a slow or hung pod does not delay the
+        discovery of the others.
 
         Args:
             namespace: the namespace of the engine pods
             port: the port of the engines
             label_selector: the label selector of the engines
+            probe_timeout: the timeout in seconds of a probe request
+            max_concurrent_probes: the maximum number of engines probed at
+                the same time
         """
         self.app = app
         self.namespace = namespace
@@ -370,6 +466,10 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         self.available_engines: Dict[str, EndpointInfo] = {}
         self.available_engines_lock = threading.Lock()
         self.label_selector = label_selector
+        self.prefill_model_labels = prefill_model_labels
+        self.decode_model_labels = decode_model_labels
+        self.probe_timeout = probe_timeout
+        self.max_concurrent_probes = max_concurrent_probes
 
         # Init kubernetes watcher
         try:
@@ -379,13 +479,25 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
 
         self.k8s_api = client.CoreV1Api()
         self.k8s_watcher = watch.Watch()
+        # Informer-style cache of the watched pods: pod name -> the pod
+        # fields relevant to routing. Only used by the watcher thread.
+        self.pod_cache: Dict[str, _PodState] = {}
+
+        # Start the probe loop. The probe tasks, session and semaphore are
+        # only used from this loop.
+        self.probe_loop = asyncio.new_event_loop()
+        self.probe_tasks: Dict[str, asyncio.Task] = {}
+        self.probe_session: Optional[aiohttp.ClientSession] = None
+        self.probe_semaphore: Optional[asyncio.Semaphore] = None
+        self.probe_thread = threading.Thread(
+            target=self.probe_loop.run_forever, daemon=True
+        )
+        self.probe_thread.start()
 
         # Start watching engines
         self.running = True
         self.watcher_thread = threading.Thread(target=self._watch_engines, daemon=True)
         self.watcher_thread.start()
-        self.prefill_model_labels = prefill_model_labels
-        self.decode_model_labels = decode_model_labels
 
     @staticmethod
     def _check_pod_ready(container_statuses):
@@ -406,7 +518,24 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         """
         return pod.metadata.deletion_timestamp is not None
 
-    def _get_engine_sleep_status(self, pod_ip) -> Optional[bool]:
+    @staticmethod
+    def _is_sleep_mode_enabled(pod) -> bool:
+        """
+        Check if the vllm container of the pod runs with --enable-sleep-mode,
+        from the pod spec of the watch event.
+        """
+        for container in pod.spec.containers or []:
+            if container.name == "vllm":
+                return "--enable-sleep-mode" in (container.command or [])
+        return False
+
+    @staticmethod
+    def _get_probe_headers() -> Optional[Dict[str, str]]:
+        if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
+            return {"Authorization": f"Bearer {VLLM_API_KEY}"}
+        return None
+
+    async def _get_engine_sleep_status(self, pod_ip) -> bool:
         """
         Get the engine sleeping status by querying the engine's
         '/is_sleeping' endpoint.
@@ -419,39 +548,17 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         """
         url = f"http://{pod_ip}:{self.port}/is_sleeping"
         try:
-            headers = None
-            if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
-                logger.info("Using vllm server authentication")
-                headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            sleep = response.json()["is_sleeping"]
-            return sleep
+            async with self.probe_session.get(
+                url, headers=self._get_probe_headers()
+            ) as response:
+                response.raise_for_status()
+                return (await response.json())["is_sleeping"]
         except Exception as e:
             logger.warning(
                 f"Failed to get the sleep status for engine at {url} - sleep status is set to `False`: {e}"
             )
             return False
 
-    def _check_engine_sleep_mode(self, pod_name) -> Optional[bool]:
-        try:
-            enable_sleep_mode = False
-            pod = self.k8s_api.read_namespaced_pod(
-                name=pod_name, namespace=self.namespace
-            )
-            for container in pod.spec.containers:
-                if container.name == "vllm":
-                    for arg in container.command:
-                        if arg == "--enable-sleep-mode":
-                            enable_sleep_mode = True
-                            break
-            return enable_sleep_mode
-        except client.rest.ApiException as e:
-            logger.error(
-                f"Error checking if sleep-mode is enable for pod {pod_name}: {e}"
-            )
-            return False
-
     def add_sleep_label(self, pod_name):
         try:
             pod = self.k8s_api.read_namespaced_pod(
@@ -488,64 +595,32 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         except client.rest.ApiException as e:
             logger.error(f"Error removing sleeping label: {e}")
 
-    def _get_model_names(self, pod_ip) -> List[str]:
+    async def _get_model_info(self, pod_ip) -> Dict[str, ModelInfo]:
         """
-        Get the model names of the serving engine pod by querying the pod's
-        '/v1/models' endpoint.
+        Get the models served by the engine pod by querying the pod's
+        '/v1/models' endpoint once.
 
         Args:
             pod_ip: the IP address of the pod
 
         Returns:
-            List of model names available on the serving engine, including both base models and adapters
+            Dictionary mapping model IDs (base models and adapters) to their
+            ModelInfo objects, empty if the engine could not be queried
         """
         url = f"http://{pod_ip}:{self.port}/v1/models"
         try:
-            headers = None
-            if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
-                logger.info("Using vllm server authentication")
-                headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            models = response.json()["data"]
-
-            # Collect all model names, including both base models and adapters
-            model_names = []
-            for model in models:
-                model_id = model["id"]
-                model_names.append(model_id)
-
-            logger.info(f"Found models on pod {pod_ip}: {model_names}")
-            return model_names
-        except Exception as e:
-            logger.error(f"Failed to get model names from {url}: {e}")
-            return []
-
-    def _get_model_info(self, pod_ip) -> Dict[str, ModelInfo]:
-        """
-        Get detailed model information from the serving engine pod.
-
-        Args:
-            pod_ip: the IP address of the pod
-
-        Returns:
-            Dictionary mapping model IDs to their ModelInfo objects, including parent-child relationships
-        """
-        url = f"http://{pod_ip}:{self.port}/v1/models"
-        try:
-            headers = None
-            if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
-                logger.info("Using vllm server authentication")
-                headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            models = response.json()["data"]
+            async with self.probe_session.get(
+                url, headers=self._get_probe_headers()
+            ) as response:
+                response.raise_for_status()
+                models = (await response.json())["data"]
             # Create a dictionary of model information
             model_info = {}
             for model in models:
                 model_id = model["id"]
                 model_info[model_id] = ModelInfo.from_dict(model)
 
+            logger.info(f"Found models on pod {pod_ip}: {list(model_info)}")
             return model_info
         except Exception as e:
             logger.error(f"Failed to get model info from {url}: {e}")
@@ -565,72 +640,174 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
             return None
         return pod.metadata.labels.get("model")
 
-    def _watch_engines(self):
-        # TODO (ApostaC): remove the hard-coded timeouts
+    def _get_pod_state(self, pod) -> _PodState:
+        is_pod_terminating = self._is_pod_terminating(pod)
+        is_container_ready = self._check_pod_ready(pod.status.container_statuses)
+        # Pod is ready if container is ready and pod is not terminating
+        is_pod_ready = is_container_ready and not is_pod_terminating
+
+        # Record pod status for debugging
+        if is_container_ready and is_pod_terminating:
+            logger.info(
+                f"Pod {pod.metadata.name} has ready containers but is terminating - marking as unavailable"
+            )
+        return _PodState(
+            ip=pod.status.pod_ip,
+            ready=is_pod_ready,
+            model_label=self._get_model_label(pod),
+            sleeping_label=(pod.metadata.labels or {}).get("sleeping"),
+            sleep_mode_enabled=self._is_sleep_mode_enabled(pod),
+        )
+
+    def _dispatch_pod_update(self, pod_name: str, event_type: str, state: _PodState):
+        # The probes run in the probe loop, the watch only dispatches the
+        # events
+        self.probe_loop.call_soon_threadsafe(
+            self._on_engine_update,
+            pod_name,
+            state.ip,
+            event_type,
+            state.ready,
+            state.model_label if state.ready else None,
+            state.ready and state.sleep_mode_enabled,
+        )
+
+    def _on_pod_event(self, event_type: str, pod) -> None:
+        """
+        Update the pod cache with a pod event, and dispatch the pod to the
+        probe loop only if a field relevant to routing changed (IP,
+        readiness, model and sleeping labels, sleep mode), so that status
+        updates and replayed events do not probe the engine again.
+        """
+        pod_name = pod.metadata.name
+        if event_type == "DELETED":
+            state = self.pod_cache.pop(pod_name, None)
+            if state is not None:
+                self._dispatch_pod_update(pod_name, event_type, state)
+            return
+
+        state = self._get_pod_state(pod)
+        if self.pod_cache.get(pod_name) == state:
+            return
+        self.pod_cache[pod_name] = state
+        self._dispatch_pod_update(pod_name, event_type, state)
+
+    def _list_pods(self) -> str:
+        """
+        List the engine pods and resynchronize the pod cache with them.
 
+        Returns:
+            The resource version of the list, to watch the changes from
+        """
+        pods = self.k8s_api.list_namespaced_pod(
+            namespace=self.namespace, label_selector=self.label_selector
+        )
+        listed_names = {pod.metadata.name for pod in pods.items}
+        # Pods deleted while the watch was down
+        for pod_name in list(self.pod_cache):
+            if pod_name not in listed_names:
+                self._dispatch_pod_update(
+                    pod_name, "DELETED", self.pod_cache.pop(pod_name)
+                )
+        for pod in pods.items:
+            event_type = "MODIFIED" if pod.metadata.name in self.pod_cache else "ADDED"
+            self._on_pod_event(event_type, pod)
+        return pods.metadata.resource_version
+
+    def _watch_engines(self):
+        """
+        Keep the pod cache up to date: list the pods, then watch the changes
+        from the resource version of the list. The watch is resumed from the
+        last resource version seen (including bookmarks) when it ends, and
+        the pods are listed again only if that version expired.
+        """
+        resource_version = None
         while self.running:
             try:
+                if resource_version is None:
+                    resource_version = self._list_pods()
                 for event in self.k8s_watcher.stream(
                     self.k8s_api.list_namespaced_pod,
                     namespace=self.namespace,
                     label_selector=self.label_selector,
-                    timeout_seconds=30,
+                    resource_version=resource_version,
+                    allow_watch_bookmarks=True,
+                    timeout_seconds=self.WATCH_TIMEOUT,
                 ):
-                    pod = event["object"]
-                    event_type = event["type"]
-                    pod_name = pod.metadata.name
-                    pod_ip = pod.status.pod_ip
-
-                    # Check if pod is terminating
-                    is_pod_terminating = self._is_pod_terminating(pod)
-                    is_container_ready = self._check_pod_ready(
-                        pod.status.container_statuses
-                    )
-
-                    # Pod is ready if container is ready and pod is not terminating
-                    is_pod_ready = is_container_ready and not is_pod_terminating
-
-                    if is_pod_ready:
-                        model_names = self._get_model_names(pod_ip)
-                        model_label = self._get_model_label(pod)
-                    else:
-                        model_names = []
-                        model_label = None
-
-                    # Record pod status for debugging
-                    if is_container_ready and is_pod_terminating:
-                        logger.info(
-                            f"Pod {pod_name} has ready containers but is terminating - marking as unavailable"
-                        )
-
-                    self._on_engine_update(
-                        pod_name,
-                        pod_ip,
-                        event_type,
-                        is_pod_ready,
-                        model_names,
-                        model_label,
-                    )
+                    if event["type"] != "BOOKMARK":
+                        self._on_pod_event(event["type"], event["object"])
+                    resource_version = self.k8s_watcher.resource_version
+            except client.rest.ApiException as e:
+                if e.status == 410:
+                    logger.info("K8s watch resource version expired, listing pods")
+                    resource_version = None
+                else:
+                    logger.error(f"K8s watcher error: {e}")
+                    time.sleep(0.5)
             except Exception as e:
                 logger.error(f"K8s watcher error: {e}")
                 time.sleep(0.5)
 
-    def _add_engine(
-        self, engine_name: str, engine_ip: str, model_names: List[str], model_label: str
+    async def _probe_engine(
+        self,
+        engine_name: str,
+        engine_ip: str,
+        model_label: Optional[str],
+        sleep_mode_enabled: bool,
     ):
-        logger.info(
-            f"Discovered new serving engine {engine_name} at "
-            f"{engine_ip}, running models: {model_names}"
-        )
+        """
+        Probe a ready pod and add its engine once it serves models. Pods
+        whose engine does not answer yet are probed again with an
+        exponential back-off, until they do or a newer event of the pod
+        cancels the probe.
+        """
+        if self.probe_session is None:
+            self.probe_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.probe_timeout)
+            )
+            self.probe_semaphore = asyncio.Semaphore(self.max_concurrent_probes)
 
-        # Get detailed model information
-        model_info = self._get_model_info(engine_ip)
+        retry_delay = self.PROBE_RETRY_DELAY
+        try:
+            while True:
+                async with self.probe_semaphore:
+                    model_info, sleep_status = await asyncio.gather(
+                        self._get_model_info(engine_ip),
+                        (
+                            self._get_engine_sleep_status(engine_ip)
+                            if sleep_mode_enabled
+                            else asyncio.sleep(0, result=False)
+                        ),
+                    )
+                if model_info:
+                    self._add_engine(
+                        engine_name, engine_ip, model_info, model_label, sleep_status
+                    )
+                    return
+                logger.info(
+                    f"Serving engine {engine_name} at {engine_ip} has no model "
+                    f"yet, probing again in {retry_delay:.1f}s"
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(2 * retry_delay, self.MAX_PROBE_RETRY_DELAY)
+        finally:
+            if self.probe_tasks.get(engine_name) is asyncio.current_task():
+                del self.probe_tasks[engine_name]
 
-        # Check if engine is enabled with sleep mode and set engine sleep status
-        if self._check_engine_sleep_mode(engine_name):
-            sleep_status = self._get_engine_sleep_status(engine_ip)
-        else:
-            sleep_status = False
+    def _add_engine(
+        self,
+        engine_name: str,
+        engine_ip: str,
+        model_info: Dict[str, ModelInfo],
+        model_label: Optional[str],
+        sleep_status: bool,
+    ):
+        model_names = list(model_info)
+        if engine_name not in self.available_engines:
+            logger.info(
+                f"Discovered new serving engine {engine_name} at "
+                f"{engine_ip}, running models: {model_names}"
+            )
 
         with self.available_engines_lock:
             self.available_engines[engine_name] = EndpointInfo(
@@ -645,9 +822,6 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
                 model_info=model_info,
             )
 
-            # Store model information in the endpoint info
-            self.available_engines[engine_name].model_info = model_info
-
     def _delete_engine(self, engine_name: str):
         logger.info(f"Serving engine {engine_name} is deleted")
         with self.available_engines_lock:
@@ -659,40 +833,27 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         engine_ip: Optional[str],
         event: str,
         is_pod_ready: bool,
-        model_names: List[str],
         model_label: Optional[str],
+        sleep_mode_enabled: bool,
     ) -> None:
-        if event == "ADDED":
-            if engine_ip is None:
-                return
-
-            if not is_pod_ready:
-                return
-
-            if not model_names:
-                return
-
-            self._add_engine(engine_name, engine_ip, model_names, model_label)
-
-        elif event == "DELETED":
-            if engine_name not in self.available_engines:
-                return
-
-            self._delete_engine(engine_name)
-
-        elif event == "MODIFIED":
-            if engine_ip is None:
-                return
-
-            if is_pod_ready and model_names:
-                self._add_engine(engine_name, engine_ip, model_names, model_label)
-                return
+        """
+        Apply a pod event, in the probe loop. The latest event of a pod
+        cancels the probe started by the previous one.
+        """
+        probe_task = self.probe_tasks.pop(engine_name, None)
+        if probe_task is not None:
+            probe_task.cancel()
 
-            if (
-                not is_pod_ready or not model_names
-            ) and engine_name in self.available_engines:
+        if event == "DELETED" or engine_ip is None or not is_pod_ready:
+            if engine_name in self.available_engines:
                 self._delete_engine(engine_name)
-                return
+            return
+
+        # ADDED or MODIFIED ready pod. An engine already available stays
+        # routable while it is probed again.
+        self.probe_tasks[engine_name] = self.probe_loop.create_task(
+            self._probe_engine(engine_name, engine_ip, model_label, sleep_mode_enabled)
+        )
 
     def get_endpoint_info(self) -> List[EndpointInfo]:
         """
@@ -712,7 +873,15 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         Returns:
             True if the service discovery module is healthy, False otherwise
         """
-        return self.watcher_thread.is_alive()
+        return self.watcher_thread.is_alive() and self.probe_thread.is_alive()
+
+    async def _stop_probes(self) -> None:
+        probe_tasks = list(self.probe_tasks.values())
+        for probe_task in probe_tasks:
+            probe_task.cancel()
+        await asyncio.gather(*probe_tasks, return_exceptions=True)
+        if self.probe_session is not None:
+            await self.probe_session.close()
 
     def close(self):
         """
@@ -721,28 +890,9 @@ class K8sPodIPServiceDiscovery(ServiceDiscovery):
         self.running = False
         self.k8s_watcher.stop()
         self.watcher_thread.join()
-
-    async def initialize_client_sessions(self) -> None:
-        """
-        Initialize aiohttp ClientSession objects for prefill and decode endpoints.
-        This must be called from an async context during app startup.
-        """
-        if (
-            self.prefill_model_labels is not None
-            and self.decode_model_labels is not None
-        ):
-            endpoint_infos = self.get_endpoint_info()
-            for endpoint_info in endpoint_infos:
-                if endpoint_info.model_label in self.prefill_model_labels:
-                    self.app.state.prefill_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
-                elif endpoint_info.model_label in self.decode_model_labels:
-                    self.app.state.decode_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
+        asyncio.run_coroutine_threadsafe(self._stop_probes(), self.probe_loop).result()
+        self.probe_loop.call_soon_threadsafe(self.probe_loop.stop)
+        self.probe_thread.join()
 
 
 class K8sServiceNameServiceDiscovery(ServiceDiscovery):
@@ -754,6 +904,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
         label_selector=None,
         prefill_model_labels: List[str] | None = None,
         decode_model_labels: List[str] | None = None,
+        probe_timeout: float = 5.0,
     ):
         """
         Initialize the Kubernetes service discovery module. This module
@@ -782,6 +933,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
             namespace: the namespace of the engine services
             port: the port of the engines
             label_selector: the label selector of the engines
+            probe_timeout: the timeout in seconds of a probe request
         """
         self.app = app
         self.namespace = namespace
@@ -789,6 +941,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
         self.available_engines: Dict[str, EndpointInfo] = {}
         self.available_engines_lock = threading.Lock()
         self.label_selector = label_selector
+        self.probe_timeout = probe_timeout
 
         # Init kubernetes watcher
         try:
@@ -833,7 +986,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
             if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
                 logger.info("Using vllm server authentication")
                 headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
+            response = requests.get(url, headers=headers, timeout=self.probe_timeout)
             response.raise_for_status()
             sleep = response.json()["is_sleeping"]
             return sleep
@@ -927,7 +1080,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
             if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
                 logger.info("Using vllm server authentication")
                 headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
+            response = requests.get(url, headers=headers, timeout=self.probe_timeout)
             response.raise_for_status()
             models = response.json()["data"]
 
@@ -959,7 +1112,7 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
             if VLLM_API_KEY := os.getenv("VLLM_API_KEY"):
                 logger.info("Using vllm server authentication")
                 headers = {"Authorization": f"Bearer {VLLM_API_KEY}"}
-            response = requests.get(url, headers=headers)
+            response = requests.get(url, headers=headers, timeout=self.probe_timeout)
             response.raise_for_status()
             models = response.json()["data"]
             # Create a dictionary of model information
@@ -1125,27 +1278,33 @@ class K8sServiceNameServiceDiscovery(ServiceDiscovery):
         self.k8s_watcher.stop()
         self.watcher_thread.join()
 
-    async def initialize_client_sessions(self) -> None:
-        """
-        Initialize aiohttp ClientSession objects for prefill and decode endpoints.
-        This must be called from an async context during app startup.
-        """
-        if (
-            self.prefill_model_labels is not None
-            and self.decode_model_labels is not None
-        ):
-            endpoint_infos = self.get_endpoint_info()
-            for endpoint_info in endpoint_infos:
-                if endpoint_info.model_label in self.prefill_model_labels:
-                    self.app.state.prefill_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
-                elif endpoint_info.model_label in self.decode_model_labels:
-                    self.app.state.decode_client = aiohttp.ClientSession(
-                        base_url=endpoint_info.url,
-                        timeout=aiohttp.ClientTimeout(total=None),
-                    )
+
+class WorkerServiceDiscovery(ServiceDiscovery):
+    """
+    The service discovery of a router worker: the engines are the ones
+    discovered by the coordinator of the workers (see vllm_router.workers).
+    """
+
+    def __init__(self, coordinator: "CoordinatorLink"):
+        self.coordinator = coordinator
+
+    @property
+    def aliases(self) -> Optional[Dict[str, str]]:
+        return self.coordinator.get("aliases")
+
+    def get_endpoint_info(self) -> List[EndpointInfo]:
+        return self.coordinator.get("endpoints", [])
+
+    def get_health(self) -> bool:
+        return self.coordinator.is_fresh() and self.coordinator.get(
+            "service_discovery_health", False
+        )
+
+    def add_sleep_label(self, pod_name):
+        self.coordinator.send("service_discovery", "add_sleep_label", pod_name)
+
+    def remove_sleep_label(self, pod_name):
+        self.coordinator.send("service_discovery", "remove_sleep_label", pod_name)
 
 
 def _create_service_discovery(
@@ -1176,6 +1335,8 @@ def _create_service_discovery(
             return K8sServiceNameServiceDiscovery(*args, **kwargs)
         else:
             return K8sPodIPServiceDiscovery(*args, **kwargs)
+    elif service_discovery_type == ServiceDiscoveryType.WORKER:
+        return WorkerServiceDiscovery(*args, **kwargs)
     else:
         raise ValueError("Invalid service discovery type")
 
@@ -1,47 +1,255 @@
-from prometheus_client import Gauge
+from typing import Optional
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+from vllm_router.service_discovery import get_service_discovery
+
+# Model label of the requests for a model not served by any engine
+UNKNOWN_MODEL = "unknown"
 
 # --- Prometheus Gauges ---
+# With multiple router workers, the engine gauges are set by the coordinator
+# only (see vllm_router.workers), and the response cache of each worker adds
+# to the cache size.
 # Existing metrics
 num_requests_running = Gauge(
-    "vllm:num_requests_running", "Number of running requests", ["server"]
+    "vllm:num_requests_running",
+    "Number of running requests",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 num_requests_waiting = Gauge(
-    "vllm:num_requests_waiting", "Number of waiting requests", ["server"]
+    "vllm:num_requests_waiting",
+    "Number of waiting requests",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 gpu_prefix_cache_hit_rate = Gauge(
     "vllm:gpu_prefix_cache_hit_rate",
     "GPU Prefix Cache Hit Rate",
     ["server"],
+    multiprocess_mode="mostrecent",
 )
 gpu_prefix_cache_hits_total = Gauge(
     "vllm:gpu_prefix_cache_hits_total",
     "Total GPU Prefix Cache Hits",
     ["server"],
+    multiprocess_mode="mostrecent",
 )
 gpu_prefix_cache_queries_total = Gauge(
     "vllm:gpu_prefix_cache_queries_total",
     "Total GPU Prefix Cache Queries",
     ["server"],
+    multiprocess_mode="mostrecent",
+)
+current_qps = Gauge(
+    "vllm:current_qps",
+    "Current Queries Per Second",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
-current_qps = Gauge("vllm:current_qps", "Current Queries Per Second", ["server"])
 avg_decoding_length = Gauge(
-    "vllm:avg_decoding_length", "Average Decoding Length", ["server"]
+    "vllm:avg_decoding_length",
+    "Average Decoding Length",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 num_prefill_requests = Gauge(
-    "vllm:num_prefill_requests", "Number of Prefill Requests", ["server"]
+    "vllm:num_prefill_requests",
+    "Number of Prefill Requests",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 num_decoding_requests = Gauge(
-    "vllm:num_decoding_requests", "Number of Decoding Requests", ["server"]
+    "vllm:num_decoding_requests",
+    "Number of Decoding Requests",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 
 # New metrics per dashboard update
 healthy_pods_total = Gauge(
-    "vllm:healthy_pods_total", "Number of healthy vLLM pods", ["server"]
+    "vllm:healthy_pods_total",
+    "Number of healthy vLLM pods",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
 avg_latency = Gauge(
-    "vllm:avg_latency", "Average end-to-end request latency", ["server"]
+    "vllm:avg_latency",
+    "Average end-to-end request latency",
+    ["server"],
+    multiprocess_mode="mostrecent",
+)
+avg_itl = Gauge(
+    "vllm:avg_itl",
+    "Average Inter-Token Latency",
+    ["server"],
+    multiprocess_mode="mostrecent",
 )
-avg_itl = Gauge("vllm:avg_itl", "Average Inter-Token Latency", ["server"])
 num_requests_swapped = Gauge(
-    "vllm:num_requests_swapped", "Number of swapped requests", ["server"]
+    "vllm:num_requests_swapped",
+    "Number of swapped requests",
+    ["server"],
+    multiprocess_mode="mostrecent",
+)
+engine_ejected = Gauge(
+    "vllm:engine_ejected",
+    "Whether the engine is ejected from routing by the outlier detection",
+    ["server"],
+    multiprocess_mode="mostrecent",
+)
+
+# --- Prometheus Histograms ---
+# Router-side latency of each request handling stage
+router_stage_latency = Histogram(
+    "vllm:router_stage_latency_seconds",
+    "Time spent by the router in each stage of handling a request",
+    ["stage", "model", "routing_logic"],
+    buckets=(
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+    ),  # fmt: skip
+)
+# Time to first token added by the handoff of a disaggregated prefill
+# request from the prefiller to the decoder
+pd_handoff_latency = Histogram(
+    "vllm:pd_handoff_latency_seconds",
+    "Time from the end of the prefill of a request to its first decoded "
+    "chunk, by decoder",
+    ["server"],
+    buckets=(
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+        5.0, 10.0,
+    ),  # fmt: skip
+)
+
+# --- Prometheus Counters ---
+# Ejections of outlier engines from routing
+engine_ejections_total = Counter(
+    "vllm:engine_ejections_total",
+    "Number of ejections of an engine by the outlier detection, by reason",
+    ["server", "reason"],
+)
+# Requests routed again to another engine before the response started
+request_retries_total = Counter(
+    "vllm:request_retries_total",
+    "Number of requests retried on another engine, by failed engine and reason",
+    ["server", "reason"],
+)
+# Disaggregated prefill requests whose client went away
+pd_abandoned_requests_total = Counter(
+    "vllm:pd_abandoned_requests_total",
+    "Number of disaggregated prefill requests whose client disconnected, by "
+    "leg running at the time",
+    ["leg"],
+)
+pd_wasted_tokens_total = Counter(
+    "vllm:pd_wasted_tokens_total",
+    "Number of tokens prefilled or decoded for disaggregated prefill requests "
+    "whose client disconnected, by leg",
+    ["leg"],
+)
+# Request hedging on the idempotent endpoints
+hedging_eligible_requests_total = Counter(
+    "vllm:hedging_eligible_requests_total",
+    "Number of requests that could be hedged",
+    ["endpoint"],
+)
+hedged_requests_total = Counter(
+    "vllm:hedged_requests_total",
+    "Number of requests for which a hedged copy was sent",
+    ["endpoint"],
 )
+hedge_wins_total = Counter(
+    "vllm:hedge_wins_total",
+    "Number of hedged requests answered first by the hedged copy",
+    ["endpoint"],
+)
+# Exact-match response cache
+response_cache_hits_total = Counter(
+    "vllm:response_cache_hits_total",
+    "Number of requests answered from the response cache, by tier",
+    ["tier"],
+)
+response_cache_misses_total = Counter(
+    "vllm:response_cache_misses_total",
+    "Number of requests not found in the response cache",
+)
+response_cache_size_bytes = Gauge(
+    "vllm:response_cache_size_bytes",
+    "Size of the responses in the response cache, by tier",
+    ["tier"],
+    multiprocess_mode="livesum",
+)
+
+
+def model_label(model: Optional[str]) -> str:
+    """
+    Get the model label of the metrics of a request.
+
+    The model is supplied by the client, so only the models served by the
+    discovered engines and their aliases are used as labels, to keep the
+    number of label values bounded.
+
+    Args:
+        model (Optional[str]): The requested model
+
+    Returns:
+        str: The model, or UNKNOWN_MODEL if no engine serves it
+    """
+    if not model:
+        return UNKNOWN_MODEL
+    try:
+        service_discovery = get_service_discovery()
+    except ValueError:
+        return UNKNOWN_MODEL
+    if model in (getattr(service_discovery, "aliases", None) or {}):
+        return model
+    for endpoint in service_discovery.get_endpoint_info():
+        if model in endpoint.model_names:
+            return model
+    return UNKNOWN_MODEL
+
+
+def observe_router_stage(request: Request, stage: str, duration: float) -> None:
+    """
+    Record the time the router spent in one stage of handling a request.
+
+    Stages observed before the model and routing logic of the request are
+    known are buffered in the request state, and recorded by
+    set_router_stage_labels.
+
+    Args:
+        request (Request): The incoming request
+        stage (str): The name of the stage, e.g. "routing_decision"
+        duration (float): The time spent in the stage, in seconds
+    """
+    labels = getattr(request.state, "router_stage_labels", None)
+    if labels is not None:
+        router_stage_latency.labels(stage=stage, **labels).observe(duration)
+        return
+    pending = getattr(request.state, "router_stage_pending", None)
+    if pending is None:
+        pending = request.state.router_stage_pending = []
+    pending.append((stage, duration))
+
+
+def set_router_stage_labels(
+    request: Request, model: Optional[str], routing_logic: str
+) -> None:
+    """
+    Set the labels of the stage latencies of a request, and record the
+    stages observed so far.
+
+    Args:
+        request (Request): The incoming request
+        model (Optional[str]): The requested model, labelled as
+            UNKNOWN_MODEL if no engine serves it
+        routing_logic (str): The routing logic handling the request
+    """
+    labels = {"model": model_label(model), "routing_logic": routing_logic}
+    request.state.router_stage_labels = labels
+    for stage, duration in getattr(request.state, "router_stage_pending", ()):
+        router_stage_latency.labels(stage=stage, **labels).observe(duration)
+    request.state.router_stage_pending = []
@@ -0,0 +1,96 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Failover of the requests that fail before any byte reaches the client.
+
+A request whose engine cannot be reached, or answers 502/503, is routed again
+to another engine by the routing logic, within an attempt budget. The failed
+engine is excluded from routing for a cool-down, so that the following
+requests do not hit it either.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from vllm_router.log import init_logger
+from vllm_router.service_discovery import EndpointInfo
+from vllm_router.utils import SingletonMeta
+
+logger = init_logger(__name__)
+
+# Response statuses meaning that the engine did not process the request
+RETRYABLE_STATUSES = {502, 503}
+
+
+class RequestFailover(metaclass=SingletonMeta):
+    def __init__(self, max_attempts: int = None, cooldown: float = None):
+        """
+        Args:
+            max_attempts (int): The maximum number of engines a request is
+                sent to, including the first one
+            cooldown (float): The time in seconds a failed engine is
+                excluded from routing
+        """
+        if hasattr(self, "_initialized"):
+            return
+        if max_attempts is None or cooldown is None:
+            raise ValueError(
+                "RequestFailover must be initialized with max_attempts and cooldown"
+            )
+        self.max_attempts = max_attempts
+        self.cooldown = cooldown
+        # Engine URL -> time (time.monotonic()) at which its cool-down ends
+        self.excluded_until: Dict[str, float] = {}
+        self._initialized = True
+
+    def on_engine_failure(self, url: str):
+        """
+        Exclude an engine from routing for the cool-down.
+
+        Args:
+            url (str): The URL of the engine that failed a request
+        """
+        if url not in self.excluded_until:
+            logger.warning(f"Excluding engine {url} for {self.cooldown}s")
+        self.excluded_until[url] = time.monotonic() + self.cooldown
+
+    def is_excluded(self, url: str) -> bool:
+        until = self.excluded_until.get(url)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self.excluded_until[url]
+            return False
+        return True
+
+    def filter_endpoints(self, endpoints: List[EndpointInfo]) -> List[EndpointInfo]:
+        """
+        Remove the engines in cool-down from the candidates of a request.
+
+        If all the engines are in cool-down, they are all kept: an engine
+        that may have recovered is better than failing the request.
+        """
+        if not self.excluded_until:
+            return endpoints
+        available = [info for info in endpoints if not self.is_excluded(info.url)]
+        return available or endpoints
+
+
+def initialize_request_failover(max_attempts: int, cooldown: float) -> RequestFailover:
+    return RequestFailover(max_attempts, cooldown)
+
+
+def get_request_failover() -> Optional[RequestFailover]:
+    # Failover is optional, return None if it was not initialized
+    return RequestFailover(_create=False)
@@ -0,0 +1,169 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Hedged requests for the idempotent endpoints.
+
+When the engine chosen for a request has not answered within a delay set to
+a high percentile of the recent response times, a copy of the request is
+sent to a second engine and the first response wins. The extra load is
+capped by a budget: the hedged copies are at most a fraction of the
+eligible requests.
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+from vllm_router.log import init_logger
+from vllm_router.routers.routing_logic import RoutingInterface
+from vllm_router.service_discovery import EndpointInfo
+from vllm_router.stats.engine_stats import EngineStats
+from vllm_router.utils import SingletonMeta
+
+logger = init_logger(__name__)
+
+# Endpoints whose requests can safely be sent twice
+HEDGED_ENDPOINTS = {
+    "/v1/embeddings",
+    "/v1/score",
+    "/score",
+    "/v1/rerank",
+    "/rerank",
+}
+
+
+class RequestHedger(metaclass=SingletonMeta):
+    # Response times kept per endpoint to compute the hedging delay
+    WINDOW_SIZE = 1000
+    # No hedging until this many response times are known for the endpoint
+    MIN_SAMPLES = 20
+    # Recompute the delay every this many new response times
+    UPDATE_EVERY = 20
+    # Unused budget is kept for this many hedged requests at most, to absorb
+    # short bursts of slow responses
+    MAX_BURST = 10.0
+
+    def __init__(
+        self,
+        percentile: float = None,
+        budget: float = None,
+        min_delay: float = 0.0,
+    ):
+        """
+        Args:
+            percentile (float): The percentile of the recent response times
+                (time to response headers) used as hedging delay, in (0, 100)
+            budget (float): The maximum ratio of hedged requests to eligible
+                requests, in (0, 1]
+            min_delay (float): The minimum hedging delay in seconds
+        """
+        if hasattr(self, "_initialized"):
+            return
+        if percentile is None or budget is None:
+            raise ValueError(
+                "RequestHedger must be initialized with percentile and budget"
+            )
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.response_times: Dict[str, deque] = {}
+        self.new_samples: Dict[str, int] = {}
+        self.delays: Dict[str, float] = {}
+        self.tokens = 0.0
+        self._initialized = True
+
+    def get_delay(self, endpoint: str) -> Optional[float]:
+        """
+        Get the time to wait for a response before hedging a request.
+
+        Args:
+            endpoint (str): The endpoint of the request, e.g. /v1/embeddings
+
+        Returns:
+            Optional[float]: The delay in seconds, None if the response
+                times of the endpoint are not known well enough yet.
+        """
+        return self.delays.get(endpoint)
+
+    def on_response_time(self, endpoint: str, response_time: float):
+        """
+        Record the time an engine took to answer a request of an endpoint.
+
+        Args:
+            endpoint (str): The endpoint of the request, e.g. /v1/embeddings
+            response_time (float): The time to the response headers, or a
+                lower bound of it if the request was cancelled
+        """
+        samples = self.response_times.get(endpoint)
+        if samples is None:
+            samples = self.response_times[endpoint] = deque(maxlen=self.WINDOW_SIZE)
+            self.new_samples[endpoint] = 0
+        samples.append(response_time)
+        self.new_samples[endpoint] += 1
+        if len(samples) >= self.MIN_SAMPLES and (
+            endpoint not in self.delays
+            or self.new_samples[endpoint] >= self.UPDATE_EVERY
+        ):
+            self.new_samples[endpoint] = 0
+            ordered = sorted(samples)
+            index = math.ceil(self.percentile / 100 * len(ordered)) - 1
+            self.delays[endpoint] = max(self.min_delay, ordered[max(0, index)])
+
+    def on_eligible_request(self):
+        """
+        Earn hedging budget for a request that could be hedged.
+        """
+        self.tokens = min(self.MAX_BURST, self.tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """
+        Spend the budget of one hedged request, if available.
+
+        Returns:
+            bool: True if the request can be hedged
+        """
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def select_hedge_endpoint(
+        self,
+        endpoints: List[EndpointInfo],
+        primary_url: str,
+        engine_stats: Dict[str, EngineStats],
+        router: RoutingInterface,
+    ) -> Optional[str]:
+        """
+        Choose the engine of the hedged copy: the least loaded one other than
+        the engine of the original request, as the router measures the load.
+
+        Returns:
+            Optional[str]: The URL of the engine, None if there is none
+        """
+        candidates = [info for info in endpoints if info.url != primary_url]
+        if not candidates:
+            return None
+        return router._least_loaded_routing(candidates, engine_stats)
+
+
+def initialize_request_hedger(
+    percentile: float, budget: float, min_delay: float = 0.0
+) -> RequestHedger:
+    return RequestHedger(percentile, budget, min_delay)
+
+
+def get_request_hedger() -> Optional[RequestHedger]:
+    # Hedging is optional, return None if it was not initialized
+    return RequestHedger(_create=False)
@@ -13,27 +13,57 @@
 # limitations under the License.
 
 # --- Request Processing & Routing ---
+import asyncio
 import json
+import logging
 import os
 import time
 import uuid
+from typing import Callable, Dict, List, Optional
 
 import aiohttp
 from fastapi import BackgroundTasks, HTTPException, Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from requests import JSONDecodeError
+from starlette.requests import ClientDisconnect
 
-from vllm_router.log import init_logger
+from vllm_router.aiohttp_client import EndpointSessionPool, get_backend_timeout
+from vllm_router.log import init_logger, is_access_log_sampled, log_access
 from vllm_router.routers.routing_logic import (
     DisaggregatedPrefillRouter,
     KvawareRouter,
     PrefixAwareRouter,
+    estimate_prompt_tokens,
 )
-from vllm_router.service_discovery import get_service_discovery
+from vllm_router.service_discovery import EndpointInfo, get_service_discovery
+from vllm_router.services.metrics_service import (
+    hedge_wins_total,
+    hedged_requests_total,
+    hedging_eligible_requests_total,
+    observe_router_stage,
+    pd_abandoned_requests_total,
+    pd_handoff_latency,
+    pd_wasted_tokens_total,
+    request_retries_total,
+    set_router_stage_labels,
+)
+from vllm_router.services.request_service.failover import (
+    RETRYABLE_STATUSES,
+    get_request_failover,
+)
+from vllm_router.services.request_service.hedging import (
+    HEDGED_ENDPOINTS,
+    RequestHedger,
+    get_request_hedger,
+)
+from vllm_router.services.request_service.response_cache import get_response_cache
 from vllm_router.services.request_service.rewriter import (
     get_request_rewriter,
     is_request_rewriter_initialized,
 )
+from vllm_router.stats.engine_stats import EngineStats
+from vllm_router.stats.outlier_detection import get_outlier_detector
+from vllm_router.stats.request_stats import RequestStats
 from vllm_router.utils import replace_model_in_request_body, update_content_length
 
 try:
@@ -49,6 +79,59 @@ except ImportError:
 
 logger = init_logger(__name__)
 
+# Interval in seconds between two checks of whether the client of a request
+# went away
+DISCONNECT_CHECK_INTERVAL = 0.5
+
+
+def _observe_stage_since(request: Request, stage: str, start_time: float) -> float:
+    """
+    Record the latency of a routing stage that started at start_time (from
+    time.perf_counter()), and return the current time as the start of the
+    next stage.
+    """
+    now = time.perf_counter()
+    observe_router_stage(request, stage, now - start_time)
+    return now
+
+
+async def _wait_for_disconnect(request: Request):
+    """
+    Return once the client of the request has disconnected. The request body
+    must have been read.
+    """
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_CHECK_INTERVAL)
+
+
+async def _unless_disconnected(request: Request, coro):
+    """
+    Await a coroutine, or cancel it if the client of the request disconnects
+    first.
+
+    Raises:
+        ClientDisconnect: If the client disconnected first
+    """
+    task = asyncio.ensure_future(coro)
+    disconnect_task = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if task not in done and disconnect_task.exception() is not None:
+            logger.warning(
+                "Could not check the client connection: "
+                f"{disconnect_task.exception()}"
+            )
+            return await task
+    finally:
+        disconnect_task.cancel()
+        if not task.done():
+            task.cancel()
+    if not task.done() or task.cancelled():
+        raise ClientDisconnect()
+    return task.result()
+
 
 # TODO: (Brian) check if request is json beforehand
 async def process_request(
@@ -95,40 +178,144 @@ async def process_request(
     # For non-streaming requests, collect the full response to cache it properly
     full_response = bytearray()
 
-    async with request.app.state.aiohttp_client_wrapper().request(
-        method=request.method,
-        url=backend_url + endpoint,
-        headers=dict(request.headers),
-        data=body,
-        timeout=aiohttp.ClientTimeout(total=None),
-    ) as backend_response:
-        # Yield headers and status code first.
-        yield backend_response.headers, backend_response.status
-        # Stream response content.
-        async for chunk in backend_response.content.iter_any():
-            total_len += len(chunk)
-            if not first_token:
-                first_token = True
-                request.app.state.request_stats_monitor.on_request_response(
-                    backend_url, request_id, time.time()
-                )
-            # For non-streaming requests, collect the full response
-            if full_response is not None:
-                full_response.extend(chunk)
-            yield chunk
+    engine_stats_scraper = request.app.state.engine_stats_scraper
+    engine_stats_scraper.on_request_dispatched(backend_url)
+    router_start_time = getattr(request.state, "router_start_time", None)
+    status = None
+    ttft = None
+    completed = False
+    failed = False
+    client_disconnected = False
+    disconnect_task = None
+
+    async def abort_on_disconnect(backend_response: aiohttp.ClientResponse):
+        # Closing the response closes the connection to the engine, which
+        # aborts the request, also while the response is not read
+        nonlocal client_disconnected
+        await _wait_for_disconnect(request)
+        client_disconnected = True
+        logger.info(
+            f"Client of request {request_id} disconnected, aborting it on "
+            f"{backend_url}"
+        )
+        backend_response.close()
+
+    try:
+        connect_start_time = time.perf_counter()
+        # The request is cancelled if the client goes away before the
+        # response starts, e.g. while a non-streaming request runs
+        backend_response = await _unless_disconnected(
+            request,
+            request.app.state.aiohttp_client_wrapper().request(
+                method=request.method,
+                url=backend_url + endpoint,
+                headers=dict(request.headers),
+                data=body,
+                timeout=get_backend_timeout(),
+            ),
+        )
+        async with backend_response:
+            observe_router_stage(
+                request, "backend_connect", time.perf_counter() - connect_start_time
+            )
+            status = backend_response.status
+            # An engine that did not process the request failed, also when the
+            # failover closes this response to retry it on another engine
+            failed = status in RETRYABLE_STATUSES
+            disconnect_task = asyncio.create_task(abort_on_disconnect(backend_response))
+            # Yield headers and status code first.
+            yield backend_response.headers, backend_response.status
+            # Stream response content.
+            async for chunk in backend_response.content.iter_any():
+                total_len += len(chunk)
+                if not first_token:
+                    first_token = True
+                    request.app.state.request_stats_monitor.on_request_response(
+                        backend_url, request_id, time.time()
+                    )
+                    ttft = time.time() - start_time
+                    if router_start_time is not None:
+                        observe_router_stage(
+                            request, "ttft", time.perf_counter() - router_start_time
+                        )
+                # For non-streaming requests, collect the full response
+                if full_response is not None:
+                    full_response.extend(chunk)
+                yield chunk
+        # Unless the response was closed for the client that went away
+        completed = not client_disconnected
+    except ClientDisconnect:
+        # Went away before the response started
+        client_disconnected = True
+        raise
+    except Exception:
+        if client_disconnected:
+            # Reading the response closed for the client that went away
+            return
+        # The engine could not be reached or the response broke off. The
+        # client going away or the request being cancelled raise
+        # GeneratorExit/CancelledError, which are not engine failures.
+        failed = True
+        raise
+    finally:
+        # Also runs when the backend fails, the client goes away or a hedged
+        # copy of the request answers first
+        if disconnect_task is not None:
+            disconnect_task.cancel()
+        engine_stats_scraper.on_request_finished(backend_url)
+        if failed or completed:
+            request.app.state.request_stats_monitor.on_request_result(
+                backend_url,
+                time.time(),
+                is_error=failed or (status is not None and status >= 500),
+            )
+        if not completed:
+            request.app.state.request_stats_monitor.on_request_aborted(
+                backend_url,
+                request_id,
+                time.time(),
+                client_disconnected=client_disconnected,
+            )
+        if is_access_log_sampled(status):
+            labels = getattr(request.state, "router_stage_labels", None) or {}
+            log_access(
+                {
+                    "time": start_time,
+                    "request_id": request_id,
+                    "endpoint": endpoint,
+                    "model": labels.get("model"),
+                    "routing_logic": labels.get("routing_logic"),
+                    "backend": backend_url,
+                    "status": status,
+                    "ttft": ttft,
+                    "latency": time.time() - start_time,
+                    "response_bytes": total_len,
+                }
+            )
 
+    if client_disconnected:
+        return
     request.app.state.request_stats_monitor.on_request_complete(
         backend_url, request_id, time.time()
     )
+    if router_start_time is not None:
+        observe_router_stage(request, "total", time.perf_counter() - router_start_time)
 
     # if debug_request:
     #    logger.debug(f"Finished the request with request id: {debug_request.headers.get('x-request-id', None)} at {time.time()}")
-    # Store in semantic cache if applicable
-    # Use the full response for non-streaming requests, or the last chunk for streaming
-    if request.app.state.semantic_cache_available:
-        cache_chunk = bytes(full_response) if not is_streaming else chunk
+    # Store in semantic cache if applicable, a streamed response is assembled
+    # from all of its SSE events
+    if request.app.state.semantic_cache_available and status == 200:
         await store_in_semantic_cache(
-            endpoint=endpoint, method=request.method, body=body, chunk=cache_chunk
+            endpoint=endpoint,
+            method=request.method,
+            body=body,
+            chunk=bytes(full_response),
+        )
+    response_cache_key = getattr(request.state, "response_cache_key", None)
+    if response_cache_key is not None and status == 200:
+        await get_response_cache().store_response(
+            response_cache_key, endpoint, bytes(full_response), is_streaming
         )
     if background_tasks and getattr(request.app.state, "callbacks", None):
         background_tasks.add_task(
@@ -136,6 +323,113 @@ async def process_request(
         )
 
 
+async def send_hedged_request(
+    request: Request,
+    body,
+    primary_url: str,
+    endpoints: List[EndpointInfo],
+    engine_stats: Dict[str, EngineStats],
+    request_id: str,
+    endpoint: str,
+    background_tasks: BackgroundTasks,
+    hedger: RequestHedger,
+):
+    """
+    Send a request of an idempotent endpoint to primary_url, and a copy of it
+    to a second engine if no response arrived within the hedging delay. The
+    first response wins, unless it has a retryable status and the other
+    request succeeds, and the other request is cancelled.
+
+    Returns:
+        The stream generator of the winning request, its response headers
+        and its status code.
+    """
+    hedging_eligible_requests_total.labels(endpoint=endpoint).inc()
+    hedger.on_eligible_request()
+
+    def _start(url: str):
+        generator = process_request(
+            request, body, url, request_id, endpoint, background_tasks
+        )
+        return generator, asyncio.ensure_future(anext(generator))
+
+    start_time = time.perf_counter()
+    primary_generator, primary_task = _start(primary_url)
+    legs = {primary_task: primary_generator}
+    delay = hedger.get_delay(endpoint)
+    if delay is not None:
+        await asyncio.wait([primary_task], timeout=delay)
+        if not primary_task.done() and hedger.try_hedge():
+            hedge_url = hedger.select_hedge_endpoint(
+                endpoints, primary_url, engine_stats, request.app.state.router
+            )
+            if hedge_url is not None:
+                logger.debug(
+                    f"Hedging request {request_id} to {hedge_url} after {delay:.4f}s"
+                )
+                hedged_requests_total.labels(endpoint=endpoint).inc()
+                hedge_generator, hedge_task = _start(hedge_url)
+                legs[hedge_task] = hedge_generator
+
+    # Wait for the first successful response, or for all the legs to fail.
+    # A response with a retryable status only wins if the other leg fails
+    # as well.
+    pending = set(legs)
+    winner = None
+    retryable = None
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    continue
+                if task.result()[1] in RETRYABLE_STATUSES:
+                    retryable = retryable or task
+                else:
+                    winner = task
+                    break
+        winner = winner or retryable
+    finally:
+        # Cancel the slower leg, also if the client went away meanwhile
+        for task, generator in legs.items():
+            if task is winner:
+                continue
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await generator.aclose()
+
+    # The time to the response of the original request, or a lower bound of
+    # it if the hedged copy answered first
+    hedger.on_response_time(endpoint, time.perf_counter() - start_time)
+    if winner is None:
+        # All the legs failed, surface the error of the original request
+        raise primary_task.exception()
+    if winner is not primary_task:
+        hedge_wins_total.labels(endpoint=endpoint).inc()
+    headers, status = winner.result()
+    return legs[winner], headers, status
+
+
+async def _route_request(
+    request: Request,
+    endpoints: List[EndpointInfo],
+    engine_stats: Dict[str, EngineStats],
+    request_stats: Dict[str, RequestStats],
+    request_json: dict,
+) -> str:
+    """
+    Choose the engine of a request among endpoints with the routing logic.
+    """
+    router = request.app.state.router
+    if isinstance(router, (KvawareRouter, PrefixAwareRouter)):
+        return await router.route_request(
+            endpoints, engine_stats, request_stats, request, request_json
+        )
+    return router.route_request(endpoints, engine_stats, request_stats, request)
+
+
 async def route_general_request(
     request: Request, endpoint: str, background_tasks: BackgroundTasks
 ):
@@ -160,26 +454,34 @@ async def route_general_request(
         )
         return response
     in_router_time = time.time()
+    stage_start_time = time.perf_counter()
+    if getattr(request.state, "router_start_time", None) is None:
+        request.state.router_start_time = stage_start_time
     # Same as vllm, Get request_id from X-Request-Id header if available
     request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
     request_body = await request.body()
+    stage_start_time = _observe_stage_since(request, "body_read", stage_start_time)
     request_json = json.loads(request_body)
+    stage_start_time = _observe_stage_since(request, "json_parse", stage_start_time)
 
     if request.query_params:
         request_endpoint = request.query_params.get("id")
     else:
         request_endpoint = None
 
-    if getattr(request.app.state, "callbacks", None) and (
-        response_overwrite := request.app.state.callbacks.pre_request(
+    if getattr(request.app.state, "callbacks", None):
+        response_overwrite = request.app.state.callbacks.pre_request(
             request, request_body, request_json
         )
-    ):
-        response_overwrite.headers["X-Request-Id"] = request_id
-        return response_overwrite
+        stage_start_time = _observe_stage_since(request, "callbacks", stage_start_time)
+        if response_overwrite:
+            response_overwrite.headers["X-Request-Id"] = request_id
+            return response_overwrite
 
     requested_model = request_json.get("model", None)
+    routing_logic = type(request.app.state.router).__name__
     if requested_model is None:
+        set_router_stage_labels(request, None, routing_logic)
         return JSONResponse(
             status_code=400,
             content={"error": "Invalid request: missing 'model' in request body."},
@@ -203,8 +505,10 @@ async def route_general_request(
                 status_code=400, detail="Request body is not JSON parsable."
             )
 
+    stage_start_time = time.perf_counter()
     service_discovery = get_service_discovery()
     endpoints = service_discovery.get_endpoint_info()
+    engines = endpoints
 
     aliases = getattr(service_discovery, "aliases", None)
     if aliases and requested_model in aliases.keys():
@@ -234,6 +538,7 @@ async def route_general_request(
         )
 
     if not endpoints:
+        set_router_stage_labels(request, None, routing_logic)
         return JSONResponse(
             status_code=400,
             content={
@@ -241,23 +546,31 @@ async def route_general_request(
             },
         )
 
+    # The model is only used as a label once an engine serving it is found
+    set_router_stage_labels(request, requested_model, routing_logic)
+    stage_start_time = _observe_stage_since(
+        request, "endpoint_resolution", stage_start_time
+    )
     logger.debug(f"Routing request {request_id} for model: {requested_model}")
+    failover = get_request_failover()
     if request_endpoint:
         server_url = endpoints[0].url
         logger.debug(
             f"Routing request {request_id} to engine with Id: {endpoints[0].Id}"
         )
 
-    elif isinstance(request.app.state.router, KvawareRouter) or isinstance(
-        request.app.state.router, PrefixAwareRouter
-    ):
-        server_url = await request.app.state.router.route_request(
-            endpoints, engine_stats, request_stats, request, request_json
-        )
     else:
-        server_url = request.app.state.router.route_request(
-            endpoints, engine_stats, request_stats, request
+        outlier_detector = get_outlier_detector()
+        if outlier_detector is not None:
+            endpoints = outlier_detector.filter_endpoints(
+                endpoints, engines, request_stats
+            )
+        if failover is not None:
+            endpoints = failover.filter_endpoints(endpoints)
+        server_url = await _route_request(
+            request, endpoints, engine_stats, request_stats, request_json
         )
+    _observe_stage_since(request, "routing_decision", stage_start_time)
 
     curr_time = time.time()
     # Extract actual session ID from request headers for logging
@@ -272,25 +585,92 @@ async def route_general_request(
     session_id_display = session_id if session_id is not None else "None"
 
     # Debug logging to help troubleshoot session ID extraction
-    logger.debug(
-        f"Debug session extraction - Router type: {type(request.app.state.router).__name__}"
-    )
-    logger.debug(f"Debug session extraction - Session key config: {session_key}")
-    logger.debug(f"Debug session extraction - Request headers: {dict(request.headers)}")
-    logger.debug(f"Debug session extraction - Extracted session ID: {session_id}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"Debug session extraction - Router type: {type(request.app.state.router).__name__}"
+        )
+        logger.debug(f"Debug session extraction - Session key config: {session_key}")
+        logger.debug(
+            f"Debug session extraction - Request headers: {dict(request.headers)}"
+        )
+        logger.debug(f"Debug session extraction - Extracted session ID: {session_id}")
 
     logger.info(
         f"Routing request {request_id} with session id {session_id_display} to {server_url} at {curr_time}, process time = {curr_time - in_router_time:.4f}"
     )
-    stream_generator = process_request(
-        request,
-        request_body,
-        server_url,
-        request_id,
-        endpoint,
-        background_tasks,
-    )
-    headers, status = await anext(stream_generator)
+    hedger = get_request_hedger()
+    attempt = 1
+    while True:
+        error = None
+        try:
+            if (
+                hedger is not None
+                and endpoint in HEDGED_ENDPOINTS
+                and not request_endpoint
+                and len(endpoints) > 1
+            ):
+                stream_generator, headers, status = await send_hedged_request(
+                    request,
+                    request_body,
+                    server_url,
+                    endpoints,
+                    engine_stats,
+                    request_id,
+                    endpoint,
+                    background_tasks,
+                    hedger,
+                )
+            else:
+                stream_generator = process_request(
+                    request,
+                    request_body,
+                    server_url,
+                    request_id,
+                    endpoint,
+                    background_tasks,
+                )
+                headers, status = await anext(stream_generator)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+        except ClientDisconnect:
+            # Nobody reads this response
+            return JSONResponse(
+                status_code=499,
+                content={"error": "Client disconnected"},
+                headers={"X-Request-Id": request_id},
+            )
+
+        # Nothing was sent to the client yet, so a request that the engine
+        # did not process can be routed again to another engine
+        if error is None and status not in RETRYABLE_STATUSES:
+            break
+        # Keep the next requests away from the engine, also when this one
+        # cannot be retried
+        if failover is not None:
+            failover.on_engine_failure(server_url)
+        endpoints = [info for info in endpoints if info.url != server_url]
+        if (
+            failover is None
+            or request_endpoint
+            or attempt >= failover.max_attempts
+            or not endpoints
+        ):
+            if error is not None:
+                raise error
+            break
+        reason = type(error).__name__ if error is not None else str(status)
+        logger.warning(
+            f"Request {request_id} failed on {server_url} ({reason}), "
+            f"retrying on another engine (attempt {attempt + 1})"
+        )
+        if error is None:
+            await stream_generator.aclose()
+        request_retries_total.labels(server=server_url, reason=reason).inc()
+        attempt += 1
+        server_url = await _route_request(
+            request, endpoints, engine_stats, request_stats, request_json
+        )
+
     headers_dict = {key: value for key, value in headers.items()}
     headers_dict["X-Request-Id"] = request_id
     return StreamingResponse(
@@ -323,10 +703,17 @@ async def send_request_to_prefiller(
 
 
 async def send_request_to_decode(
-    client: aiohttp.ClientSession, endpoint: str, req_data: dict, request_id: str
+    client: aiohttp.ClientSession,
+    endpoint: str,
+    req_data: dict,
+    request_id: str,
+    on_response: Optional[Callable[[aiohttp.ClientResponse], None]] = None,
 ):
     """
     Asynchronously stream the response from a service using a persistent client.
+
+    on_response, if given, is called with the response once its status is
+    checked, e.g. to close it from outside the stream.
     """
     headers = {
         "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY')}",
@@ -335,10 +722,49 @@ async def send_request_to_decode(
 
     async with client.post(endpoint, json=req_data, headers=headers) as response:
         response.raise_for_status()
+        if on_response is not None:
+            on_response(response)
         async for chunk in response.content.iter_any():
             yield chunk
 
 
+def _on_pd_request_abandoned(leg: str, prefill_tokens: int, decoded_tokens: int):
+    """
+    Record a disaggregated prefill request whose client disconnected during
+    the given leg, and the tokens computed for nothing.
+    """
+    pd_abandoned_requests_total.labels(leg=leg).inc()
+    pd_wasted_tokens_total.labels(leg="prefill").inc(prefill_tokens)
+    pd_wasted_tokens_total.labels(leg="decode").inc(decoded_tokens)
+
+
+def _decoder_error_chunk(message: str, code: int, is_streaming: bool) -> bytes:
+    error_response = {
+        "error": {
+            "message": f"Decoder error: {message}",
+            "type": "decoder_error",
+            "code": code,
+        }
+    }
+    if is_streaming:
+        # An event of the stream, which then ends as a vLLM stream does
+        return f"data: {json.dumps(error_response)}\n\ndata: [DONE]\n\n".encode()
+    return json.dumps(error_response).encode("utf-8")
+
+
+async def prepare_decode_connection(session_pool: EndpointSessionPool, url: str):
+    """
+    Open a connection to a decoder while the prefill runs, and leave it in
+    the connection pool of the decoder for the decode request.
+    """
+    try:
+        async with session_pool.use(url) as client:
+            async with client.get("/health") as response:
+                await response.read()
+    except Exception as e:
+        logger.debug(f"Could not prepare the decode connection: {e}")
+
+
 async def route_disaggregated_prefill_request(
     request: Request,
     endpoint: str,
@@ -348,20 +774,82 @@ async def route_disaggregated_prefill_request(
     # Same as vllm, Get request_id from X-Request-Id header if available
     request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
     request_json = await request.json()
+    router = request.app.state.router
+    session_pool = request.app.state.endpoint_session_pool
+    engine_stats_scraper = request.app.state.engine_stats_scraper
+
+    endpoints = get_service_discovery().get_endpoint_info()
+    # The prefill and decode pools follow the discovered engines
+    await session_pool.sync(info.url for info in endpoints)
+    requested_model = request_json.get("model", None)
+    endpoints = [
+        info
+        for info in endpoints
+        if requested_model in info.model_names and not info.sleep
+    ]
+    engine_stats = engine_stats_scraper.get_engine_stats()
+
+    num_prompt_tokens = estimate_prompt_tokens(request_json)
+    prefill_url = await router.route_prefill(
+        endpoints, engine_stats, request_json, num_prompt_tokens
+    )
+    if prefill_url is None or not router.get_decoders(endpoints):
+        if prefill_url is not None:
+            router.on_prefill_finished(prefill_url, num_prompt_tokens)
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": f"Model {requested_model} not found on both a prefill "
+                "and a decode engine, or the engines are sleeping."
+            },
+            headers={"X-Request-Id": request_id},
+        )
+
+    decode_url = None
+    prepare_decode_task = None
+    if router.pipelined_handoff:
+        # Place the decode now and, unless a connection to the decoder can be
+        # reused, connect to it during the prefill
+        decode_url = router.route_decode(endpoints, engine_stats)
+        if not session_pool.has_idle_connection(decode_url):
+            prepare_decode_task = asyncio.create_task(
+                prepare_decode_connection(session_pool, decode_url)
+            )
+
+    async def prefill():
+        async with session_pool.use(prefill_url) as client:
+            return await send_request_to_prefiller(
+                client, endpoint, request_json, request_id
+            )
 
     orig_max_tokens = request_json.get("max_tokens", 0)
     request_json["max_tokens"] = 1
     st = time.time()
+    engine_stats_scraper.on_request_dispatched(prefill_url)
     try:
-        await send_request_to_prefiller(
-            request.app.state.prefill_client, endpoint, request_json, request_id
-        )
+        # The prefill is cancelled if the client goes away
+        prefill_response = await _unless_disconnected(request, prefill())
         et = time.time()
         logger.info(f"{request_id} prefill time (TTFT): {et - st:.4f}")
         logger.info(
-            f"Routing request {request_id} with session id None to {request.app.state.prefill_client._base_url} at {et}, process time = {et - in_router_time:.4f}"
+            f"Routing request {request_id} with session id None to {prefill_url} at {et}, process time = {et - in_router_time:.4f}"
         )
         request_json["max_tokens"] = orig_max_tokens
+        # The prefiller signals that the KV cache is ready to be transferred
+        # with its response, which may carry the parameters of the transfer
+        kv_transfer_params = prefill_response.get("kv_transfer_params")
+        if kv_transfer_params:
+            request_json["kv_transfer_params"] = kv_transfer_params
+    except ClientDisconnect:
+        logger.info(f"Client of request {request_id} disconnected during its prefill")
+        # The prompt tokens the prefiller computed before the abort are not
+        # known, and counted in full
+        _on_pd_request_abandoned("prefill", num_prompt_tokens, 0)
+        return JSONResponse(
+            status_code=499,
+            content={"error": "Client disconnected"},
+            headers={"X-Request-Id": request_id},
+        )
     except aiohttp.ClientResponseError as e:
         logger.error(f"HTTP error in prefiller: {e}", exc_info=True)
         return JSONResponse(
@@ -388,52 +876,137 @@ async def route_disaggregated_prefill_request(
             },
             headers={"X-Request-Id": request_id},
         )
+    finally:
+        engine_stats_scraper.on_request_finished(prefill_url)
+        router.on_prefill_finished(prefill_url, num_prompt_tokens)
+        if prepare_decode_task is not None:
+            # The decode request opens its own connection if it is not ready
+            prepare_decode_task.cancel()
+
+    if decode_url is None:
+        # Placed after the prefill, with the KV cache usage of the decoders
+        # at the time the KV cache is transferred
+        decode_url = router.route_decode(
+            endpoints, engine_stats_scraper.get_engine_stats()
+        )
+
+    is_streaming = request_json.get("stream", False)
+    decoder_error_status = None
 
     async def generate_stream():
+        nonlocal decoder_error_status
+        engine_stats_scraper.on_request_dispatched(decode_url)
+        first_chunk = True
+        decode_response = None
+        # Events of the stream, about one per decoded token
+        decoded_tokens = 0
+        finished = False
+        abandoned = False
+
+        def on_decode_response(response: aiohttp.ClientResponse):
+            nonlocal decode_response
+            decode_response = response
+
+        def on_abandoned():
+            nonlocal abandoned
+            if not abandoned:
+                abandoned = True
+                _on_pd_request_abandoned("decode", num_prompt_tokens, decoded_tokens)
+
+        async def cancel_decode_on_disconnect():
+            # Closing the response closes the connection to the decoder, which
+            # aborts the request, also while this generator is not resumed
+            await _wait_for_disconnect(request)
+            logger.info(
+                f"Client of request {request_id} disconnected, cancelling its decode"
+            )
+            on_abandoned()
+            if decode_response is not None:
+                decode_response.close()
+
+        disconnect_task = asyncio.create_task(cancel_decode_on_disconnect())
         try:
-            async for chunk in send_request_to_decode(
-                request.app.state.decode_client, endpoint, request_json, request_id
-            ):
-                yield chunk
+            async with session_pool.use(decode_url) as client:
+                async for chunk in send_request_to_decode(
+                    client,
+                    endpoint,
+                    request_json,
+                    request_id,
+                    on_response=on_decode_response,
+                ):
+                    if first_chunk:
+                        first_chunk = False
+                        # Time to first token added by the handoff from the
+                        # prefiller to the decoder
+                        pd_handoff_latency.labels(server=decode_url).observe(
+                            time.time() - et
+                        )
+                    if is_streaming:
+                        decoded_tokens += chunk.count(b"data: ")
+                    yield chunk
+            finished = True
         except aiohttp.ClientResponseError as e:
+            finished = True
             logger.error(f"HTTP error in decoder: {e}", exc_info=True)
             try:
                 error_text = e.message
             except Exception:
                 error_text = f"HTTP {e.status}"
-            # Yield error as JSON response
-            error_response = {
-                "error": {
-                    "message": f"Decoder error: {error_text}",
-                    "type": "decoder_error",
-                    "code": e.status,
-                }
-            }
-            yield json.dumps(error_response).encode("utf-8")
+            decoder_error_status = e.status
+            yield _decoder_error_chunk(error_text, e.status, is_streaming)
         except Exception as e:
+            if abandoned:
+                # The decode was cancelled for the client that went away
+                return
+            finished = True
             logger.error(f"Unexpected error in decoder: {e}", exc_info=True)
-            # Yield error as JSON response
-            error_response = {
-                "error": {
-                    "message": f"Decoder error: {str(e)}",
-                    "type": "decoder_error",
-                    "code": 500,
-                }
-            }
-            yield json.dumps(error_response).encode("utf-8")
+            decoder_error_status = 500
+            yield _decoder_error_chunk(str(e), 500, is_streaming)
+        finally:
+            disconnect_task.cancel()
+            if not finished:
+                # Closed or cancelled by the server when the client went away
+                on_abandoned()
+            engine_stats_scraper.on_request_finished(decode_url)
 
     curr_time = time.time()
     logger.info(
-        f"Routing request {request_id} with session id None to {request.app.state.decode_client._base_url} at {curr_time}, process time = {curr_time - et:.4f}"
+        f"Routing request {request_id} with session id None to {decode_url} at {curr_time}, process time = {curr_time - et:.4f}"
     )
 
+    stream = generate_stream()
+    if router.pipelined_handoff or not is_streaming:
+        # Send the decode request as soon as the KV cache is ready, rather
+        # than once the response to the client starts, and answer a
+        # non-streaming request with the status of the decoder
+        try:
+            first_chunk = await anext(stream)
+        except StopAsyncIteration:
+            first_chunk = None
+        if decoder_error_status is not None and not is_streaming:
+            await stream.aclose()
+            return Response(
+                content=first_chunk,
+                status_code=decoder_error_status,
+                media_type="application/json",
+                headers={"X-Request-Id": request_id},
+            )
+        if first_chunk is not None:
+            stream = _prepend_chunk(first_chunk, stream)
+
     return StreamingResponse(
-        generate_stream(),
-        media_type="application/json",
+        stream,
+        media_type="text/event-stream" if is_streaming else "application/json",
         headers={"X-Request-Id": request_id},
     )
 
 
+async def _prepend_chunk(chunk: bytes, stream):
+    yield chunk
+    async for chunk in stream:
+        yield chunk
+
+
 async def route_sleep_wakeup_request(
     request: Request,
     endpoint: str,
@@ -0,0 +1,526 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Exact-match cache of the chat and text completion responses.
+
+Byte-identical deterministic requests, e.g. health probes, evaluations at
+temperature 0 and seeded agent retries, are answered from this cache before the semantic cache computes
+any embedding. The cache key is a hash of the endpoint and of the canonical
+JSON of the request without its streaming options, so a streaming and a
+non-streaming request share their entry. A streamed response is stored as the
+response its events assemble to, and replayed as SSE events to a streaming
+request.
+
+The responses are kept in a memory LRU bounded in bytes. The entries evicted
+from memory can spill to a directory, itself bounded in bytes.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from vllm_router.log import init_logger
+from vllm_router.services.metrics_service import (
+    observe_router_stage,
+    response_cache_hits_total,
+    response_cache_misses_total,
+    response_cache_size_bytes,
+    set_router_stage_labels,
+)
+from vllm_router.utils import SingletonMeta
+
+logger = init_logger(__name__)
+
+CACHED_ENDPOINTS = {"/v1/chat/completions", "/v1/completions"}
+# Request fields that change the format of the response or the caching, not
+# the generated content
+KEY_IGNORED_FIELDS = (
+    "stream",
+    "stream_options",
+    "skip_cache",
+    "cache_similarity_threshold",
+)
+
+
+def response_cache_key(endpoint: str, request_json: Dict[str, Any]) -> Optional[str]:
+    """
+    Compute the cache key of a request: a hash of its endpoint, model, messages
+    or prompt and sampling parameters. Only deterministic requests are cached,
+    so that a sampled request still gets a new answer every time.
+
+    Returns:
+        Optional[str]: The key, None if the request must not use the cache
+    """
+    if endpoint not in CACHED_ENDPOINTS or request_json.get("skip_cache", False):
+        return None
+    if not _is_deterministic(request_json):
+        return None
+    canonical = {
+        key: value
+        for key, value in request_json.items()
+        if key not in KEY_IGNORED_FIELDS
+    }
+    data = json.dumps(
+        [endpoint, canonical],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _is_deterministic(request_json: Dict[str, Any]) -> bool:
+    """
+    Whether a request always generates the same response: greedy sampling,
+    or a fixed seed for a single completion.
+    """
+    if request_json.get("temperature", None) == 0:
+        return True
+    return (
+        request_json.get("seed", None) is not None
+        and (request_json.get("n", None) or 1) <= 1
+    )
+
+
+def _sse_events(body: bytes) -> List[Dict[str, Any]]:
+    events = []
+    for line in body.split(b"\n"):
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            continue
+        data = line[len(b"data:") :].strip()
+        if data == b"[DONE]":
+            break
+        events.append(json.loads(data))
+    return events
+
+
+def assemble_streamed_response(body: bytes, endpoint: str) -> Optional[Dict[str, Any]]:
+    """
+    Assemble the SSE events of a streamed completion into the response of the
+    same request without streaming.
+
+    Args:
+        body (bytes): The streamed response
+        endpoint (str): /v1/chat/completions or /v1/completions
+
+    Returns:
+        Optional[Dict[str, Any]]: The response, None if the stream did not
+            finish or has deltas other than text, e.g. tool calls or logprobs
+    """
+    is_chat = endpoint == "/v1/chat/completions"
+    try:
+        events = _sse_events(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not events:
+        return None
+    choices: Dict[int, Dict[str, Any]] = {}
+    usage = None
+    for event in events:
+        if "error" in event:
+            return None
+        if event.get("usage"):
+            usage = event["usage"]
+        for choice in event.get("choices", []):
+            if choice.get("logprobs"):
+                return None
+            assembled = choices.setdefault(
+                choice.get("index", 0),
+                {"role": "assistant", "content": "", "finish_reason": None},
+            )
+            if is_chat:
+                delta = choice.get("delta", {})
+                if any(
+                    delta.get(key) for key in delta if key not in ("role", "content")
+                ):
+                    return None
+                assembled["role"] = delta.get("role") or assembled["role"]
+                assembled["content"] += delta.get("content") or ""
+            else:
+                assembled["content"] += choice.get("text") or ""
+            if choice.get("finish_reason"):
+                assembled["finish_reason"] = choice["finish_reason"]
+    if not choices or any(c["finish_reason"] is None for c in choices.values()):
+        return None
+
+    first = events[0]
+    response = {
+        "id": first.get("id", f"cmpl-{uuid.uuid4()}"),
+        "object": "chat.completion" if is_chat else "text_completion",
+        "created": first.get("created", int(time.time())),
+        "model": first.get("model"),
+        "choices": [],
+    }
+    for index, choice in sorted(choices.items()):
+        if is_chat:
+            response["choices"].append(
+                {
+                    "index": index,
+                    "message": {"role": choice["role"], "content": choice["content"]},
+                    "finish_reason": choice["finish_reason"],
+                }
+            )
+        else:
+            response["choices"].append(
+                {
+                    "index": index,
+                    "text": choice["content"],
+                    "finish_reason": choice["finish_reason"],
+                }
+            )
+    if usage is not None:
+        response["usage"] = usage
+    return response
+
+
+def response_to_sse(
+    response: Dict[str, Any],
+    endpoint: str,
+    include_usage: bool = False,
+    chunk_size: int = 0,
+) -> Optional[List[bytes]]:
+    """
+    Convert a completion response into the SSE events of the same request
+    with streaming.
+
+    Args:
+        response (Dict[str, Any]): The response
+        endpoint (str): /v1/chat/completions or /v1/completions
+        include_usage (bool): Whether to send the usage in a last event, as
+            requested with stream_options.include_usage
+        chunk_size (int): The number of characters of the text of a choice
+            sent by each event, 0 to send it in one event
+
+    Returns:
+        Optional[List[bytes]]: The events, None if the response cannot be
+            streamed as text deltas, e.g. it has tool calls or logprobs
+    """
+    is_chat = endpoint == "/v1/chat/completions"
+    base = {
+        "id": response.get("id", f"cmpl-{uuid.uuid4()}"),
+        "object": "chat.completion.chunk" if is_chat else "text_completion",
+        "created": response.get("created", int(time.time())),
+        "model": response.get("model"),
+    }
+
+    def event(choices, **fields) -> bytes:
+        return (
+            f"data: {json.dumps({**base, 'choices': choices, **fields})}\n\n".encode()
+        )
+
+    def split(text: str) -> List[str]:
+        if not chunk_size or not text:
+            return [text]
+        return [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    events = []
+    finishes = []
+    for choice in response.get("choices", []):
+        if choice.get("logprobs"):
+            return None
+        index = choice.get("index", 0)
+        finish_reason = choice.get("finish_reason") or "stop"
+        if is_chat:
+            message = choice.get("message") or {}
+            if any(
+                message.get(key) for key in message if key not in ("role", "content")
+            ):
+                return None
+            for i, piece in enumerate(split(message.get("content") or "")):
+                # The role is only sent by the first delta
+                delta = {"content": piece}
+                if i == 0:
+                    delta = {"role": message.get("role", "assistant"), **delta}
+                events.append(
+                    event([{"index": index, "delta": delta, "finish_reason": None}])
+                )
+            finishes.append(
+                {"index": index, "delta": {}, "finish_reason": finish_reason}
+            )
+        else:
+            for piece in split(choice.get("text") or ""):
+                events.append(
+                    event([{"index": index, "text": piece, "finish_reason": None}])
+                )
+            finishes.append(
+                {"index": index, "text": "", "finish_reason": finish_reason}
+            )
+    events.append(event(finishes))
+    if include_usage and response.get("usage") is not None:
+        events.append(event([], usage=response["usage"]))
+    events.append(b"data: [DONE]\n\n")
+    return events
+
+
+class ResponseCache(metaclass=SingletonMeta):
+    """
+    Memory LRU of the responses by cache key, bounded in bytes, with an
+    optional spill of the evicted entries to disk.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = None,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: int = 0,
+    ):
+        """
+        Args:
+            max_bytes (int): The maximum size of the responses kept in memory
+            spill_dir (Optional[str]): The directory the responses evicted from
+                memory are written to, None to drop them
+            spill_max_bytes (int): The maximum size of the responses in
+                spill_dir, the least recently spilled ones are deleted
+        """
+        if hasattr(self, "_initialized"):
+            return
+        if max_bytes is None:
+            raise ValueError("ResponseCache must be initialized with max_bytes")
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        # Size of each spilled response, least recently spilled first
+        self.spilled: OrderedDict[str, int] = OrderedDict()
+        self.spill_size = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._load_spilled()
+        self._initialized = True
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.json")
+
+    def _load_spilled(self):
+        """Index the responses spilled before a restart."""
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.spill_dir, name))
+                files.append((stat.st_mtime, name[: -len(".json")], stat.st_size))
+        for _, key, size in sorted(files):
+            self.spilled[key] = size
+            self.spill_size += size
+        self._remove_files(self._trim_spilled())
+        response_cache_size_bytes.labels(tier="disk").set(self.spill_size)
+
+    def _trim_spilled(self) -> List[str]:
+        """
+        Drop the least recently spilled responses over spill_max_bytes from
+        the index. Called from the event loop only, like all the accounting.
+
+        Returns:
+            List[str]: The paths of the dropped responses, to remove
+        """
+        paths = []
+        while self.spill_size > self.spill_max_bytes and self.spilled:
+            key, size = self.spilled.popitem(last=False)
+            self.spill_size -= size
+            paths.append(self._spill_path(key))
+        return paths
+
+    @staticmethod
+    def _remove_files(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_file(path: str, value: bytes):
+        with open(path + ".tmp", "wb") as f:
+            f.write(value)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Get the response of a cache key, from memory or else from disk.
+
+        Returns:
+            Optional[bytes]: The JSON response, None on a miss
+        """
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            response_cache_hits_total.labels(tier="memory").inc()
+            return value
+        if key in self.spilled:
+            # Moved back to memory
+            self.spill_size -= self.spilled.pop(key)
+            path = self._spill_path(key)
+            try:
+                value = await asyncio.to_thread(self._read_file, path)
+                await asyncio.to_thread(os.remove, path)
+            except OSError as e:
+                logger.warning(f"Failed to read spilled response {key}: {e}")
+                value = None
+            response_cache_size_bytes.labels(tier="disk").set(self.spill_size)
+            if value is not None:
+                response_cache_hits_total.labels(tier="disk").inc()
+                await self.put(key, value)
+                return value
+        response_cache_misses_total.inc()
+        return None
+
+    async def put(self, key: str, value: bytes):
+        """
+        Cache the JSON response of a cache key, evicting the least recently
+        used responses from memory.
+        """
+        if len(value) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = value
+        self.size += len(value)
+        evicted = []
+        while self.size > self.max_bytes:
+            evicted_key, evicted_value = self.entries.popitem(last=False)
+            self.size -= len(evicted_value)
+            evicted.append((evicted_key, evicted_value))
+        response_cache_size_bytes.labels(tier="memory").set(self.size)
+        if self.spill_dir is None:
+            return
+        for evicted_key, evicted_value in evicted:
+            if len(evicted_value) > self.spill_max_bytes:
+                continue
+            try:
+                await asyncio.to_thread(
+                    self._write_file, self._spill_path(evicted_key), evicted_value
+                )
+            except OSError as e:
+                logger.warning(f"Failed to spill response {evicted_key}: {e}")
+                continue
+            self.spill_size -= self.spilled.pop(evicted_key, 0)
+            self.spilled[evicted_key] = len(evicted_value)
+            self.spill_size += len(evicted_value)
+            paths = self._trim_spilled()
+            if paths:
+                await asyncio.to_thread(self._remove_files, paths)
+        response_cache_size_bytes.labels(tier="disk").set(self.spill_size)
+
+    async def store_response(
+        self, key: str, endpoint: str, body: bytes, is_streaming: bool
+    ):
+        """
+        Cache the response of a request proxied to an engine.
+
+        Args:
+            key (str): The cache key of the request
+            endpoint (str): The endpoint of the request
+            body (bytes): The full response, SSE events if is_streaming
+            is_streaming (bool): Whether the response was streamed
+        """
+        if is_streaming:
+            response = assemble_streamed_response(body, endpoint)
+            if response is None:
+                return
+            value = json.dumps(response).encode()
+        else:
+            try:
+                if "choices" not in json.loads(body):
+                    return
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                return
+            value = body
+        await self.put(key, value)
+
+    def build_response(
+        self, value: bytes, endpoint: str, request_json: Dict[str, Any]
+    ) -> Optional[Response]:
+        """
+        Build the response to a request from its cached JSON response.
+
+        Returns:
+            Optional[Response]: The response, None if the cached response
+                cannot be streamed to a streaming request
+        """
+        headers = {"X-Response-Cache": "hit"}
+        if not request_json.get("stream", False):
+            return Response(
+                content=value, media_type="application/json", headers=headers
+            )
+        include_usage = bool(
+            (request_json.get("stream_options") or {}).get("include_usage")
+        )
+        events = response_to_sse(json.loads(value), endpoint, include_usage)
+        if events is None:
+            return None
+        return StreamingResponse(
+            iter(events), media_type="text/event-stream", headers=headers
+        )
+
+
+def initialize_response_cache(
+    max_bytes: int, spill_dir: Optional[str] = None, spill_max_bytes: int = 0
+) -> ResponseCache:
+    return ResponseCache(max_bytes, spill_dir, spill_max_bytes)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    # The response cache is optional, return None if it was not initialized
+    return ResponseCache(_create=False)
+
+
+async def check_response_cache(request: Request, endpoint: str) -> Optional[Response]:
+    """
+    Answer a request from the response cache, if it is enabled and has the
+    response. On a miss, the cache key is kept in the request state to cache
+    the response of the engine.
+
+    Returns:
+        Optional[Response]: The cached response, None on a miss
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return None
+    start_time = time.perf_counter()
+    if getattr(request.state, "router_start_time", None) is None:
+        request.state.router_start_time = start_time
+    request_json = await request.json()
+    key = response_cache_key(endpoint, request_json)
+    if key is None:
+        return None
+    response = None
+    value = await response_cache.get(key)
+    if value is not None:
+        response = response_cache.build_response(value, endpoint, request_json)
+    observe_router_stage(
+        request, "response_cache_lookup", time.perf_counter() - start_time
+    )
+    if response is None:
+        request.state.response_cache_key = key
+        return None
+    set_router_stage_labels(request, request_json.get("model"), "response_cache")
+    observe_router_stage(
+        request, "total", time.perf_counter() - request.state.router_start_time
+    )
+    return response
@@ -13,16 +13,18 @@
 # limitations under the License.
 import threading
 import time
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, fields, replace
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import requests
-from prometheus_client.parser import text_string_to_metric_families
 
 from vllm_router.log import init_logger
 from vllm_router.service_discovery import get_service_discovery
 from vllm_router.utils import SingletonMeta
 
+if TYPE_CHECKING:
+    from vllm_router.workers import CoordinatorLink
+
 logger = init_logger(__name__)
 
 
@@ -38,6 +40,23 @@ class EngineStats:
     gpu_prefix_cache_queries_total: int = 0
     # GPU KV usage percentage (new field for dashboard "GPU KV Usage Percentage")
     gpu_cache_usage_perc: float = 0.0
+    # Requests the router dispatched to the engine minus the ones it saw
+    # finish since these stats were collected (filled in by the router)
+    router_inflight_delta: int = 0
+
+    @property
+    def effective_load(self) -> int:
+        """
+        Optimistic number of requests on the engine right now: the running
+        and queuing requests reported by the engine, corrected by the
+        requests the router dispatched or saw finish since the report.
+        """
+        return max(
+            0,
+            self.num_running_requests
+            + self.num_queuing_requests
+            + self.router_inflight_delta,
+        )
 
     @staticmethod
     def from_vllm_scrape(vllm_scrape: str):
@@ -51,48 +70,223 @@ class EngineStats:
             EngineStats: The EngineStats object
 
         Note:
-            Assume vllm only runs a single model
-        """
-        num_running_reqs = 0
-        num_queuing_reqs = 0
-        gpu_prefix_cache_hit_rate = 0.0
-        gpu_prefix_cache_hits_total = 0
-        gpu_prefix_cache_queries_total = 0
-        gpu_cache_usage_perc = 0.0
-
-        for family in text_string_to_metric_families(vllm_scrape):
-            for sample in family.samples:
-                if sample.name == "vllm:num_requests_running":
-                    num_running_reqs = sample.value
-                elif sample.name == "vllm:num_requests_waiting":
-                    num_queuing_reqs = sample.value
-                elif sample.name == "vllm:gpu_prefix_cache_hit_rate":
-                    gpu_prefix_cache_hit_rate = sample.value
-                elif sample.name == "vllm:gpu_prefix_cache_hits_total":
-                    gpu_prefix_cache_hits_total = sample.value
-                elif sample.name == "vllm:gpu_prefix_cache_queries_total":
-                    gpu_prefix_cache_queries_total = sample.value
-                elif sample.name == "vllm:gpu_cache_usage_perc":
-                    gpu_cache_usage_perc = sample.value
-
-        return EngineStats(
-            num_running_requests=num_running_reqs,
-            num_queuing_requests=num_queuing_reqs,
-            gpu_prefix_cache_hit_rate=gpu_prefix_cache_hit_rate,
-            gpu_prefix_cache_hits_total=gpu_prefix_cache_hits_total,
-            gpu_prefix_cache_queries_total=gpu_prefix_cache_queries_total,
-            gpu_cache_usage_perc=gpu_cache_usage_perc,
+            If the engine serves several models (or exports several label
+            sets for one model), request counts and prefix cache counters are
+            summed, while the ratio gauges take the maximum across samples.
+        """
+        return EngineStats._from_samples(
+            sample
+            for samples in parse_vllm_scrape(vllm_scrape).values()
+            for sample in samples
         )
 
+    @staticmethod
+    def from_vllm_scrape_per_model(vllm_scrape: str) -> Dict[str, "EngineStats"]:
+        """
+        Parse the vllm scrape string and return one EngineStats per model
+
+        Args:
+            vllm_scrape (str): The vllm scrape string
+
+        Returns:
+            Dict[str, EngineStats]: A mapping from the `model_name` label to
+                the EngineStats of that model. Samples without a
+                `model_name` label are reported under the empty string.
+        """
+        return {
+            model: EngineStats._from_samples(samples)
+            for model, samples in parse_vllm_scrape(vllm_scrape).items()
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> "EngineStats":
+        """
+        Build an EngineStats object from a pushed stats report
+
+        Args:
+            data (Dict): A mapping from EngineStats field names to values.
+                Unknown keys and router-side fields are ignored, and missing
+                fields keep their default value.
+
+        Returns:
+            EngineStats: The EngineStats object
+
+        Raises:
+            ValueError: if a field value is not a number
+        """
+        values = {}
+        for field in fields(EngineStats):
+            if field.name in data and field.name not in _ROUTER_SIDE_FIELDS:
+                value = data[field.name]
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"Invalid value for {field.name}: {value!r}")
+                values[field.name] = value
+        return EngineStats(**values)
+
+    @staticmethod
+    def _from_samples(samples: Iterable[Tuple[str, float]]) -> "EngineStats":
+        values: Dict[str, float] = {}
+        for name, value in samples:
+            field = _VLLM_METRIC_FIELDS[name]
+            if field in _MAX_AGGREGATED_FIELDS:
+                values[field] = max(values.get(field, value), value)
+            elif field in _MIN_AGGREGATED_FIELDS:
+                values[field] = min(values.get(field, value), value)
+            else:
+                values[field] = values.get(field, 0) + value
+        return EngineStats(**values)
+
+
+# vLLM metric name -> EngineStats field
+_VLLM_METRIC_FIELDS = {
+    "vllm:num_requests_running": "num_running_requests",
+    "vllm:num_requests_waiting": "num_queuing_requests",
+    "vllm:gpu_prefix_cache_hit_rate": "gpu_prefix_cache_hit_rate",
+    "vllm:gpu_prefix_cache_hits_total": "gpu_prefix_cache_hits_total",
+    "vllm:gpu_prefix_cache_queries_total": "gpu_prefix_cache_queries_total",
+    "vllm:gpu_cache_usage_perc": "gpu_cache_usage_perc",
+}
+# Ratios cannot be summed across models, keep the worst one instead: the
+# highest cache usage and the lowest prefix cache hit rate
+_MAX_AGGREGATED_FIELDS = {"gpu_cache_usage_perc"}
+_MIN_AGGREGATED_FIELDS = {"gpu_prefix_cache_hit_rate"}
+# Fields computed by the router itself, never read from an engine report
+_ROUTER_SIDE_FIELDS = {"router_inflight_delta"}
+
+
+def parse_vllm_scrape(
+    vllm_scrape: str, metric_names: Iterable[str] = _VLLM_METRIC_FIELDS
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Extract the samples of the given metrics from a Prometheus text page.
+
+    Unlike prometheus_client's text parser, this only looks at the lines that
+    start with one of the wanted metric names, so the (large) histogram
+    families exported by vLLM are skipped without being parsed.
+
+    Args:
+        vllm_scrape (str): The vllm scrape string
+        metric_names (Iterable[str]): The exact sample names to extract
+
+    Returns:
+        Dict[str, List[Tuple[str, float]]]: A mapping from the `model_name`
+            label ("" if missing) to the (sample name, value) pairs found for
+            that model, in page order.
+    """
+    samples: Dict[str, List[Tuple[str, float]]] = {}
+    for name in metric_names:
+        for line in _iter_lines_starting_with(vllm_scrape, name):
+            sample = _parse_sample_line(line, name)
+            if sample is not None:
+                model, value = sample
+                samples.setdefault(model, []).append((name, value))
+    return samples
+
+
+def _iter_lines_starting_with(text: str, prefix: str) -> Iterator[str]:
+    """
+    Yield every line of `text` that starts with `prefix`, using str.find to
+    jump between candidates instead of splitting the whole text.
+    """
+    key = "\n" + prefix
+    if text.startswith(prefix):
+        start = 0
+    else:
+        start = text.find(key) + 1
+        if start == 0:
+            return
+    while True:
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        yield text[start:line_end]
+        start = text.find(key, line_end) + 1
+        if start == 0:
+            return
+
+
+def _parse_sample_line(line: str, name: str) -> Optional[Tuple[str, float]]:
+    """
+    Parse a `name{labels} value [timestamp]` line already known to start
+    with `name`. Returns None if the line belongs to a longer metric name or
+    cannot be parsed.
+    """
+    rest = line[len(name) :]
+    model = ""
+    if rest.startswith("{"):
+        labels_end = rest.rfind("}")
+        if labels_end == -1:
+            return None
+        labels = rest[1:labels_end]
+        rest = rest[labels_end + 1 :]
+        model_start = labels.find('model_name="')
+        # Skip the labels whose name only ends with model_name
+        while model_start > 0 and labels[model_start - 1] != ",":
+            model_start = labels.find('model_name="', model_start + 1)
+        if model_start != -1:
+            model_start += len('model_name="')
+            model = labels[model_start : labels.find('"', model_start)]
+    elif not rest[:1].isspace():
+        return None
+    try:
+        return model, float(rest.split(None, 1)[0])
+    except (IndexError, ValueError):
+        return None
+
+
+class InflightCounters:
+    """
+    Number of requests in flight from the router to each serving engine.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def get(self, url: str) -> int:
+        return self.counts.get(url, 0)
+
+    def add(self, url: str, delta: int):
+        count = self.counts.get(url, 0) + delta
+        if count:
+            self.counts[url] = count
+        else:
+            del self.counts[url]
+
 
 class EngineStatsScraper(metaclass=SingletonMeta):
-    def __init__(self, scrape_interval: float):
+    def __init__(
+        self,
+        scrape_interval: float,
+        push_ttl: Optional[float] = None,
+        inflight_counters: Optional[InflightCounters] = None,
+        coordinator: Optional["CoordinatorLink"] = None,
+    ):
         """
         Initialize the scraper to periodically fetch metrics from all serving engines.
 
+        Engines (or their sidecars) may also push their stats to the router
+        when push_ttl is set. A pushed report overrides the scraped stats of
+        its engine for push_ttl seconds, and engines with a fresh pushed
+        report are not polled. Polling takes over again once the pushes stop.
+
+        Between two reports of an engine, the router also counts the requests
+        it dispatched to that engine and the ones that finished, so that
+        get_engine_stats() reflects its own routing decisions right away
+        (see EngineStats.effective_load). The count restarts from the
+        router's in-flight requests every time a new report is collected.
+
         Args:
             scrape_interval (float): The interval in seconds
                 to scrape the metrics.
+            push_ttl (Optional[float]): How long in seconds a pushed report
+                stays valid. None disables pushed stats.
+            inflight_counters (Optional[InflightCounters]): Where to count
+                the requests in flight to each engine, e.g. counters shared
+                by several router processes. Defaults to local counters.
+            coordinator (Optional[CoordinatorLink]): In a router worker, the
+                coordinator that scrapes the engines and receives the pushed
+                stats on behalf of all the workers. The scraper then only
+                counts the requests of the worker.
 
         Raises:
             ValueError: if the service discover module is have
@@ -110,10 +304,25 @@ class EngineStatsScraper(metaclass=SingletonMeta):
         self.engine_stats_lock = threading.Lock()
         self.scrape_interval = scrape_interval
 
+        # Pushed stats: engine url -> (receive timestamp, stats)
+        self.push_ttl = push_ttl
+        self.pushed_engine_stats: Dict[str, Tuple[float, EngineStats]] = {}
+
+        # Requests in flight from the router to each engine, and their number
+        # when the current scraped (resp. pushed) stats were collected
+        self.router_inflight = inflight_counters or InflightCounters()
+        self.scraped_router_inflight: Dict[str, int] = {}
+        self.pushed_router_inflight: Dict[str, int] = {}
+
         # scrape thread
+        self.coordinator = coordinator
         self.running = True
-        self.scrape_thread = threading.Thread(target=self._scrape_worker, daemon=True)
-        self.scrape_thread.start()
+        self.scrape_thread = None
+        if coordinator is None:
+            self.scrape_thread = threading.Thread(
+                target=self._scrape_worker, daemon=True
+            )
+            self.scrape_thread.start()
         self._initialized = True
 
     def _scrape_one_endpoint(self, url: str):
@@ -143,20 +352,98 @@ class EngineStatsScraper(metaclass=SingletonMeta):
         """
         collected_engine_stats = {}
         endpoints = get_service_discovery().get_endpoint_info()
-        logger.info(f"Scraping metrics from {len(endpoints)} serving engine(s)")
+        pushed_urls = self._get_fresh_pushed_urls(time.time())
+        logger.info(
+            f"Scraping metrics from {len(endpoints)} serving engine(s), "
+            f"{len(pushed_urls)} of them pushing their stats"
+        )
         for info in endpoints:
             url = info.url
-            engine_stats = self._scrape_one_endpoint(url)
+            if url in pushed_urls:
+                # Keep the last scraped stats as a fallback for this engine
+                with self.engine_stats_lock:
+                    engine_stats = self.engine_stats.get(url)
+                    router_inflight = self.scraped_router_inflight.get(url, 0)
+            else:
+                # The engine's answer accounts for the requests sent so far
+                with self.engine_stats_lock:
+                    router_inflight = self.router_inflight.get(url)
+                engine_stats = self._scrape_one_endpoint(url)
             if engine_stats:
-                collected_engine_stats[url] = engine_stats
+                collected_engine_stats[url] = (engine_stats, router_inflight)
 
         with self.engine_stats_lock:
             old_urls = list(self.engine_stats.keys())
             for old_url in old_urls:
                 if old_url not in collected_engine_stats:
                     del self.engine_stats[old_url]
-            for url, stats in collected_engine_stats.items():
+                    self.scraped_router_inflight.pop(old_url, None)
+            for url, (stats, router_inflight) in collected_engine_stats.items():
                 self.engine_stats[url] = stats
+                self.scraped_router_inflight[url] = router_inflight
+            for url in list(self.pushed_engine_stats.keys()):
+                if url not in pushed_urls:
+                    del self.pushed_engine_stats[url]
+                    self.pushed_router_inflight.pop(url, None)
+
+    def _get_fresh_pushed_urls(self, current_time: float) -> Set[str]:
+        """
+        Get the URLs of the engines whose pushed stats have not expired.
+        """
+        if self.push_ttl is None:
+            return set()
+        with self.engine_stats_lock:
+            return {
+                url
+                for url, (timestamp, _) in self.pushed_engine_stats.items()
+                if current_time - timestamp <= self.push_ttl
+            }
+
+    def on_engine_stats_pushed(
+        self, url: str, engine_stats: EngineStats, timestamp: float
+    ):
+        """
+        Record the stats pushed by (or on behalf of) a serving engine.
+
+        Args:
+            url (str): The URL of the serving engine (does not contain endpoint)
+            engine_stats (EngineStats): The pushed stats
+            timestamp (float): The time when the router received the stats
+
+        Raises:
+            ValueError: if pushed stats are disabled
+        """
+        if self.push_ttl is None:
+            raise ValueError("Pushed engine stats are not enabled")
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "engine_stats", "on_engine_stats_pushed", url, engine_stats, timestamp
+            )
+            return
+        with self.engine_stats_lock:
+            self.pushed_engine_stats[url] = (timestamp, engine_stats)
+            self.pushed_router_inflight[url] = self.router_inflight.get(url)
+
+    def on_request_dispatched(self, url: str):
+        """
+        Count a request the router just sent to a serving engine.
+
+        Args:
+            url (str): The URL of the serving engine (does not contain endpoint)
+        """
+        with self.engine_stats_lock:
+            self.router_inflight.add(url, 1)
+
+    def on_request_finished(self, url: str):
+        """
+        Count a request to a serving engine that completed, failed or was
+        aborted. Must be called once for every on_request_dispatched call.
+
+        Args:
+            url (str): The URL of the serving engine (does not contain endpoint)
+        """
+        with self.engine_stats_lock:
+            self.router_inflight.add(url, -1)
 
     def _sleep_or_break(self, check_interval: float = 1):
         """
@@ -181,15 +468,53 @@ class EngineStatsScraper(metaclass=SingletonMeta):
             self._scrape_metrics()
             self._sleep_or_break()
 
+    def get_collected_engine_stats(self) -> Dict[str, Tuple[EngineStats, int]]:
+        """
+        Retrieve the last collected stats of each engine, with the number of
+        requests the router had in flight to it when they were collected.
+
+        Fresh pushed stats take precedence over the scraped ones.
+
+        Returns:
+            A dictionary mapping engine URLs to their EngineStats and
+            in-flight count.
+        """
+        if self.coordinator is not None:
+            return self.coordinator.get("engine_stats", {})
+        with self.engine_stats_lock:
+            engine_stats = {}
+            for url, stats in self.engine_stats.items():
+                engine_stats[url] = (stats, self.scraped_router_inflight.get(url, 0))
+            if self.pushed_engine_stats:
+                current_time = time.time()
+                for url, (timestamp, stats) in self.pushed_engine_stats.items():
+                    if current_time - timestamp <= self.push_ttl:
+                        engine_stats[url] = (
+                            stats,
+                            self.pushed_router_inflight.get(url, 0),
+                        )
+            return engine_stats
+
     def get_engine_stats(self) -> Dict[str, EngineStats]:
         """
         Retrieve a copy of the current engine statistics.
 
+        Fresh pushed stats take precedence over the scraped ones. The
+        router_inflight_delta of each engine accounts for the requests
+        dispatched and finished since its stats were collected.
+
         Returns:
             A dictionary mapping engine URLs to their respective EngineStats objects.
         """
+        engine_stats = {}
+        collected_engine_stats = self.get_collected_engine_stats()
         with self.engine_stats_lock:
-            return self.engine_stats.copy()
+            for url, (stats, router_inflight) in collected_engine_stats.items():
+                delta = self.router_inflight.get(url) - router_inflight
+                engine_stats[url] = (
+                    replace(stats, router_inflight_delta=delta) if delta else stats
+                )
+        return engine_stats
 
     def get_health(self) -> bool:
         """
@@ -199,6 +524,10 @@ class EngineStatsScraper(metaclass=SingletonMeta):
             bool: True if the EngineStatsScraper is healthy,
                 False otherwise
         """
+        if self.coordinator is not None:
+            return self.coordinator.is_fresh() and self.coordinator.get(
+                "engine_stats_scraper_health", False
+            )
         return self.scrape_thread.is_alive()
 
     def close(self):
@@ -206,11 +535,17 @@ class EngineStatsScraper(metaclass=SingletonMeta):
         Stop the background thread and cleanup resources.
         """
         self.running = False
-        self.scrape_thread.join()
+        if self.scrape_thread is not None:
+            self.scrape_thread.join()
 
 
-def initialize_engine_stats_scraper(scrape_interval: float) -> EngineStatsScraper:
-    return EngineStatsScraper(scrape_interval)
+def initialize_engine_stats_scraper(
+    scrape_interval: float,
+    push_ttl: Optional[float] = None,
+    inflight_counters: Optional[InflightCounters] = None,
+    coordinator: Optional["CoordinatorLink"] = None,
+) -> EngineStatsScraper:
+    return EngineStatsScraper(scrape_interval, push_ttl, inflight_counters, coordinator)
 
 
 def get_engine_stats_scraper() -> EngineStatsScraper:
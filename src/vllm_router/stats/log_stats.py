@@ -73,6 +73,7 @@ def log_stats(app: FastAPI, interval: int = 10):
                 logstr += (
                     f" Engine Stats: Running Requests: {es.num_running_requests}, "
                     f"Queued Requests: {es.num_queuing_requests}, "
+                    f"Effective Load: {es.effective_load}, "
                     f"GPU Cache Hit Rate: {es.gpu_prefix_cache_hit_rate:.2f}\n"
                 )
                 gpu_prefix_cache_hit_rate.labels(server=url).set(
@@ -96,6 +97,7 @@ def log_stats(app: FastAPI, interval: int = 10):
                     f"Decoding Requests: {rs.in_decoding_requests}, "
                     f"Swapped Requests: {rs.num_swapped_requests}, "
                     f"Finished: {rs.finished_requests}, "
+                    f"Aborted: {rs.aborted_requests}, "
                     f"Uptime: {rs.uptime:.2f} sec\n"
                 )
                 current_qps.labels(server=url).set(rs.qps)
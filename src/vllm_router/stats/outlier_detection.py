@@ -0,0 +1,283 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Passive outlier detection of the serving engines.
+
+The errors and TTFT of the proxied requests, as recorded by the
+RequestStatsMonitor, are evaluated every few seconds. An engine that fails
+too many requests, or whose TTFT is far above the one of its peers serving
+the same models, is ejected from routing for an ejection time that doubles
+every time it is ejected again. At most a percentage of the engines serving
+the same models is ejected at once.
+"""
+
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from vllm_router.log import init_logger
+from vllm_router.service_discovery import EndpointInfo
+from vllm_router.services.metrics_service import engine_ejected, engine_ejections_total
+from vllm_router.stats.request_stats import RequestStats, get_request_stats_monitor
+from vllm_router.utils import SingletonMeta
+
+if TYPE_CHECKING:
+    from vllm_router.workers import CoordinatorLink
+
+logger = init_logger(__name__)
+
+
+@dataclass
+class _EjectionState:
+    # Number of consecutive ejections, sets the length of the next one
+    num_ejections: int = 0
+    # Time (time.monotonic()) at which the current ejection ends, if ejected
+    ejected_until: Optional[float] = None
+    # Time (time.monotonic()) at which the last ejection ended
+    returned_at: Optional[float] = None
+
+
+class OutlierDetector(metaclass=SingletonMeta):
+    # Requests ended in the sliding window needed to judge the error rate or
+    # the TTFT of an engine
+    MIN_REQUESTS = 10
+    # Engines with a TTFT needed to compare the TTFT of an engine to its peers
+    MIN_TTFT_PEERS = 2
+
+    def __init__(
+        self,
+        consecutive_errors: int = None,
+        error_rate: float = None,
+        ttft_factor: float = None,
+        base_ejection_time: float = None,
+        max_ejection_time: float = 300.0,
+        max_ejection_percent: float = 50.0,
+        interval: float = 1.0,
+        coordinator: Optional["CoordinatorLink"] = None,
+    ):
+        """
+        Args:
+            consecutive_errors (int): The number of requests failed in a row
+                that ejects an engine
+            error_rate (float): The error rate in the request stats window
+                that ejects an engine, in (0, 1]
+            ttft_factor (float): An engine whose average TTFT is above this
+                factor times the median TTFT of the other engines is ejected
+            base_ejection_time (float): The time in seconds of a first
+                ejection. Each consecutive ejection doubles it.
+            max_ejection_time (float): The maximum time in seconds of an
+                ejection
+            max_ejection_percent (float): The maximum percentage of the
+                engines ejected at once. One engine can always be ejected if
+                there are at least two.
+            interval (float): The minimum time in seconds between two
+                evaluations of the engines
+            coordinator (Optional[CoordinatorLink]): In a router worker, the
+                coordinator that evaluates the engines for all the workers.
+                The ejected engines are then the ones it publishes.
+        """
+        if hasattr(self, "_initialized"):
+            return
+        if (
+            consecutive_errors is None
+            or error_rate is None
+            or ttft_factor is None
+            or base_ejection_time is None
+        ):
+            raise ValueError(
+                "OutlierDetector must be initialized with consecutive_errors, "
+                "error_rate, ttft_factor and base_ejection_time"
+            )
+        self.consecutive_errors = consecutive_errors
+        self.error_rate = error_rate
+        self.ttft_factor = ttft_factor
+        self.base_ejection_time = base_ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.max_ejection_percent = max_ejection_percent
+        self.interval = interval
+        self.coordinator = coordinator
+        self.states: Dict[str, _EjectionState] = {}
+        self.ejected: set = set()
+        self.last_evaluation = 0.0
+        self._initialized = True
+
+    def _find_outlier_reason(
+        self, url: str, stats: RequestStats, ttft_peers: Dict[str, float]
+    ) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: Why the engine is an outlier, None if it is not
+        """
+        if stats.consecutive_errors >= self.consecutive_errors:
+            return "consecutive_errors"
+        if stats.requests_in_window < self.MIN_REQUESTS:
+            return None
+        if stats.error_rate >= self.error_rate:
+            return "error_rate"
+        peers = [ttft for peer, ttft in ttft_peers.items() if peer != url]
+        if stats.ttft > 0 and len(peers) >= self.MIN_TTFT_PEERS:
+            if stats.ttft > self.ttft_factor * statistics.median(peers):
+                return "ttft"
+        return None
+
+    def _eject(self, url: str, reason: str, now: float):
+        state = self.states.setdefault(url, _EjectionState())
+        # An engine that stayed healthy for the maximum ejection time starts
+        # again from the base ejection time
+        if (
+            state.returned_at is not None
+            and now - state.returned_at > self.max_ejection_time
+        ):
+            state.num_ejections = 0
+        ejection_time = min(
+            self.max_ejection_time, self.base_ejection_time * 2**state.num_ejections
+        )
+        state.num_ejections += 1
+        state.ejected_until = now + ejection_time
+        self.ejected.add(url)
+        engine_ejected.labels(server=url).set(1)
+        engine_ejections_total.labels(server=url, reason=reason).inc()
+        logger.warning(
+            f"Ejecting engine {url} for {ejection_time:.1f}s ({reason}, "
+            f"ejection {state.num_ejections})"
+        )
+
+    def _return(self, url: str, now: float):
+        state = self.states[url]
+        state.ejected_until = None
+        state.returned_at = now
+        self.ejected.discard(url)
+        engine_ejected.labels(server=url).set(0)
+        # Judge the engine on its new requests only
+        get_request_stats_monitor().reset_health_stats(url)
+        logger.info(f"Engine {url} is back in routing after its ejection")
+
+    def evaluate(
+        self, engines: List[EndpointInfo], request_stats: Dict[str, RequestStats]
+    ):
+        """
+        Return the engines whose ejection ended to routing, and eject the
+        outlier engines.
+
+        The engines are judged against the engines serving the same models,
+        e.g. an engine serving a larger model is not ejected for its TTFT.
+
+        Args:
+            engines (List[EndpointInfo]): The serving engines
+            request_stats (Dict[str, RequestStats]): The request statistics
+                of the engines
+        """
+        now = time.monotonic()
+        self.last_evaluation = now
+        for url in list(self.ejected):
+            if self.states[url].ejected_until <= now:
+                self._return(url, now)
+
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for info in engines:
+            groups.setdefault(tuple(sorted(info.model_names)), []).append(info.url)
+        for urls in groups.values():
+            self._evaluate_group(urls, request_stats, now)
+
+    def _evaluate_group(
+        self, urls: List[str], request_stats: Dict[str, RequestStats], now: float
+    ):
+        """Eject the outliers of engines serving the same models."""
+        if len(urls) < 2:
+            return
+        max_ejected = max(1, math.floor(len(urls) * self.max_ejection_percent / 100))
+        num_ejected = sum(1 for url in urls if url in self.ejected)
+        group_stats = {url: request_stats[url] for url in urls if url in request_stats}
+        ttft_peers = {
+            url: stats.ttft
+            for url, stats in group_stats.items()
+            if stats.ttft > 0
+            and url not in self.ejected
+            and stats.requests_in_window >= self.MIN_REQUESTS
+        }
+        for url, stats in group_stats.items():
+            if num_ejected >= max_ejected:
+                break
+            if url in self.ejected:
+                continue
+            reason = self._find_outlier_reason(url, stats, ttft_peers)
+            if reason is not None:
+                self._eject(url, reason, now)
+                num_ejected += 1
+
+    def get_ejected(
+        self, engines: List[EndpointInfo], request_stats: Dict[str, RequestStats]
+    ) -> Set[str]:
+        """
+        Get the URLs of the ejected engines, after evaluating the engines if
+        the last evaluation is older than the interval.
+
+        Args:
+            engines (List[EndpointInfo]): The serving engines
+            request_stats (Dict[str, RequestStats]): The request statistics
+                of the engines
+        """
+        if self.coordinator is not None:
+            return self.coordinator.get("ejected_engines", set())
+        if time.monotonic() - self.last_evaluation >= self.interval:
+            self.evaluate(engines, request_stats)
+        return self.ejected
+
+    def filter_endpoints(
+        self,
+        endpoints: List[EndpointInfo],
+        engines: List[EndpointInfo],
+        request_stats: Dict[str, RequestStats],
+    ) -> List[EndpointInfo]:
+        """
+        Remove the ejected engines from the candidates of a request.
+
+        If all the candidates are ejected, they are all kept.
+
+        Args:
+            endpoints (List[EndpointInfo]): The candidate engines
+            engines (List[EndpointInfo]): The serving engines
+            request_stats (Dict[str, RequestStats]): The request statistics
+                of the engines
+        """
+        ejected = self.get_ejected(engines, request_stats)
+        if not ejected:
+            return endpoints
+        available = [info for info in endpoints if info.url not in ejected]
+        return available or endpoints
+
+
+def initialize_outlier_detector(
+    consecutive_errors: int,
+    error_rate: float,
+    ttft_factor: float,
+    base_ejection_time: float,
+    max_ejection_percent: float,
+    coordinator: Optional["CoordinatorLink"] = None,
+) -> OutlierDetector:
+    return OutlierDetector(
+        consecutive_errors,
+        error_rate,
+        ttft_factor,
+        base_ejection_time,
+        max_ejection_percent=max_ejection_percent,
+        coordinator=coordinator,
+    )
+
+
+def get_outlier_detector() -> Optional[OutlierDetector]:
+    # Outlier detection is optional, return None if it was not initialized
+    return OutlierDetector(_create=False)
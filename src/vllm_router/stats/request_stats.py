@@ -14,10 +14,13 @@
 import time
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict, Tuple
+from typing import TYPE_CHECKING, Deque, Dict, Optional, Tuple
 
 from vllm_router.log import init_logger
 
+if TYPE_CHECKING:
+    from vllm_router.workers import CoordinatorLink
+
 logger = init_logger(__name__)
 
 
@@ -53,6 +56,15 @@ class RequestStats:
     avg_itl: float
     # Number of swapped requests (moved from GPU to CPU)
     num_swapped_requests: int
+    # Fraction of the requests that failed (connection error or 5xx) in the
+    # sliding window, -1 if no request ended in the sliding window
+    error_rate: float = -1
+    # Number of requests that ended (completed or failed) in the sliding window
+    requests_in_window: int = 0
+    # Number of requests that failed in a row
+    consecutive_errors: int = 0
+    # Total number of requests aborted because their client disconnected
+    aborted_requests: int = 0
 
 
 class MovingAverageMonitor:
@@ -112,7 +124,18 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
     # arrived requests in the sliding window, but the inter_token_latency and
     # ttft are calculated based on the number of completed requests in the
     # sliding window.
-    def __init__(self, sliding_window_size: float = None):
+    def __init__(
+        self,
+        sliding_window_size: float = None,
+        coordinator: Optional["CoordinatorLink"] = None,
+    ):
+        """
+        Args:
+            sliding_window_size: The size in seconds of the sliding window
+            coordinator: In a router worker, the coordinator that monitors
+                the requests of all the workers. The events are then forwarded
+                to it, and the statistics are the ones it publishes.
+        """
         if hasattr(self, "_initialized"):
             return
         if sliding_window_size is None:
@@ -120,6 +143,7 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
                 "RequestStatsMonitor must be initialized with sliding_window_size"
             )
         self.sliding_window_size = sliding_window_size
+        self.coordinator = coordinator
         self.qps_monitors: Dict[str, MovingAverageMonitor] = {}
         self.ttft_monitors: Dict[str, MovingAverageMonitor] = {}
 
@@ -132,6 +156,7 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
         self.in_prefill_requests: Dict[str, int] = {}
         self.in_decoding_requests: Dict[str, int] = {}
         self.finished_requests: Dict[str, int] = {}
+        self.aborted_requests: Dict[str, int] = {}
         # New monitors for overall latency and decoding length
         self.latency_monitors: Dict[str, MovingAverageMonitor] = {}
         self.decoding_length_monitors: Dict[str, MovingAverageMonitor] = {}
@@ -139,6 +164,11 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
         # Counter for swapped requests
         self.swapped_requests: Dict[str, int] = {}
 
+        # Failures (1) and successes (0) of the requests, and the number of
+        # requests that failed in a row
+        self.error_monitors: Dict[str, MovingAverageMonitor] = {}
+        self.consecutive_errors: Dict[str, int] = {}
+
         self.first_query_time: float = None
         self._initialized = True
 
@@ -151,6 +181,11 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             request_id: The global request ID
             timestamp: the timestamp when the request was created
         """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats", "on_new_request", engine_url, request_id, timestamp
+            )
+            return
         self.request_start_time[(engine_url, request_id)] = timestamp
 
         if engine_url not in self.in_prefill_requests:
@@ -180,6 +215,15 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             request_id: The global request ID
             timestamp: The timestamp when the response token was received
         """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats",
+                "on_request_response",
+                engine_url,
+                request_id,
+                timestamp,
+            )
+            return
         if (engine_url, request_id) not in self.request_start_time:
             return
         # Record first token time (do not pop so we can compute overall latency later)
@@ -209,18 +253,123 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             request_id: The global request ID
             timestamp: The timestamp when the request was completed
         """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats",
+                "on_request_complete",
+                engine_url,
+                request_id,
+                timestamp,
+            )
+            return
         if engine_url not in self.finished_requests:
             self.finished_requests[engine_url] = 0
-        self.in_decoding_requests[engine_url] = max(
-            0, self.in_decoding_requests.get(engine_url, 1) - 1
-        )
+        key = (engine_url, request_id)
+        if key in self.request_start_time and key not in self.first_token_time:
+            # Completed without a response token, e.g. an empty response
+            self.in_prefill_requests[engine_url] = max(
+                0, self.in_prefill_requests.get(engine_url, 1) - 1
+            )
+        else:
+            self.in_decoding_requests[engine_url] = max(
+                0, self.in_decoding_requests.get(engine_url, 1) - 1
+            )
         self.finished_requests[engine_url] += 1
 
-        if request_start_time := self.request_start_time.get((engine_url, request_id)):
+        self.first_token_time.pop(key, None)
+        if request_start_time := self.request_start_time.pop(key, None):
             self.latency_monitors[engine_url].update(
                 timestamp, time.time() - request_start_time
             )
 
+    def on_request_aborted(
+        self,
+        engine_url: str,
+        request_id: str,
+        timestamp: float,
+        client_disconnected: bool = False,
+    ):
+        """
+        Tell the monitor that a request ended before completing, e.g. it
+        failed, the client went away or a hedged copy answered first.
+
+        Args:
+            engine_url: The URL of the serving engine
+            request_id: The global request ID
+            timestamp: The timestamp when the request was aborted
+            client_disconnected: True if the request was aborted because its
+                client disconnected
+        """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats",
+                "on_request_aborted",
+                engine_url,
+                request_id,
+                timestamp,
+                client_disconnected,
+            )
+            return
+        key = (engine_url, request_id)
+        if key not in self.request_start_time:
+            return
+        if client_disconnected:
+            self.aborted_requests[engine_url] = (
+                self.aborted_requests.get(engine_url, 0) + 1
+            )
+        if self.first_token_time.pop(key, None) is not None:
+            self.in_decoding_requests[engine_url] = max(
+                0, self.in_decoding_requests.get(engine_url, 1) - 1
+            )
+        else:
+            self.in_prefill_requests[engine_url] = max(
+                0, self.in_prefill_requests.get(engine_url, 1) - 1
+            )
+        del self.request_start_time[key]
+
+    def on_request_result(self, engine_url: str, timestamp: float, is_error: bool):
+        """
+        Tell the monitor whether a request that ended succeeded or failed.
+        Requests cancelled by the router or the client are not reported.
+
+        Args:
+            engine_url: The URL of the serving engine
+            timestamp: The timestamp when the request ended
+            is_error: True if the engine could not be reached or answered
+                with a 5xx status
+        """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats", "on_request_result", engine_url, timestamp, is_error
+            )
+            return
+        if engine_url not in self.error_monitors:
+            self.error_monitors[engine_url] = MovingAverageMonitor(
+                self.sliding_window_size
+            )
+        self.error_monitors[engine_url].update(timestamp, 1 if is_error else 0)
+        if is_error:
+            self.consecutive_errors[engine_url] = (
+                self.consecutive_errors.get(engine_url, 0) + 1
+            )
+        else:
+            self.consecutive_errors[engine_url] = 0
+
+    def reset_health_stats(self, engine_url: str):
+        """
+        Forget the errors and TTFT of an engine, e.g. when it comes back from
+        an ejection, so that it is judged on its new requests only.
+
+        Args:
+            engine_url: The URL of the serving engine
+        """
+        if self.coordinator is not None:
+            self.coordinator.send("request_stats", "reset_health_stats", engine_url)
+            return
+        self.error_monitors.pop(engine_url, None)
+        self.consecutive_errors.pop(engine_url, None)
+        self.ttft_monitors.pop(engine_url, None)
+
     def on_request_swapped(self, engine_url: str, request_id: str, timestamp: float):
         # This function should be called if a request is determined to be swapped from GPU to CPU.
         """
@@ -231,6 +380,11 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             request_id: The global request ID
             timestamp: The timestamp when the request was swapped
         """
+        if self.coordinator is not None:
+            self.coordinator.send(
+                "request_stats", "on_request_swapped", engine_url, request_id, timestamp
+            )
+            return
         if engine_url not in self.swapped_requests:
             self.swapped_requests[engine_url] = 0
         self.swapped_requests[engine_url] += 1
@@ -248,6 +402,8 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             The TTFT and inter token latency will be -1 if there is no requests
             finished in the sliding window.
         """
+        if self.coordinator is not None:
+            return self.coordinator.get("request_stats", {})
         ret = {}
         urls = set(self.in_prefill_requests.keys()).union(
             set(self.in_decoding_requests.keys())
@@ -289,6 +445,14 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
             else:
                 swapped = 0
 
+            if engine_url in self.error_monitors:
+                self.error_monitors[engine_url].update_no_value(current_time)
+                error_rate = self.error_monitors[engine_url].get_average()
+                requests_in_window = len(self.error_monitors[engine_url].values)
+            else:
+                error_rate = -1
+                requests_in_window = 0
+
             ret[engine_url] = RequestStats(
                 qps=qps,
                 ttft=ttft,
@@ -302,12 +466,18 @@ class RequestStatsMonitor(metaclass=SingletonMeta):
                 avg_latency=avg_lat,
                 avg_itl=avg_itl_val,
                 num_swapped_requests=swapped,
+                error_rate=error_rate,
+                requests_in_window=requests_in_window,
+                consecutive_errors=self.consecutive_errors.get(engine_url, 0),
+                aborted_requests=self.aborted_requests.get(engine_url, 0),
             )
         return ret
 
 
-def initialize_request_stats_monitor(sliding_window_size: float):
-    return RequestStatsMonitor(sliding_window_size)
+def initialize_request_stats_monitor(
+    sliding_window_size: float, coordinator: Optional["CoordinatorLink"] = None
+):
+    return RequestStatsMonitor(sliding_window_size, coordinator)
 
 
 def get_request_stats_monitor():
@@ -0,0 +1,184 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+
+import psutil
+from prometheus_client import Gauge
+
+from vllm_router.log import init_logger
+from vllm_router.service_discovery import get_service_discovery
+from vllm_router.services.metrics_service import (
+    avg_decoding_length,
+    avg_itl,
+    avg_latency,
+    current_qps,
+    gpu_prefix_cache_hit_rate,
+    gpu_prefix_cache_hits_total,
+    gpu_prefix_cache_queries_total,
+    healthy_pods_total,
+    num_decoding_requests,
+    num_prefill_requests,
+    num_requests_running,
+    num_requests_swapped,
+)
+from vllm_router.stats.engine_stats import get_engine_stats_scraper
+from vllm_router.stats.request_stats import get_request_stats_monitor
+from vllm_router.utils import SingletonMeta
+
+logger = init_logger(__name__)
+
+# Define Gauges for system resource usage
+router_cpu_usage_percent = Gauge(
+    "router_cpu_usage_percent",
+    "CPU usage percent",
+    multiprocess_mode="mostrecent",
+)
+router_memory_usage_percent = Gauge(
+    "router_memory_usage_percent",
+    "Memory usage percent",
+    multiprocess_mode="mostrecent",
+)
+router_disk_usage_percent = Gauge(
+    "router_disk_usage_percent",
+    "Disk usage percent",
+    multiprocess_mode="mostrecent",
+)
+
+
+class RouterMetricsCollector(metaclass=SingletonMeta):
+    def __init__(self, collect_interval: float):
+        """
+        Initialize the collector that periodically refreshes the router's
+        Prometheus gauges in the background.
+
+        The /metrics endpoint then only serializes the current values, so a
+        Prometheus scrape neither blocks the event loop on system sampling
+        nor recomputes the request and engine statistics.
+
+        Args:
+            collect_interval (float): The interval in seconds between two
+                refreshes of the gauges.
+        """
+        # Allow multiple calls but require the first call provide collect_interval.
+        if hasattr(self, "_initialized"):
+            return
+        if collect_interval is None:
+            raise ValueError(
+                "RouterMetricsCollector must be initialized with collect_interval"
+            )
+        self.collect_interval = collect_interval
+        # The first call of psutil.cpu_percent without interval always
+        # returns 0, it only starts the measurement window.
+        psutil.cpu_percent(interval=None)
+
+        self.running = True
+        self.stop_event = threading.Event()
+        self.collect_thread = threading.Thread(target=self._collect_worker, daemon=True)
+        self.collect_thread.start()
+        self._initialized = True
+
+    def _collect_system_metrics(self):
+        """
+        Refresh the CPU, memory and disk usage gauges of the router.
+        """
+        # CPU usage since the previous call, without sleeping
+        router_cpu_usage_percent.set(psutil.cpu_percent(interval=None))
+        router_memory_usage_percent.set(psutil.virtual_memory().percent)
+        # Disk utilization on root filesystem
+        router_disk_usage_percent.set(psutil.disk_usage("/").percent)
+
+    def _collect_router_metrics(self):
+        """
+        Refresh the per-engine request, engine and health gauges.
+        """
+        stats = get_request_stats_monitor().get_request_stats(time.time())
+        for server, stat in stats.items():
+            current_qps.labels(server=server).set(stat.qps)
+            avg_decoding_length.labels(server=server).set(stat.avg_decoding_length)
+            num_prefill_requests.labels(server=server).set(stat.in_prefill_requests)
+            num_decoding_requests.labels(server=server).set(stat.in_decoding_requests)
+            num_requests_running.labels(server=server).set(
+                stat.in_prefill_requests + stat.in_decoding_requests
+            )
+            avg_latency.labels(server=server).set(stat.avg_latency)
+            avg_itl.labels(server=server).set(stat.avg_itl)
+            num_requests_swapped.labels(server=server).set(stat.num_swapped_requests)
+
+        # Engine statistics (GPU prefix cache metrics)
+        engine_stats = get_engine_stats_scraper().get_engine_stats()
+        for server, engine_stat in engine_stats.items():
+            gpu_prefix_cache_hit_rate.labels(server=server).set(
+                engine_stat.gpu_prefix_cache_hit_rate
+            )
+            gpu_prefix_cache_hits_total.labels(server=server).set(
+                engine_stat.gpu_prefix_cache_hits_total
+            )
+            gpu_prefix_cache_queries_total.labels(server=server).set(
+                engine_stat.gpu_prefix_cache_queries_total
+            )
+
+        # Service discovery health status
+        endpoints = get_service_discovery().get_endpoint_info()
+        for ep in endpoints:
+            healthy_pods_total.labels(server=ep.url).set(
+                1 if getattr(ep, "healthy", True) else 0
+            )
+
+    def collect(self):
+        """
+        Refresh all the gauges once.
+        """
+        self._collect_system_metrics()
+        self._collect_router_metrics()
+
+    def _collect_worker(self):
+        """
+        Refresh the gauges every self.collect_interval seconds until closed.
+        """
+        while self.running:
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"Failed to collect router metrics: {e}")
+            self.stop_event.wait(self.collect_interval)
+
+    def get_health(self) -> bool:
+        """
+        Check if the RouterMetricsCollector is healthy
+
+        Returns:
+            bool: True if the RouterMetricsCollector is healthy,
+                False otherwise
+        """
+        return self.collect_thread.is_alive()
+
+    def close(self):
+        """
+        Stop the background thread and cleanup resources.
+        """
+        self.running = False
+        self.stop_event.set()
+        self.collect_thread.join()
+
+
+def initialize_router_metrics_collector(
+    collect_interval: float,
+) -> RouterMetricsCollector:
+    return RouterMetricsCollector(collect_interval)
+
+
+def get_router_metrics_collector() -> RouterMetricsCollector:
+    # This call returns the already-initialized instance (or raises an error if not yet initialized)
+    return RouterMetricsCollector()
@@ -5,7 +5,7 @@ import re
 import resource
 from typing import Optional
 
-import requests
+import aiohttp
 from fastapi.requests import Request
 from starlette.datastructures import MutableHeaders
 
@@ -159,16 +159,30 @@ def update_content_length(request: Request, request_body: str):
     request._headers = headers
 
 
-def is_model_healthy(url: str, model: str, model_type: str) -> bool:
+async def is_model_healthy(
+    session: aiohttp.ClientSession, url: str, model: str, model_type: str
+) -> bool:
+    """
+    Check that a model works by sending a small request to its endpoint.
+
+    Args:
+        session (aiohttp.ClientSession): The session to send the request
+            with, which sets the timeout of the check
+        url (str): The URL of the serving engine
+        model (str): The name of the model
+        model_type (str): The type of the model, e.g. chat or embeddings
+
+    Returns:
+        bool: True if the engine answered with status 200
+    """
     model_details = ModelType[model_type]
     try:
-        response = requests.post(
+        async with session.post(
             f"{url}{model_details.value}",
             headers={"Content-Type": "application/json"},
             json={"model": model} | model_details.get_test_payload(model_type),
-            timeout=30,
-        )
+        ) as response:
+            return response.status == 200
     except Exception as e:
-        logger.error(e)
+        logger.error(f"Health check of {model} at {url} failed: {e}")
         return False
-    return response.status_code == 200
@@ -0,0 +1,574 @@
+# Copyright 2024-2025 The vLLM Production Stack Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Multi-process mode of the router.
+
+The parent process starts one coordinator process and the router workers,
+typically one per core. The workers accept connections on the same port,
+either through their own SO_REUSEPORT socket so that the kernel balances the
+connections, or through a socket shared with the parent where SO_REUSEPORT
+is not available.
+
+The coordinator runs the only service discovery, engine stats scraper,
+request stats monitor and outlier detector of the router. The workers
+forward their request events to it through a queue, and it publishes the
+resulting state (engines, engine and request stats, ejected engines) in
+shared memory every SNAPSHOT_INTERVAL seconds. The requests in flight to
+each engine, which feed EngineStats.effective_load, are counted in shared
+memory without going through the coordinator, in the slot that the
+coordinator assigned to the engine.
+
+The Prometheus metrics of all the processes are aggregated with the
+multiprocess mode of prometheus_client, so /metrics does not depend on the
+worker that serves it.
+"""
+
+import ctypes
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import queue
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from vllm_router.log import init_logger
+from vllm_router.service_discovery import get_service_discovery
+from vllm_router.stats.engine_stats import InflightCounters, get_engine_stats_scraper
+from vllm_router.stats.outlier_detection import get_outlier_detector
+from vllm_router.stats.request_stats import get_request_stats_monitor
+
+logger = init_logger(__name__)
+
+# Maximum number of engines whose in-flight requests are counted in shared
+# memory at once
+INFLIGHT_COUNTER_SLOTS = 1024
+# Time in seconds an engine must have left the service discovery, with no
+# request in flight, before its slot is given to another engine
+SLOT_RELEASE_DELAY = 60.0
+# Interval in seconds between two publications of the coordinator's state
+SNAPSHOT_INTERVAL = 0.05
+# Maximum size in bytes of a published state
+SNAPSHOT_MAX_SIZE = 16 * 1024 * 1024
+# A worker considers the coordinator down when its state is older than this
+SNAPSHOT_STALE_AFTER = 5.0
+# Time in seconds a worker waits for the first state of the coordinator
+COORDINATOR_START_TIMEOUT = 60.0
+
+# The methods the workers may call in the coordinator, by target component
+_COORDINATOR_EVENTS: Dict[str, Tuple[Callable[[], Any], Tuple[str, ...]]] = {
+    "request_stats": (
+        get_request_stats_monitor,
+        (
+            "on_new_request",
+            "on_request_response",
+            "on_request_complete",
+            "on_request_aborted",
+            "on_request_result",
+            "reset_health_stats",
+            "on_request_swapped",
+        ),
+    ),
+    "engine_stats": (get_engine_stats_scraper, ("on_engine_stats_pushed",)),
+    "service_discovery": (
+        get_service_discovery,
+        ("add_sleep_label", "remove_sleep_label"),
+    ),
+}
+
+
+class SharedInflightCounters(InflightCounters):
+    """
+    Requests in flight to each engine, summed over all the router workers.
+
+    The coordinator assigns a slot to each engine it discovers. Each worker
+    owns one column of a shared array and is the only one to write to it,
+    so no lock is needed between processes. Readers sum the columns of all
+    the workers.
+    """
+
+    def __init__(
+        self,
+        counts,
+        num_workers: int,
+        worker_id: Optional[int],
+        get_slots: Callable[[], Dict[str, int]],
+    ):
+        """
+        Args:
+            counts: The shared array created by create_shared_inflight_counts
+            num_workers (int): The number of router workers
+            worker_id (Optional[int]): The index of the current worker, None
+                in the coordinator, which only reads the counts
+            get_slots (Callable[[], Dict[str, int]]): Returns the current
+                slot of each engine URL
+        """
+        self.shared_counts = counts
+        self.num_workers = num_workers
+        self.worker_id = worker_id
+        self.get_slots = get_slots
+
+    def _offset(self, url: str) -> Optional[int]:
+        slot = self.get_slots().get(url)
+        return None if slot is None else slot * self.num_workers
+
+    def get(self, url: str) -> int:
+        offset = self._offset(url)
+        if offset is None:
+            return 0
+        return sum(self.shared_counts[offset : offset + self.num_workers])
+
+    def add(self, url: str, delta: int):
+        offset = self._offset(url)
+        if offset is None:
+            logger.debug(f"No in-flight counter slot for engine {url}")
+            return
+        self.shared_counts[offset + self.worker_id] += delta
+
+    def clear(self, slot: int):
+        """
+        Reset the counts of a released slot.
+        """
+        offset = slot * self.num_workers
+        for i in range(offset, offset + self.num_workers):
+            self.shared_counts[i] = 0
+
+
+def create_shared_inflight_counts(num_workers: int):
+    """
+    Allocate the shared memory of the in-flight counters. Must be called
+    before starting the workers.
+    """
+    return RawArray(ctypes.c_int64, INFLIGHT_COUNTER_SLOTS * num_workers)
+
+
+class SharedSnapshot:
+    """
+    A picklable state published by one process and read by the others
+    through shared memory.
+    """
+
+    def __init__(self, context, max_size: int = SNAPSHOT_MAX_SIZE):
+        """
+        Args:
+            context: The multiprocessing context of the processes
+            max_size (int): The maximum size in bytes of a pickled state
+        """
+        self.buffer = RawArray(ctypes.c_char, max_size)
+        self.length = RawValue(ctypes.c_int64, 0)
+        self.version = RawValue(ctypes.c_int64, 0)
+        self.lock = context.Lock()
+
+    def publish(self, state: Dict[str, Any]):
+        """
+        Raises:
+            ValueError: if the pickled state is larger than the buffer
+        """
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > len(self.buffer):
+            raise ValueError(
+                f"Coordinator state of {len(data)} bytes exceeds "
+                f"{len(self.buffer)} bytes"
+            )
+        with self.lock:
+            self.buffer[: len(data)] = data
+            self.length.value = len(data)
+            self.version.value += 1
+
+    def read(self, known_version: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Returns:
+            The version and the state, or None if the version is still
+            known_version
+        """
+        if self.version.value == known_version:
+            return None
+        with self.lock:
+            version = self.version.value
+            data = ctypes.string_at(ctypes.addressof(self.buffer), self.length.value)
+        return version, pickle.loads(data)
+
+
+class CoordinatorLink:
+    """
+    The connection of a router worker to the coordinator: forwards the
+    events of the worker and keeps a local copy of the published state, so
+    that reading it does not block the event loop.
+    """
+
+    def __init__(self, snapshot: SharedSnapshot, events, inboxes: List, worker_id: int):
+        """
+        Args:
+            snapshot (SharedSnapshot): The state published by the coordinator
+            events: The queue of the events sent to the coordinator
+            inboxes (List): The queues of the prefix affinity insertions sent
+                to each worker
+            worker_id (int): The index of the current worker
+        """
+        self.snapshot = snapshot
+        self.events = events
+        self.inboxes = inboxes
+        self.worker_id = worker_id
+        self.version = 0
+        self.state: Dict[str, Any] = {}
+        self.running = True
+        self.refresh_thread = threading.Thread(target=self._refresh_worker, daemon=True)
+
+    def _refresh(self):
+        update = self.snapshot.read(self.version)
+        if update is not None:
+            self.version, self.state = update
+
+    def _refresh_worker(self):
+        while self.running:
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.error(f"Failed to read the coordinator state: {e}")
+            time.sleep(SNAPSHOT_INTERVAL)
+
+    def start(self, timeout: float = COORDINATOR_START_TIMEOUT):
+        """
+        Wait for the first state of the coordinator and keep it up to date.
+
+        Raises:
+            RuntimeError: if the coordinator published no state in time
+        """
+        deadline = time.monotonic() + timeout
+        while self.version == 0:
+            if time.monotonic() > deadline:
+                raise RuntimeError("The router coordinator did not start in time")
+            time.sleep(SNAPSHOT_INTERVAL)
+            self._refresh()
+        self.refresh_thread.start()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value of the last state published by the coordinator.
+        """
+        return self.state.get(key, default)
+
+    def is_fresh(self) -> bool:
+        """
+        Check that the coordinator still publishes its state.
+        """
+        return time.time() - self.get("published_at", 0) <= SNAPSHOT_STALE_AFTER
+
+    def send(self, target: str, method: str, *args):
+        """
+        Call a method of a component of the coordinator. Does not block.
+
+        Args:
+            target (str): The component, a key of _COORDINATOR_EVENTS
+            method (str): The method to call
+            *args: The picklable arguments of the method
+        """
+        self.events.put((target, method, args))
+
+    def close(self):
+        self.running = False
+
+
+class Coordinator:
+    """
+    Publishes the state shared by the router workers and applies the events
+    they forward, in the coordinator process.
+    """
+
+    def __init__(self, snapshot: SharedSnapshot, events, counts, num_workers: int):
+        """
+        Args:
+            snapshot (SharedSnapshot): Where to publish the state
+            events: The queue of the events sent by the workers
+            counts: The shared array of the in-flight counters
+            num_workers (int): The number of router workers
+        """
+        self.snapshot = snapshot
+        self.events = events
+        # Engine URL -> slot of its in-flight counters. Replaced, never
+        # mutated, as the scraper thread reads it.
+        self.slots: Dict[str, int] = {}
+        self.free_slots: Deque[int] = deque(range(INFLIGHT_COUNTER_SLOTS))
+        self.last_seen: Dict[str, float] = {}
+        self.inflight_counters = SharedInflightCounters(
+            counts, num_workers, None, lambda: self.slots
+        )
+        self.running = True
+
+    def _assign_slots(self, urls: List[str], now: float):
+        """
+        Give a slot to the new engines, and release the slots of the engines
+        that left the service discovery a while ago with no request in
+        flight. Released slots are reused last.
+        """
+        slots = dict(self.slots)
+        for url in urls:
+            self.last_seen[url] = now
+            if url not in slots:
+                if not self.free_slots:
+                    logger.error(
+                        f"No in-flight counter slot left for engine {url}, "
+                        f"the router counts at most {INFLIGHT_COUNTER_SLOTS} engines"
+                    )
+                    continue
+                slots[url] = self.free_slots.popleft()
+        for url, slot in list(slots.items()):
+            if (
+                now - self.last_seen[url] > SLOT_RELEASE_DELAY
+                and self.inflight_counters.get(url) == 0
+            ):
+                del slots[url]
+                del self.last_seen[url]
+                self.inflight_counters.clear(slot)
+                self.free_slots.append(slot)
+        self.slots = slots
+
+    def _collect(self) -> Dict[str, Any]:
+        now = time.time()
+        service_discovery = get_service_discovery()
+        engine_stats_scraper = get_engine_stats_scraper()
+        endpoints = service_discovery.get_endpoint_info()
+        self._assign_slots([info.url for info in endpoints], now)
+        request_stats = get_request_stats_monitor().get_request_stats(now)
+        outlier_detector = get_outlier_detector()
+        return {
+            "published_at": now,
+            "endpoints": endpoints,
+            "aliases": getattr(service_discovery, "aliases", None),
+            "service_discovery_health": service_discovery.get_health(),
+            "slots": self.slots,
+            "engine_stats": engine_stats_scraper.get_collected_engine_stats(),
+            "engine_stats_scraper_health": engine_stats_scraper.get_health(),
+            "request_stats": request_stats,
+            "ejected_engines": (
+                outlier_detector.get_ejected(endpoints, request_stats)
+                if outlier_detector is not None
+                else set()
+            ),
+        }
+
+    def _apply_event(self, target: str, method: str, args: Tuple):
+        try:
+            get_component, methods = _COORDINATOR_EVENTS[target]
+            if method not in methods:
+                raise ValueError(f"{target}.{method} is not a coordinator event")
+            getattr(get_component(), method)(*args)
+        except Exception as e:
+            logger.error(f"Failed to apply {target}.{method} from a worker: {e}")
+
+    def run(self):
+        """
+        Apply the events of the workers and publish the state until stopped.
+
+        Both happen in this thread, so that the request stats monitor is
+        not modified while it computes the published stats.
+        """
+        next_publish = 0.0
+        while self.running:
+            if time.monotonic() >= next_publish:
+                try:
+                    self.snapshot.publish(self._collect())
+                except Exception as e:
+                    logger.error(f"Failed to publish the coordinator state: {e}")
+                next_publish = time.monotonic() + SNAPSHOT_INTERVAL
+            try:
+                event = self.events.get(
+                    timeout=max(0.0, next_publish - time.monotonic())
+                )
+            except queue.Empty:
+                continue
+            self._apply_event(*event)
+
+
+_shared_inflight_counters: Optional[SharedInflightCounters] = None
+_coordinator_link: Optional[CoordinatorLink] = None
+
+
+def get_shared_inflight_counters() -> Optional[SharedInflightCounters]:
+    """
+    Get the in-flight counters shared between the router processes, or None
+    if the router runs in a single process.
+    """
+    return _shared_inflight_counters
+
+
+def get_coordinator_link() -> Optional[CoordinatorLink]:
+    """
+    Get the connection of the current worker to the coordinator, or None
+    if the router runs in a single process or in the coordinator.
+    """
+    return _coordinator_link
+
+
+def _create_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if host and ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _coordinator_main(
+    num_workers: int,
+    counts,
+    snapshot: SharedSnapshot,
+    events,
+    initialize: Callable[[], None],
+):
+    global _shared_inflight_counters
+    coordinator = Coordinator(snapshot, events, counts, num_workers)
+    _shared_inflight_counters = coordinator.inflight_counters
+
+    def _stop(signum, frame):
+        coordinator.running = False
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    initialize()
+    logger.info(f"Router coordinator started with pid {os.getpid()}")
+    coordinator.run()
+
+
+def _worker_main(
+    worker_id: int,
+    num_workers: int,
+    counts,
+    snapshot: SharedSnapshot,
+    events,
+    inboxes: List,
+    sock: Optional[socket.socket],
+    host: str,
+    port: int,
+    serve: Callable[[socket.socket], None],
+):
+    global _shared_inflight_counters, _coordinator_link
+    _coordinator_link = CoordinatorLink(snapshot, events, inboxes, worker_id)
+    _coordinator_link.start()
+    _shared_inflight_counters = SharedInflightCounters(
+        counts, num_workers, worker_id, lambda: _coordinator_link.get("slots", {})
+    )
+    if sock is None:
+        sock = _create_socket(host, port, reuse_port=True)
+    logger.info(f"Router worker {worker_id} started with pid {os.getpid()}")
+    try:
+        serve(sock)
+    finally:
+        _coordinator_link.close()
+
+
+def run_workers(
+    num_workers: int,
+    host: str,
+    port: int,
+    serve: Callable[[socket.socket], None],
+    initialize_coordinator: Callable[[], None],
+):
+    """
+    Start the coordinator and num_workers router processes and wait for
+    them.
+
+    The processes are spawned rather than forked, so that they load
+    prometheus_client in multiprocess mode. serve and initialize_coordinator
+    must therefore be picklable, e.g. module-level functions or partials.
+
+    If a process exits, the other ones are stopped as well, so that the
+    router exits and gets restarted as a whole (e.g. by Kubernetes).
+
+    Args:
+        num_workers (int): The number of worker processes
+        host (str): The host to listen on
+        port (int): The port to listen on
+        serve (Callable[[socket.socket], None]): Initializes the router and
+            serves requests on the given listening socket, in a worker
+        initialize_coordinator (Callable[[], None]): Initializes the
+            service discovery and the stats, in the coordinator
+    """
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    # Without SO_REUSEPORT, the workers accept on a socket bound by the parent
+    shared_sock = None if reuse_port else _create_socket(host, port, False)
+
+    # Must be set before prometheus_client is imported by the processes
+    metrics_dir = None
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        metrics_dir = tempfile.mkdtemp(prefix="vllm-router-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    context = multiprocessing.get_context("spawn")
+    counts = create_shared_inflight_counts(num_workers)
+    snapshot = SharedSnapshot(context)
+    events = context.Queue()
+    inboxes = [context.Queue() for _ in range(num_workers)]
+
+    processes: List[multiprocessing.Process] = [
+        context.Process(
+            target=_coordinator_main,
+            args=(num_workers, counts, snapshot, events, initialize_coordinator),
+            name="vllm-router-coordinator",
+        )
+    ]
+    for worker_id in range(num_workers):
+        processes.append(
+            context.Process(
+                target=_worker_main,
+                args=(
+                    worker_id,
+                    num_workers,
+                    counts,
+                    snapshot,
+                    events,
+                    inboxes,
+                    shared_sock,
+                    host,
+                    port,
+                    serve,
+                ),
+                name=f"vllm-router-worker-{worker_id}",
+            )
+        )
+    for process in processes:
+        process.start()
+    logger.info(
+        f"Started {num_workers} router workers on {host}:{port} "
+        f"({'SO_REUSEPORT' if reuse_port else 'shared socket'})"
+    )
+
+    def _stop_processes(signum=None, frame=None):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _stop_processes)
+    signal.signal(signal.SIGINT, _stop_processes)
+    try:
+        # Wait until any process exits
+        multiprocessing.connection.wait([process.sentinel for process in processes])
+    finally:
+        _stop_processes()
+        for process in processes:
+            process.join()
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    for process in processes:
+        if process.exitcode not in (0, -signal.SIGTERM):
+            logger.error(f"Router {process.name} exited with code {process.exitcode}")